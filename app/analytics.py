@@ -0,0 +1,64 @@
+"""
+CI analytics for a repository: run counts, success and failure rates, duration
+and queue-time percentiles and flakiness per workflow.
+
+Everything is read from aggregates the run history store maintains as runs are
+written, so a request costs a handful of indexed reads no matter how many runs
+are stored.
+"""
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+from github import GithubException
+
+from app.database import run_store
+from app.github_data import fetch_repo_status
+
+logger = logging.getLogger(__name__)
+
+# Longest window the analytics endpoints accept, in days
+ANALYTICS_MAX_DAYS = 365
+
+
+def _ensure_history(owner: str, repo: str):
+    """Sync a repository nobody has looked at yet, so there is history to aggregate"""
+    if run_store.watermark(owner, repo) is not None:
+        return
+    try:
+        fetch_repo_status(owner, repo)
+    except HTTPException:
+        raise
+    except GithubException as e:
+        if e.status == 404:
+            raise HTTPException(status_code=404, detail="Repository not found or access denied")
+        raise HTTPException(status_code=502, detail=f"GitHub error {e.status}")
+    except Exception as e:
+        logger.error(f"Error syncing run history for {owner}/{repo}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to sync run history: {str(e)}")
+
+
+def _check_days(days: int):
+    if not 1 <= days <= ANALYTICS_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {ANALYTICS_MAX_DAYS}")
+
+
+def fetch_repo_analytics(owner: str, repo: str, days: int = 30) -> Dict[str, Any]:
+    _check_days(days)
+    _ensure_history(owner, repo)
+    return {
+        "full_name": f"{owner}/{repo}",
+        "days": days,
+        "workflows": run_store.workflow_analytics(owner, repo, days),
+    }
+
+
+def fetch_repo_trend(owner: str, repo: str, days: int = 30, workflow_id: Optional[int] = None) -> Dict[str, Any]:
+    _check_days(days)
+    _ensure_history(owner, repo)
+    return {
+        "full_name": f"{owner}/{repo}",
+        "days": days,
+        "workflow_id": workflow_id,
+        "daily": run_store.daily_trend(owner, repo, days, workflow_id),
+    }
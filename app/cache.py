@@ -0,0 +1,380 @@
+"""
+Server-side cache for GitHub REST responses.
+
+Entries are keyed by endpoint and query parameters, expire after a
+per-resource TTL and are evicted least-recently-used once the cache grows
+past its memory cap. Stale entries are refreshed with a conditional request
+(``If-None-Match``) so that unchanged resources come back as ``304 Not
+Modified``, which GitHub does not count against the rate limit. When GitHub
+can't be asked (rate limit, outage) the last cached response is served
+instead and the request is flagged as stale.
+
+When workers share state (see :mod:`app.shared`), responses are also written
+to the shared store, and a worker looks there before asking GitHub, so a
+resource is fetched once for all workers rather than once per worker. Within
+a worker, concurrent misses of the same resource share one fetch (see
+:mod:`app.singleflight`).
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Pattern, Tuple
+from urllib.parse import urlencode
+
+import requests
+from github import GithubException, RateLimitExceededException
+
+from app.datasource import data_source
+from app.encoding import dumps
+from app.github_client import current_request_stats
+from app.ratelimit import RateLimitExceeded, current_priority
+from app.shared import shared_store
+from app.singleflight import github_flight
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached response is served without asking GitHub; None never expires
+DEFAULT_TTLS: Dict[str, Optional[float]] = {
+    "repos": 300.0,
+    "workflows": 60.0,
+    "runs": 15.0,
+    "jobs": 10.0,
+}
+# Seconds a response stays in the shared store, to be revalidated by ETag long after its TTL
+SHARED_CACHE_TTL = 86400.0
+
+
+def _ttl_from_env(resource: str, default: Optional[float]) -> Optional[float]:
+    value = os.getenv(f"CACHE_TTL_{resource.upper()}")
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"Invalid CACHE_TTL_{resource.upper()}={value!r}, using default {default}")
+        return default
+
+
+def payload_size(data: Any) -> int:
+    """Bytes a cached payload is counted as: its compact JSON, whatever GitHub sent on the wire"""
+    return len(dumps(data))
+
+
+class CacheEntry:
+    __slots__ = ("resource", "data", "etag", "link", "size", "fetched_at")
+
+    def __init__(self, resource: str, data: Any, etag: Optional[str], link: Optional[str], size: int):
+        self.resource = resource
+        self.data = data
+        self.etag = etag
+        self.link = link
+        self.size = size
+        self.fetched_at = time.monotonic()
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class ResponseCache:
+    """Thread-safe LRU of GitHub responses bounded by total payload bytes"""
+
+    def __init__(self, max_bytes: int, ttls: Mapping[str, Optional[float]]):
+        self.max_bytes = max_bytes
+        self.ttls = dict(ttls)
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self.stale = 0
+
+    def ttl(self, resource: str) -> Optional[float]:
+        return self.ttls.get(resource, 0.0)
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        ttl = self.ttl(entry.resource)
+        return ttl is None or entry.age() < ttl
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CacheEntry):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous.size
+            self._entries[key] = entry
+            self.bytes += entry.size
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.size
+                self.evictions += 1
+
+    def revalidated(self, entry: CacheEntry):
+        with self._lock:
+            entry.fetched_at = time.monotonic()
+            self.not_modified += 1
+
+    def patch(self, pattern: Pattern[str], func: Callable[[str, Any], Any]) -> int:
+        """
+        Rewrite cached payloads whose key matches ``pattern`` in place.
+
+        ``func(key, data)`` returns the new payload, or None to leave the entry
+        alone. Entries keep their ETag, so a later ``304`` keeps the patched data.
+        Returns the number of entries changed.
+        """
+        patched = []
+        with self._lock:
+            for key, entry in self._entries.items():
+                if not pattern.search(key):
+                    continue
+                data = func(key, entry.data)
+                if data is not None:
+                    entry.data = data
+                    size = payload_size(data)
+                    self.bytes += size - entry.size
+                    entry.size = size
+                    patched.append((key, entry))
+        for key, entry in patched:
+            share_entry(key, entry)
+        return len(patched)
+
+    def served_stale(self):
+        with self._lock:
+            self.stale += 1
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def record_many(self, hits: int, misses: int):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.not_modified
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+            "stale": self.stale,
+            # Lookups that did not spend rate-limit budget (fresh hits and 304s)
+            "api_calls_saved": self.hits + self.not_modified,
+            "hit_ratio": round((self.hits + self.not_modified) / lookups, 3) if lookups else None,
+            "ttls": self.ttls,
+        }
+
+
+response_cache = ResponseCache(
+    max_bytes=int(float(os.getenv("CACHE_MAX_BYTES", 32 * 1024 * 1024))),
+    ttls={resource: _ttl_from_env(resource, ttl) for resource, ttl in DEFAULT_TTLS.items()},
+)
+
+
+def cache_key(path: str, params: Optional[Mapping[str, Any]] = None) -> str:
+    if not params:
+        return path
+    return f"{path}?{urlencode(sorted(params.items()))}"
+
+
+def _next_link(link: Optional[str]) -> Optional[str]:
+    """Extract the rel="next" URL from a GitHub Link header"""
+    if not link:
+        return None
+    for part in link.split(","):
+        section = part.split(";")
+        if len(section) >= 2 and 'rel="next"' in section[1]:
+            return section[0].strip().strip("<>")
+    return None
+
+
+class StalenessTracker:
+    __slots__ = ("stale",)
+
+    def __init__(self):
+        self.stale = False
+
+
+_staleness: contextvars.ContextVar[Optional[StalenessTracker]] = contextvars.ContextVar(
+    "cache_staleness", default=None
+)
+
+
+@contextmanager
+def track_staleness() -> Iterator[StalenessTracker]:
+    """Report whether any cached read inside the block had to serve stale data"""
+    tracker = StalenessTracker()
+    token = _staleness.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _staleness.reset(token)
+
+
+def can_serve_stale(error: Exception) -> bool:
+    """Errors that say nothing about the resource itself (unlike 404 or 401)"""
+    if isinstance(error, (RateLimitExceeded, RateLimitExceededException, requests.RequestException)):
+        return True
+    return isinstance(error, GithubException) and (error.status >= 500 or error.status == 429)
+
+
+def mark_stale():
+    """Flag the current request (and staleness tracker) as answered with outdated data"""
+    stats = current_request_stats()
+    if stats is not None:
+        stats.stale = True
+    tracker = _staleness.get()
+    if tracker is not None:
+        tracker.stale = True
+
+
+def share_entry(key: str, entry: CacheEntry):
+    """Write a response to the shared store for the other workers"""
+    store = shared_store()
+    if store is None:
+        return
+    value = {
+        "resource": entry.resource,
+        "data": entry.data,
+        "etag": entry.etag,
+        "link": entry.link,
+        "size": entry.size,
+        "fetched_at": time.time() - entry.age(),
+    }
+    try:
+        store.set(f"cache:{key}", value, ttl=SHARED_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Could not share cached {key}: {str(e)}")
+
+
+def _shared_entry(key: str) -> Optional[CacheEntry]:
+    store = shared_store()
+    if store is None:
+        return None
+    try:
+        value = store.get(f"cache:{key}")
+    except Exception as e:
+        logger.warning(f"Could not read shared {key}: {str(e)}")
+        return None
+    if value is None:
+        return None
+    entry = CacheEntry(value["resource"], value["data"], value["etag"], value["link"], value["size"])
+    entry.fetched_at = time.monotonic() - max(time.time() - value["fetched_at"], 0.0)
+    return entry
+
+
+def _serve_stale(key: str, entry: CacheEntry, error: Exception) -> CacheEntry:
+    logger.warning(f"Serving {key} from cache ({round(entry.age())}s old): {str(error)}")
+    response_cache.served_stale()
+    return entry
+
+
+def _fetch_entry(resource: str, path: str, params: Optional[Mapping[str, Any]] = None) -> CacheEntry:
+    key = cache_key(path, params)
+    entry = response_cache.get(key)
+    if entry is not None and response_cache.is_fresh(entry):
+        response_cache.record(hit=True)
+        return entry
+    # Concurrent misses of the same resource wait for one fetch. Keyed by priority
+    # too, as a background leader may be deferred where an interactive one is not.
+    entry, stale = github_flight.do((current_priority(), key), lambda: _fetch_upstream(resource, key, path, params))
+    if stale:
+        mark_stale()
+    return entry
+
+
+def _fetch_upstream(resource: str, key: str, path: str,
+                    params: Optional[Mapping[str, Any]]) -> Tuple[CacheEntry, bool]:
+    """The entry for ``key`` from the shared store or GitHub, and whether it is stale"""
+    entry = response_cache.get(key)
+    if entry is None or not response_cache.is_fresh(entry):
+        # Another worker may have fetched or revalidated it since
+        shared = _shared_entry(key)
+        if shared is not None and (entry is None or shared.fetched_at > entry.fetched_at):
+            response_cache.put(key, shared)
+            entry = shared
+    if entry is not None and response_cache.is_fresh(entry):
+        # Also when a fetch finished between the caller's lookup and joining the flight
+        response_cache.record(hit=True)
+        return entry, False
+
+    headers = {"If-None-Match": entry.etag} if entry is not None and entry.etag else None
+    try:
+        status, response_headers, data = data_source().request_json(path, params, headers)
+    except Exception as e:
+        if entry is not None and can_serve_stale(e):
+            return _serve_stale(key, entry, e), True
+        raise
+    if status == 304 and entry is not None:
+        response_cache.revalidated(entry)
+        share_entry(key, entry)
+        return entry, False
+
+    response_cache.record(hit=False)
+    # Content-Length is the compressed size, a fraction of what is held
+    entry = CacheEntry(resource, data, response_headers.get("ETag"), response_headers.get("Link"), payload_size(data))
+    response_cache.put(key, entry)
+    share_entry(key, entry)
+    return entry, False
+
+
+def cached_get(resource: str, path: str, params: Optional[Mapping[str, Any]] = None) -> Any:
+    """GET a GitHub resource through the cache"""
+    return _fetch_entry(resource, path, params).data
+
+
+def cached_iter_pages(resource: str, path: str, params: Optional[Mapping[str, Any]] = None,
+                      items_key: Optional[str] = None) -> Iterator[List[Any]]:
+    """
+    Yield the pages of a list endpoint one at a time, each page cached on its own.
+
+    Pages are fetched lazily, so callers that stop iterating early don't pay for
+    the rest. ``items_key`` names the list inside object responses (e.g.
+    ``workflow_runs``).
+    """
+    entry = _fetch_entry(resource, path, params)
+    while True:
+        page = entry.data.get(items_key, []) if items_key else entry.data
+        yield page or []
+        next_url = _next_link(entry.link)
+        if not next_url:
+            return
+        entry = _fetch_entry(resource, next_url)
+
+
+def cached_get_all(resource: str, path: str, params: Optional[Mapping[str, Any]] = None,
+                   items_key: Optional[str] = None, limit: Optional[int] = None) -> List[Any]:
+    """
+    GET every page of a list endpoint through the cache.
+
+    ``limit`` stops paging once that many items have been collected.
+    """
+    items: List[Any] = []
+    for page in cached_iter_pages(resource, path, params, items_key):
+        items.extend(page)
+        if limit is not None and len(items) >= limit:
+            return items[:limit]
+    return items
@@ -0,0 +1,224 @@
+"""
+Server-side catalog of every repository the token can access.
+
+The complete ``/user/repos`` listing is loaded at most once per
+REPO_CATALOG_TTL and indexed in memory: trigrams of name and description for
+substring search, and word prefixes for queries shorter than three characters.
+Searching and paging are answered from the index without calling GitHub.
+"""
+import bisect
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from fastapi import HTTPException
+
+from app.cache import cached_get_all, can_serve_stale, mark_stale
+from app.github_data import isoformat
+from app.pagination import DEFAULT_PAGE_SIZE, next_cursor, page_limit, page_start
+
+logger = logging.getLogger(__name__)
+
+# Seconds the indexed catalog is served before the listing is fetched again
+REPO_CATALOG_TTL = float(os.getenv("REPO_CATALOG_TTL", "300"))
+
+_WORD_SPLIT = re.compile(r"[^a-z0-9]+")
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _repo_entry(raw: Dict[str, Any]) -> Dict[str, Any]:
+    owner = raw.get("owner") or {}
+    owner_login = owner.get("login", "unknown")
+    name = raw.get("name", "")
+    return {
+        "id": raw.get("id", 0),
+        "name": name,
+        "full_name": f"{owner_login}/{name}",
+        "owner": {
+            "login": owner_login,
+            "avatar_url": owner.get("avatar_url", ""),
+            "html_url": f"https://github.com/{owner_login}"
+        },
+        "html_url": f"https://github.com/{owner_login}/{name}",
+        "description": raw.get("description"),
+        "stargazers_count": raw.get("stargazers_count", 0),
+        "forks_count": raw.get("forks_count", 0),
+        "language": raw.get("language"),
+        "updated_at": isoformat(raw.get("updated_at")) or "",
+        "private": raw.get("private", False),
+        "default_branch": raw.get("default_branch"),
+    }
+
+
+class RepoIndex:
+    """An immutable, searchable snapshot of the repository listing (most recently updated first)"""
+
+    __slots__ = ("repos", "_texts", "_trigrams", "_words", "built_at")
+
+    def __init__(self, repos: List[Dict[str, Any]]):
+        self.repos = repos
+        self._texts = [f"{r['name']}\n{r['description'] or ''}".lower() for r in repos]
+        self._trigrams: Dict[str, List[int]] = {}
+        words = set()
+        for i, text in enumerate(self._texts):
+            for trigram in _trigrams(text):
+                self._trigrams.setdefault(trigram, []).append(i)
+            words.update((word, i) for word in _WORD_SPLIT.split(text) if word)
+        self._words = sorted(words)
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.repos)
+
+    def search(self, q: Optional[str]) -> Sequence[int]:
+        """Positions of the repositories whose name or description matches ``q``"""
+        q = (q or "").strip().lower()
+        if not q:
+            return range(len(self.repos))
+        if len(q) < 3:
+            # Too short for trigrams: match the start of any word instead
+            matches = set()
+            for word, i in self._words[bisect.bisect_left(self._words, (q, -1)):]:
+                if not word.startswith(q):
+                    break
+                matches.add(i)
+            return sorted(matches)
+        postings = sorted((self._trigrams.get(t, []) for t in _trigrams(q)), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(posting)
+        # Trigrams can match out of order; confirm the substring
+        return [i for i in sorted(candidates) if q in self._texts[i]]
+
+
+class RepoCatalog:
+    """Keeps the indexed repository listing fresh"""
+
+    def __init__(self, ttl: float = REPO_CATALOG_TTL):
+        self.ttl = ttl
+        self._index: Optional[RepoIndex] = None
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.searches = 0
+
+    def _fresh(self, index: Optional[RepoIndex]) -> bool:
+        return index is not None and time.monotonic() - index.built_at < self.ttl
+
+    def index(self) -> RepoIndex:
+        index = self._index
+        if self._fresh(index):
+            return index
+        # One rebuild at a time; everyone else waits for its result
+        with self._lock:
+            index = self._index
+            if self._fresh(index):
+                return index
+            started = time.perf_counter()
+            try:
+                raw_repos = cached_get_all("repos", "/user/repos", {
+                    "affiliation": "owner,collaborator,organization_member",
+                    "sort": "updated",
+                    "direction": "desc",
+                    "per_page": 100,
+                })
+            except Exception as e:
+                if index is None or not can_serve_stale(e):
+                    raise
+                logger.warning(f"Serving the repository catalog from {round(time.monotonic() - index.built_at)}s ago: {str(e)}")
+                mark_stale()
+                return index
+            self._index = RepoIndex([_repo_entry(raw) for raw in raw_repos if raw])
+            self.builds += 1
+            logger.info(f"Indexed {len(self._index)} repositories in {round((time.perf_counter() - started) * 1000)}ms")
+            return self._index
+
+    def invalidate(self):
+        self._index = None
+
+    def stats(self) -> Dict[str, Any]:
+        index = self._index
+        return {
+            "repos": len(index) if index is not None else 0,
+            "age": round(time.monotonic() - index.built_at) if index is not None else None,
+            "ttl": self.ttl,
+            "builds": self.builds,
+            "searches": self.searches,
+        }
+
+
+repo_catalog = RepoCatalog()
+
+
+def _load_index() -> RepoIndex:
+    try:
+        return repo_catalog.index()
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching repositories: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching repositories: {str(e)}")
+
+
+def search_repos(q: Optional[str] = None, cursor: Optional[str] = None, page: Optional[int] = None,
+                 limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    One page of the repositories matching ``q``. Continue with ``next_cursor``
+    (or ``page``) until it is null.
+    """
+    limit = page_limit(limit)
+    start = page_start(cursor, page, limit)
+    index = _load_index()
+    matches = index.search(q)
+    repo_catalog.searches += 1
+    end = start + limit
+    return {
+        "items": [index.repos[i] for i in matches[start:end]],
+        "total": len(matches),
+        "limit": limit,
+        "next_cursor": next_cursor(end, len(matches)),
+    }
+
+
+def iter_repos(q: Optional[str] = None, cursor: Optional[str] = None, page: Optional[int] = None,
+               limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Every repository matching ``q`` (or a ``limit``-sized window of them), for
+    streaming; a ``page`` without ``limit`` is a default-sized page, as in
+    :func:`search_repos`. The index is loaded before returning, so errors
+    surface here rather than halfway through a response.
+    """
+    limit = page_limit(limit, default=None if page is None else DEFAULT_PAGE_SIZE)
+    start = page_start(cursor, page, limit or 0)
+    index = _load_index()
+    matches = index.search(q)
+    repo_catalog.searches += 1
+    end = len(matches) if limit is None else start + limit
+    return (index.repos[i] for i in matches[start:end])
+
+
+def list_repo_summaries(cursor: Optional[str] = None, page: Optional[int] = None,
+                        limit: Optional[int] = None) -> Dict[str, Any]:
+    """The catalog in the compact shape of ``/api/repos``"""
+    result = search_repos(None, cursor, page, limit)
+    return {
+        "repos": [
+            {
+                "owner": repo["owner"]["login"],
+                "name": repo["name"],
+                "full_name": repo["full_name"],
+                "private": repo["private"],
+                "description": repo["description"],
+            }
+            for repo in result["items"]
+        ],
+        "total": result["total"],
+        "next_cursor": result["next_cursor"],
+    }
@@ -0,0 +1,19 @@
+"""
+Reading tuning settings from the environment.
+
+An invalid value falls back to the default with a warning rather than keeping
+the service from starting.
+"""
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def env_float(name: str, default: float) -> float:
+    """``float`` setting ``name``, or ``default`` when unset or invalid"""
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid value for {name}, using default {default}")
+        return default
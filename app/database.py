@@ -0,0 +1,635 @@
+"""
+Persistent run history in an embedded SQLite database (WAL mode).
+
+Keeps the repositories added to the dashboard, their workflows and every run
+seen so far, so history survives restarts and grows beyond the last page
+GitHub returns. Each sync only reads the newest pages of runs until one holds
+nothing new or updated, plus each workflow's newest stored run and the runs
+that were still open.
+
+Triggers keep per-workflow, per-day aggregates (counts, duration and queue-time
+histograms, failure-to-success flips) current as runs are written, so the
+analytics endpoints never scan the runs table.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DATABASE_PATH = os.getenv("DATABASE_PATH", os.path.join("data", "dashboard.db"))
+
+# Nested objects GitHub repeats in every run; dropped before storing the raw JSON
+_BULKY_RUN_FIELDS = ("repository", "pull_requests", "referenced_workflows")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    repo TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    name TEXT NOT NULL,
+    added_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workflows (
+    repo TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    name TEXT,
+    path TEXT,
+    state TEXT,
+    html_url TEXT,
+    -- Runs requested from the workflow's own listing to backfill history older than the sync
+    history_depth INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (repo, id)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    workflow_id INTEGER NOT NULL,
+    run_number INTEGER,
+    run_attempt INTEGER,
+    status TEXT,
+    conclusion TEXT,
+    event TEXT,
+    head_branch TEXT,
+    head_sha TEXT,
+    actor TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_workflow ON runs (repo, workflow_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS runs_by_repo ON runs (repo, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS open_runs ON runs (repo, status) WHERE status != 'completed';
+"""
+
+FAILURE_CONCLUSIONS = ("failure", "timed_out", "startup_failure")
+_FAILED = f"IN ({', '.join(repr(c) for c in FAILURE_CONCLUSIONS)})"
+
+
+def _histogram_bounds() -> List[float]:
+    """Upper bounds (seconds) of the duration histogram: 1s steps to 10s, then 10% wider each"""
+    bounds = [float(n) for n in range(1, 11)]
+    while bounds[-1] < 90 * 86400:
+        bounds.append(round(bounds[-1] * 1.1, 1))
+    return bounds + [1e12]
+
+
+def _run_stats_sql(row: str, sign: int) -> str:
+    """Statements adding (sign 1) or removing (sign -1) a completed run's share of the aggregates"""
+    day = f"substr({row}.created_at, 1, 10)"
+    duration = (f"MAX((julianday({row}.updated_at) - "
+                f"julianday(COALESCE({row}.run_started_at, {row}.created_at))) * 86400, 0)")
+    # Re-run attempts keep the original created_at, so only first attempts have a queue time
+    queue = (f"(CASE WHEN COALESCE({row}.run_attempt, 1) = 1 AND {row}.run_started_at IS NOT NULL "
+             f"THEN MAX((julianday({row}.run_started_at) - julianday({row}.created_at)) * 86400, 0) END)")
+    histogram = """
+    INSERT INTO run_histogram (repo, workflow_id, day, metric, upper, count)
+    SELECT {row}.repo, {row}.workflow_id, {day}, '{metric}',
+           (SELECT MIN(upper) FROM histogram_buckets WHERE upper >= {value}), {sign}
+    WHERE {value} IS NOT NULL
+    ON CONFLICT (repo, workflow_id, day, metric, upper) DO UPDATE SET count = count + excluded.count;"""
+    return f"""
+    INSERT INTO run_daily (repo, workflow_id, day, runs, success, failure, cancelled, duration_sum, queued, queue_sum)
+    VALUES ({row}.repo, {row}.workflow_id, {day}, {sign},
+            {sign} * ({row}.conclusion = 'success'), {sign} * ({row}.conclusion {_FAILED}),
+            {sign} * ({row}.conclusion = 'cancelled'), {sign} * {duration},
+            {sign} * ({queue} IS NOT NULL), {sign} * COALESCE({queue}, 0))
+    ON CONFLICT (repo, workflow_id, day) DO UPDATE SET
+        runs = runs + excluded.runs, success = success + excluded.success,
+        failure = failure + excluded.failure, cancelled = cancelled + excluded.cancelled,
+        duration_sum = duration_sum + excluded.duration_sum,
+        queued = queued + excluded.queued, queue_sum = queue_sum + excluded.queue_sum;""" + \
+        histogram.format(row=row, day=day, metric="duration", value=duration, sign=sign) + \
+        histogram.format(row=row, day=day, metric="queue", value=queue, sign=sign)
+
+
+# Runs already counted are skipped in the SELECTs: OR IGNORE in a trigger gives way to the
+# conflict policy of the upsert that fired it, which aborts
+_FLIPS_SQL = f"""
+    -- A success on a commit that already failed (in an earlier attempt or another run) is a flip
+    INSERT INTO run_flips (run_id, repo, workflow_id, day)
+    SELECT NEW.id, NEW.repo, NEW.workflow_id, substr(NEW.created_at, 1, 10)
+    WHERE NEW.conclusion = 'success' AND NOT EXISTS (SELECT 1 FROM run_flips WHERE run_id = NEW.id)
+    AND (NEW.failed_before OR EXISTS (
+        SELECT 1 FROM runs WHERE repo = NEW.repo AND workflow_id = NEW.workflow_id AND head_sha = NEW.head_sha
+        AND id != NEW.id AND conclusion {_FAILED} AND created_at <= NEW.created_at));
+    -- A failure arriving after later successes on the same commit (backfilled history)
+    INSERT INTO run_flips (run_id, repo, workflow_id, day)
+    SELECT id, repo, workflow_id, substr(created_at, 1, 10) FROM runs
+    WHERE NEW.conclusion {_FAILED} AND repo = NEW.repo AND workflow_id = NEW.workflow_id
+    AND head_sha = NEW.head_sha AND id != NEW.id AND conclusion = 'success' AND created_at >= NEW.created_at
+    AND id NOT IN (SELECT run_id FROM run_flips);"""
+
+
+def _run_analytics_migration() -> str:
+    """Aggregates per workflow and day, kept current by triggers as runs are written"""
+    buckets = ", ".join(f"({bound})" for bound in _histogram_bounds())
+    return f"""
+    ALTER TABLE runs ADD COLUMN run_started_at TEXT;
+    ALTER TABLE runs ADD COLUMN failed_before INTEGER NOT NULL DEFAULT 0;
+    UPDATE runs SET run_started_at = json_extract(raw, '$.run_started_at');
+    -- Set completed runs aside so that the triggers below aggregate them once created
+    UPDATE runs SET status = 'completed~' WHERE status = 'completed';
+    CREATE INDEX runs_by_sha ON runs (repo, workflow_id, head_sha);
+
+    CREATE TABLE run_daily (
+        repo TEXT NOT NULL,
+        workflow_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        runs INTEGER NOT NULL DEFAULT 0,
+        success INTEGER NOT NULL DEFAULT 0,
+        failure INTEGER NOT NULL DEFAULT 0,
+        cancelled INTEGER NOT NULL DEFAULT 0,
+        duration_sum REAL NOT NULL DEFAULT 0,
+        queued INTEGER NOT NULL DEFAULT 0,
+        queue_sum REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (repo, day, workflow_id)
+    ) WITHOUT ROWID;
+    CREATE TABLE histogram_buckets (upper REAL PRIMARY KEY);
+    INSERT INTO histogram_buckets (upper) VALUES {buckets};
+    CREATE TABLE run_histogram (
+        repo TEXT NOT NULL,
+        workflow_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        metric TEXT NOT NULL,
+        upper REAL NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (repo, day, workflow_id, metric, upper)
+    ) WITHOUT ROWID;
+    CREATE TABLE run_flips (
+        run_id INTEGER PRIMARY KEY,
+        repo TEXT NOT NULL,
+        workflow_id INTEGER NOT NULL,
+        day TEXT NOT NULL
+    );
+    CREATE INDEX run_flips_by_day ON run_flips (repo, day);
+
+    CREATE TRIGGER runs_stats_insert AFTER INSERT ON runs WHEN NEW.status = 'completed' BEGIN
+        {_run_stats_sql("NEW", 1)}
+        {_FLIPS_SQL}
+    END;
+    CREATE TRIGGER runs_stats_update_remove AFTER UPDATE ON runs WHEN OLD.status = 'completed' BEGIN
+        {_run_stats_sql("OLD", -1)}
+    END;
+    CREATE TRIGGER runs_stats_update_add AFTER UPDATE ON runs WHEN NEW.status = 'completed' BEGIN
+        {_run_stats_sql("NEW", 1)}
+        {_FLIPS_SQL}
+    END;
+    CREATE TRIGGER runs_stats_delete AFTER DELETE ON runs WHEN OLD.status = 'completed' BEGIN
+        {_run_stats_sql("OLD", -1)}
+        DELETE FROM run_flips WHERE run_id = OLD.id;
+    END;
+
+    UPDATE runs SET status = 'completed' WHERE status = 'completed~';
+    """
+
+
+def _jobs_migration() -> str:
+    """Jobs (with their steps) of completed run attempts, which never change once finished"""
+    return """
+    CREATE TABLE jobs (
+        id INTEGER PRIMARY KEY,
+        run_id INTEGER NOT NULL,
+        run_attempt INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        raw TEXT NOT NULL
+    );
+    CREATE UNIQUE INDEX jobs_by_run ON jobs (run_id, run_attempt, position);
+    -- GitHub pages of a run attempt's job listing that are stored completely
+    CREATE TABLE job_pages (
+        run_id INTEGER NOT NULL,
+        run_attempt INTEGER NOT NULL,
+        page INTEGER NOT NULL,
+        total_count INTEGER NOT NULL,
+        PRIMARY KEY (run_id, run_attempt, page)
+    ) WITHOUT ROWID;
+    CREATE TRIGGER runs_delete_jobs AFTER DELETE ON runs BEGIN
+        DELETE FROM jobs WHERE run_id = OLD.id;
+        DELETE FROM job_pages WHERE run_id = OLD.id;
+    END;
+    """
+
+
+def _flips_update_migration() -> str:
+    """
+    Retract a run's flip when it is updated, as its daily and histogram shares
+    are, so a flip re-run into a failure (or back into progress) stops counting.
+    Either update trigger may fire first: the add trigger clears the flip
+    before deciding it again, the remove trigger only when the run is no
+    longer completed. Flips already recorded no longer abort the write that
+    would record them again.
+    """
+    return f"""
+    DROP TRIGGER runs_stats_insert;
+    DROP TRIGGER runs_stats_update_remove;
+    DROP TRIGGER runs_stats_update_add;
+    CREATE TRIGGER runs_stats_insert AFTER INSERT ON runs WHEN NEW.status = 'completed' BEGIN
+        {_run_stats_sql("NEW", 1)}
+        {_FLIPS_SQL}
+    END;
+    CREATE TRIGGER runs_stats_update_remove AFTER UPDATE ON runs WHEN OLD.status = 'completed' BEGIN
+        {_run_stats_sql("OLD", -1)}
+        DELETE FROM run_flips WHERE run_id = OLD.id AND NEW.status != 'completed';
+    END;
+    CREATE TRIGGER runs_stats_update_add AFTER UPDATE ON runs WHEN NEW.status = 'completed' BEGIN
+        {_run_stats_sql("NEW", 1)}
+        DELETE FROM run_flips WHERE run_id = OLD.id;
+        {_FLIPS_SQL}
+    END;
+    -- Flips left behind by runs updated before this migration
+    DELETE FROM run_flips WHERE run_id NOT IN (
+        SELECT id FROM runs WHERE status = 'completed' AND conclusion = 'success');
+    """
+
+
+# Schema changes after the initial SCHEMA, applied in order; PRAGMA user_version counts those applied
+MIGRATIONS: List[Callable[[], str]] = [
+    _run_analytics_migration,
+    _jobs_migration,
+    _flips_update_migration,
+]
+
+
+def _statements(script: str) -> Iterator[str]:
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            if statement.strip():
+                yield statement
+            statement = ""
+
+
+def repo_key(owner: str, name: str) -> str:
+    return f"{owner}/{name}".lower()
+
+
+class RunStore:
+    """Thread-safe access to the history database; one connection per thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=10000")
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(SCHEMA)
+                    self._migrate(conn)
+                    self._initialized = True
+                    logger.info(f"Run history database ready at {self.path}")
+        self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection):
+        for version, migration in enumerate(MIGRATIONS, 1):
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Another process may have migrated while we waited for the lock
+                if conn.execute("PRAGMA user_version").fetchone()[0] < version:
+                    for statement in _statements(migration()):
+                        conn.execute(statement)
+                    conn.execute(f"PRAGMA user_version = {version}")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            logger.info(f"Migrated run history database to version {version}")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connect()
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    # Repositories ------------------------------------------------------------
+
+    def add_repo(self, owner: str, name: str):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO repos (repo, owner, name, added_at) VALUES (?, ?, ?, ?) ON CONFLICT (repo) DO NOTHING",
+                (repo_key(owner, name), owner, name, time.time()),
+            )
+
+    def remove_repo(self, owner: str, name: str) -> bool:
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM repos WHERE repo = ?", (repo_key(owner, name),)).rowcount > 0
+
+    def list_repos(self) -> List[Dict[str, str]]:
+        rows = self._connect().execute("SELECT owner, name FROM repos ORDER BY added_at").fetchall()
+        return [{"id": f"{row['owner']}/{row['name']}", "owner": row["owner"], "name": row["name"]} for row in rows]
+
+    # Workflows ---------------------------------------------------------------
+
+    def upsert_workflows(self, owner: str, name: str, raw_workflows: Iterable[Dict[str, Any]]):
+        """Store a repository's complete workflow listing, forgetting deleted workflows"""
+        key = repo_key(owner, name)
+        rows = [(key, w["id"], w.get("name"), w.get("path"), w.get("state"), w.get("html_url")) for w in raw_workflows]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO workflows (repo, id, name, path, state, html_url) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (repo, id) DO UPDATE SET name = excluded.name, path = excluded.path, "
+                "state = excluded.state, html_url = excluded.html_url",
+                rows,
+            )
+            ids = [row[1] for row in rows]
+            conn.execute(
+                f"DELETE FROM workflows WHERE repo = ? AND id NOT IN ({','.join('?' * len(ids))})",
+                (key, *ids),
+            )
+
+    def workflows(self, owner: str, name: str) -> List[Dict[str, Any]]:
+        rows = self._connect().execute(
+            "SELECT id, name, path, state, html_url, history_depth FROM workflows WHERE repo = ? ORDER BY id",
+            (repo_key(owner, name),),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def set_history_depth(self, owner: str, name: str, workflow_id: int, depth: int):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE workflows SET history_depth = MAX(history_depth, ?) WHERE repo = ? AND id = ?",
+                (depth, repo_key(owner, name), workflow_id),
+            )
+
+    # Runs --------------------------------------------------------------------
+
+    def upsert_runs(self, owner: str, name: str, raw_runs: Iterable[Dict[str, Any]]) -> int:
+        """Insert or update runs from their GitHub JSON; older copies never overwrite newer ones"""
+        key = repo_key(owner, name)
+        rows = []
+        for raw in raw_runs:
+            trimmed = {k: v for k, v in raw.items() if k not in _BULKY_RUN_FIELDS}
+            if raw.get("head_repository"):
+                trimmed["head_repository"] = {"full_name": raw["head_repository"].get("full_name")}
+            rows.append((
+                raw["id"], key, raw.get("workflow_id"), raw.get("run_number"), raw.get("run_attempt"),
+                raw.get("status"), raw.get("conclusion"), raw.get("event"), raw.get("head_branch"),
+                raw.get("head_sha"), (raw.get("actor") or {}).get("login"), raw.get("created_at"),
+                raw.get("run_started_at"), raw.get("updated_at"), json.dumps(trimmed, separators=(",", ":")),
+            ))
+        if not rows:
+            return 0
+        # Oldest first, so a commit's failure is stored before the success that flips it
+        rows.sort(key=lambda row: (row[11], row[0]))
+        with self._transaction() as conn:
+            return conn.executemany(
+                "INSERT INTO runs (id, repo, workflow_id, run_number, run_attempt, status, conclusion, event, "
+                "head_branch, head_sha, actor, created_at, run_started_at, updated_at, raw) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET run_attempt = excluded.run_attempt, status = excluded.status, "
+                "conclusion = excluded.conclusion, run_started_at = excluded.run_started_at, "
+                "updated_at = excluded.updated_at, actor = excluded.actor, raw = excluded.raw, "
+                f"failed_before = failed_before OR COALESCE(conclusion {_FAILED}, 0) "
+                "WHERE excluded.updated_at > runs.updated_at OR runs.updated_at IS NULL",
+                rows,
+            ).rowcount
+
+    def run(self, owner: str, name: str, run_id: int) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            "SELECT raw FROM runs WHERE id = ? AND repo = ?", (run_id, repo_key(owner, name))
+        ).fetchone()
+        return json.loads(row["raw"]) if row else None
+
+    def delete_runs(self, run_ids: Iterable[int]):
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM runs WHERE id = ?", [(run_id,) for run_id in run_ids])
+
+    def watermark(self, owner: str, name: str) -> Optional[Tuple[str, int]]:
+        """(created_at, id) of the newest stored run of a repository"""
+        row = self._connect().execute(
+            "SELECT created_at, id FROM runs WHERE repo = ? ORDER BY created_at DESC, id DESC LIMIT 1",
+            (repo_key(owner, name),),
+        ).fetchone()
+        return (row["created_at"], row["id"]) if row else None
+
+    def stored_updates(self, owner: str, name: str, run_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+        """``updated_at`` of those of ``run_ids`` that are stored"""
+        ids = list(run_ids)
+        if not ids:
+            return {}
+        rows = self._connect().execute(
+            f"SELECT id, updated_at FROM runs WHERE repo = ? AND id IN ({', '.join('?' * len(ids))})",
+            (repo_key(owner, name), *ids),
+        ).fetchall()
+        return {row["id"]: row["updated_at"] for row in rows}
+
+    def newest_run_ids(self, owner: str, name: str) -> List[int]:
+        """The newest stored run of every workflow"""
+        rows = self._connect().execute(
+            "SELECT id FROM ("
+            "  SELECT id, ROW_NUMBER() OVER (PARTITION BY workflow_id ORDER BY created_at DESC, id DESC) AS position"
+            "  FROM runs WHERE repo = ?"
+            ") WHERE position = 1",
+            (repo_key(owner, name),),
+        ).fetchall()
+        return [row["id"] for row in rows]
+
+    def open_run_ids(self, owner: str, name: str, limit: int) -> List[int]:
+        rows = self._connect().execute(
+            "SELECT id FROM runs WHERE repo = ? AND status != 'completed' ORDER BY created_at DESC LIMIT ?",
+            (repo_key(owner, name), limit),
+        ).fetchall()
+        return [row["id"] for row in rows]
+
+    def recent_runs(self, owner: str, name: str, per_workflow: int) -> Dict[int, List[Dict[str, Any]]]:
+        """The newest ``per_workflow`` runs of every workflow, newest first, as GitHub JSON"""
+        rows = self._connect().execute(
+            "SELECT workflow_id, raw FROM ("
+            "  SELECT workflow_id, raw, ROW_NUMBER() OVER ("
+            "    PARTITION BY workflow_id ORDER BY created_at DESC, id DESC) AS position"
+            "  FROM runs WHERE repo = ?"
+            ") WHERE position <= ? ORDER BY workflow_id, position",
+            (repo_key(owner, name), per_workflow),
+        ).fetchall()
+        grouped: Dict[int, List[Dict[str, Any]]] = {}
+        for row in rows:
+            grouped.setdefault(row["workflow_id"], []).append(json.loads(row["raw"]))
+        return grouped
+
+    def workflow_runs(self, owner: str, name: str, workflow_id: int, limit: int) -> List[Dict[str, Any]]:
+        rows = self._connect().execute(
+            "SELECT raw FROM runs WHERE repo = ? AND workflow_id = ? ORDER BY created_at DESC, id DESC LIMIT ?",
+            (repo_key(owner, name), workflow_id, limit),
+        ).fetchall()
+        return [json.loads(row["raw"]) for row in rows]
+
+    # Jobs --------------------------------------------------------------------
+
+    def job_page_total(self, run_id: int, run_attempt: int, page: int) -> Optional[int]:
+        """The listing's total_count if GitHub page ``page`` of the attempt's jobs is stored"""
+        row = self._connect().execute(
+            "SELECT total_count FROM job_pages WHERE run_id = ? AND run_attempt = ? AND page = ?",
+            (run_id, run_attempt, page),
+        ).fetchone()
+        return row["total_count"] if row else None
+
+    def store_job_page(self, run_id: int, run_attempt: int, page: int, per_page: int,
+                       total_count: int, raw_jobs: List[Dict[str, Any]]):
+        offset = (page - 1) * per_page
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO jobs (id, run_id, run_attempt, position, raw) VALUES (?, ?, ?, ?, ?)",
+                [(job["id"], run_id, run_attempt, offset + i, json.dumps(job, separators=(",", ":")))
+                 for i, job in enumerate(raw_jobs)],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO job_pages (run_id, run_attempt, page, total_count) VALUES (?, ?, ?, ?)",
+                (run_id, run_attempt, page, total_count),
+            )
+
+    def jobs(self, run_id: int, run_attempt: int, start: int, end: int) -> List[Dict[str, Any]]:
+        rows = self._connect().execute(
+            "SELECT raw FROM jobs WHERE run_id = ? AND run_attempt = ? AND position >= ? AND position < ? "
+            "ORDER BY position",
+            (run_id, run_attempt, start, end),
+        ).fetchall()
+        return [json.loads(row["raw"]) for row in rows]
+
+    # Analytics -----------------------------------------------------------------
+
+    @staticmethod
+    def _since(days: int) -> str:
+        return (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+
+    def workflow_analytics(self, owner: str, name: str, days: int) -> List[Dict[str, Any]]:
+        """
+        Per-workflow run counts, rates, duration and queue-time percentiles and
+        flips over the last ``days`` days, read from the precomputed aggregates.
+        Percentiles are histogram bucket bounds, accurate to about 10%.
+        """
+        key, since = repo_key(owner, name), self._since(days)
+        conn = self._connect()
+        totals = conn.execute(
+            "SELECT d.workflow_id, w.name, w.path, SUM(d.runs) AS runs, SUM(d.success) AS success, "
+            "SUM(d.failure) AS failure, SUM(d.cancelled) AS cancelled, SUM(d.duration_sum) AS duration_sum, "
+            "SUM(d.queued) AS queued, SUM(d.queue_sum) AS queue_sum, "
+            "(SELECT COUNT(*) FROM run_flips f WHERE f.repo = d.repo AND f.workflow_id = d.workflow_id "
+            " AND f.day >= ?) AS flips "
+            "FROM run_daily d LEFT JOIN workflows w ON w.repo = d.repo AND w.id = d.workflow_id "
+            "WHERE d.repo = ? AND d.day >= ? GROUP BY d.workflow_id HAVING SUM(d.runs) > 0 ORDER BY d.workflow_id",
+            (since, key, since),
+        ).fetchall()
+        percentiles = conn.execute(
+            "WITH buckets AS ("
+            "  SELECT workflow_id, metric, upper, SUM(count) AS n FROM run_histogram"
+            "  WHERE repo = ? AND day >= ? GROUP BY workflow_id, metric, upper HAVING n > 0"
+            "), cumulative AS ("
+            "  SELECT workflow_id, metric, upper,"
+            "    SUM(n) OVER (PARTITION BY workflow_id, metric ORDER BY upper) AS below,"
+            "    SUM(n) OVER (PARTITION BY workflow_id, metric) AS total"
+            "  FROM buckets"
+            ") SELECT workflow_id, metric,"
+            "  MIN(CASE WHEN below >= 0.5 * total THEN upper END) AS p50,"
+            "  MIN(CASE WHEN below >= 0.9 * total THEN upper END) AS p90,"
+            "  MIN(CASE WHEN below >= 0.99 * total THEN upper END) AS p99"
+            " FROM cumulative GROUP BY workflow_id, metric",
+            (key, since),
+        ).fetchall()
+        quantiles = {(row["workflow_id"], row["metric"]): row for row in percentiles}
+
+        def distribution(workflow_id: int, metric: str, total: float, count: int) -> Dict[str, Any]:
+            row = quantiles.get((workflow_id, metric))
+            return {
+                "avg": round(total / count, 1) if count else None,
+                **{p: row[p] if row else None for p in ("p50", "p90", "p99")},
+            }
+
+        workflows = []
+        for row in totals:
+            runs = row["runs"]
+            workflows.append({
+                "id": row["workflow_id"],
+                "name": row["name"],
+                "path": row["path"],
+                "runs": runs,
+                "success": row["success"],
+                "failure": row["failure"],
+                "cancelled": row["cancelled"],
+                "success_rate": round(row["success"] / runs, 4),
+                "failure_rate": round(row["failure"] / runs, 4),
+                "duration_seconds": distribution(row["workflow_id"], "duration", row["duration_sum"], runs),
+                "queue_seconds": distribution(row["workflow_id"], "queue", row["queue_sum"], row["queued"]),
+                "flips": row["flips"],
+                "flakiness": round(row["flips"] / runs, 4),
+            })
+        return workflows
+
+    def daily_trend(self, owner: str, name: str, days: int,
+                    workflow_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Per-day totals for the repository (or one workflow) over the last ``days`` days"""
+        key, since = repo_key(owner, name), self._since(days)
+        workflow_filter = "" if workflow_id is None else " AND workflow_id = :workflow_id"
+        rows = self._connect().execute(
+            "SELECT d.day, d.runs, d.success, d.failure, d.cancelled, d.duration_sum, "
+            f"(SELECT COUNT(*) FROM run_flips WHERE repo = :repo AND day = d.day{workflow_filter}) AS flips "
+            "FROM (SELECT day, SUM(runs) AS runs, SUM(success) AS success, SUM(failure) AS failure, "
+            "      SUM(cancelled) AS cancelled, SUM(duration_sum) AS duration_sum FROM run_daily "
+            f"      WHERE repo = :repo AND day >= :since{workflow_filter} GROUP BY day) d "
+            "WHERE d.runs > 0 ORDER BY d.day",
+            {"repo": key, "since": since, "workflow_id": workflow_id},
+        ).fetchall()
+        return [
+            {
+                "day": row["day"],
+                "runs": row["runs"],
+                "success_rate": round(row["success"] / row["runs"], 4),
+                "failure_rate": round(row["failure"] / row["runs"], 4),
+                "cancelled": row["cancelled"],
+                "avg_duration_seconds": round(row["duration_sum"] / row["runs"], 1),
+                "flips": row["flips"],
+            }
+            for row in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connect()
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("repos", "workflows", "runs")
+        }
+        size = sum(
+            os.path.getsize(path) for path in (self.path, f"{self.path}-wal") if os.path.exists(path)
+        )
+        return {"path": self.path, "bytes": size, **counts}
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+run_store = RunStore(DATABASE_PATH)
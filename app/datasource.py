@@ -0,0 +1,95 @@
+"""
+Pluggable source of GitHub REST data.
+
+Everything the dashboard reads from GitHub goes through :func:`data_source`:
+``request_json`` for API resources, ``download`` for files the API
+redirects to (job logs) and ``graphql`` for GraphQL queries. The default source is the GitHub API, or any
+compatible server at GITHUB_API_URL. GITHUB_DATA_SOURCE selects another
+implementation as ``module:attribute`` (a DataSource instance or a factory),
+e.g. ``benchmarks.mock_github:InProcessSource`` to run fully offline.
+"""
+import importlib
+import logging
+import os
+import threading
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class DataSource:
+    """Interface of a GitHub REST data source"""
+
+    name = "abstract"
+
+    def available(self) -> bool:
+        """Whether requests can be made (e.g. the token is configured and valid)"""
+        return True
+
+    def request_json(self, url: str, params: Optional[Mapping[str, Any]] = None,
+                     headers: Optional[Mapping[str, str]] = None) -> Tuple[int, Mapping[str, str], Any]:
+        """
+        GET a REST resource by path (or absolute URL from a ``Link`` header).
+
+        Returns ``(status, headers, data)``; ``data`` is None for ``304 Not
+        Modified``. Errors are raised as the exceptions PyGithub would raise.
+        """
+        raise NotImplementedError
+
+    def download(self, path: str, headers: Optional[Mapping[str, str]] = None) -> requests.Response:
+        """GET an endpoint that redirects to a file; the streamed response must be closed by the caller"""
+        raise NotImplementedError
+
+    def graphql(self, query: str, variables: Optional[Mapping[str, Any]] = None,
+                owner: Optional[str] = None) -> Dict[str, Any]:
+        """
+        POST a GraphQL query; returns the response body with its ``data`` and
+        ``errors``. ``owner`` is the account the query is about, for sources
+        that pick a token by owner.
+        """
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        """Cached figures only: health checks and metrics call this on the event loop"""
+        return {"name": self.name}
+
+    def close(self):
+        pass
+
+
+_source: Optional[DataSource] = None
+_lock = threading.Lock()
+
+
+def _load(spec: str) -> DataSource:
+    module_name, _, attribute = spec.partition(":")
+    target = getattr(importlib.import_module(module_name), attribute or "data_source")
+    source = target if isinstance(target, DataSource) else target()
+    logger.info(f"Using GitHub data source {source.name} ({spec})")
+    return source
+
+
+def data_source() -> DataSource:
+    """The configured data source, created on first use"""
+    global _source
+    source = _source
+    if source is None:
+        with _lock:
+            if _source is None:
+                spec = os.getenv("GITHUB_DATA_SOURCE")
+                if spec:
+                    _source = _load(spec)
+                else:
+                    from app.github_client import client_manager
+                    _source = client_manager
+            source = _source
+    return source
+
+
+def set_data_source(source: Optional[DataSource]):
+    """Replace the data source; None goes back to the configured default"""
+    global _source
+    with _lock:
+        _source = source
@@ -0,0 +1,186 @@
+"""
+Compact encoding of the dashboard's own JSON responses.
+
+Run listings repeat URLs and actor and commit objects for every run, and the
+UI polls them, so the status endpoints return their payloads through
+:func:`json_response` rather than FastAPI's default encoder:
+
+- serialized with ``orjson`` when it is installed (``json`` otherwise),
+  without the ``jsonable_encoder`` pass over plain dicts
+- ``fields=status,conclusion,...`` keeps only those fields (and ``id``) of
+  every run in the payload
+- a strong ``ETag`` from a hash of the body, so a browser revalidating
+  (``Cache-Control: no-cache``) gets ``304 Not Modified`` without the body
+- compressed with brotli (when the ``brotli`` package is installed) or gzip,
+  as the client accepts, above COMPRESS_MIN_BYTES
+
+Streaming responses (logs, ``/api/stream``) are left alone: compressing them
+would hold back output until a compressor block fills.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, FrozenSet, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Smaller bodies are sent as they are; compressing them saves less than the headers cost
+COMPRESS_MIN_BYTES = max(int(os.getenv("COMPRESS_MIN_BYTES", "512")), 0)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+# Keys whose values are runs (or lists of runs) in the status payloads
+RUN_KEYS = ("runs", "latest_run", "recent_runs")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact JSON bytes; types JSON doesn't know go through FastAPI's encoder"""
+    if orjson is not None:
+        return orjson.dumps(content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=jsonable_encoder, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def parse_fields(fields: Optional[str]) -> Optional[FrozenSet[str]]:
+    if not fields:
+        return None
+    return frozenset(f.strip() for f in fields.split(",") if f.strip())
+
+
+def _project_run(run: Any, fields: FrozenSet[str]) -> Any:
+    if isinstance(run, list):
+        return [_project_run(r, fields) for r in run]
+    if isinstance(run, dict):
+        return {k: v for k, v in run.items() if k == "id" or k in fields}
+    return run
+
+
+def project(content: Any, fields: FrozenSet[str]) -> Any:
+    """A copy of ``content`` whose runs only have ``id`` and ``fields``; shared payloads are not modified"""
+    if isinstance(content, dict):
+        return {k: _project_run(v, fields) if k in RUN_KEYS else project(v, fields) for k, v in content.items()}
+    if isinstance(content, list):
+        return [project(item, fields) for item in content]
+    return content
+
+
+def _digest(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def _matches(if_none_match: Optional[str], digest: str) -> bool:
+    """Whether ``If-None-Match`` names any representation (encoding) of the body with ``digest``"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        # Strong comparison is not needed to skip a body; W/ tags come from proxies that recoded it
+        tag = tag[2:] if tag.startswith("W/") else tag
+        if tag.strip('"').split("-", 1)[0] == digest:
+            return True
+    return False
+
+
+def _encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """The best coding the client accepts (``q=0`` refuses one)"""
+    accepted = set()
+    for item in (accept_encoding or "").lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class EncodingStats:
+    """Bytes before and after projection and compression, and time spent encoding"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.not_modified = 0
+        self.json_bytes = 0
+        self.sent_bytes = 0
+        self.encode_seconds = 0.0
+        self.encodings: Dict[str, int] = {}
+
+    def record(self, json_bytes: int, sent_bytes: int, seconds: float, encoding: Optional[str],
+               not_modified: bool):
+        with self._lock:
+            self.responses += 1
+            self.not_modified += not_modified
+            self.json_bytes += json_bytes
+            self.sent_bytes += sent_bytes
+            self.encode_seconds += seconds
+            key = "304" if not_modified else encoding or "identity"
+            self.encodings[key] = self.encodings.get(key, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "serializer": "orjson" if orjson is not None else "json",
+            "compression": ["br", "gzip"] if brotli is not None else ["gzip"],
+            "responses": self.responses,
+            "not_modified": self.not_modified,
+            "json_bytes": self.json_bytes,
+            "sent_bytes": self.sent_bytes,
+            "compression_ratio": round(self.sent_bytes / self.json_bytes, 3) if self.json_bytes else None,
+            "encode_seconds": round(self.encode_seconds, 6),
+            "encodings": dict(self.encodings),
+        }
+
+
+encoding_stats = EncodingStats()
+
+
+def json_response(request: Request, content: Any, fields: Optional[str] = None) -> Response:
+    """``content`` as compact JSON, projected to ``fields``, compressed and answered with 304 when unchanged"""
+    started = time.perf_counter()
+    projection = parse_fields(fields)
+    if projection:
+        content = project(content, projection)
+    body = dumps(content)
+    json_bytes = len(body)
+    encoding = _encoding(request.headers.get("accept-encoding")) if json_bytes >= COMPRESS_MIN_BYTES else None
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    if request.method in ("GET", "HEAD"):
+        digest = _digest(body)
+        # Each coding is a representation of its own, with a strong tag of its own
+        headers["ETag"] = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+        # Cached by the browser, but revalidated every time
+        headers["Cache-Control"] = "no-cache"
+        if _matches(request.headers.get("if-none-match"), digest):
+            headers.pop("Content-Encoding", None)
+            encoding_stats.record(json_bytes, 0, time.perf_counter() - started, None, True)
+            return Response(status_code=304, headers=headers)
+
+    if encoding is not None:
+        body = compress(body, encoding)
+    encoding_stats.record(json_bytes, len(body), time.perf_counter() - started, encoding, False)
+    return Response(content=body, media_type="application/json", headers=headers)
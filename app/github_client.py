@@ -0,0 +1,397 @@
+"""
+Process-wide GitHub client shared by every request handler.
+
+Each request is made with a token from the pool (see app.tokens), personal
+tokens are validated once (and re-validated periodically), and all HTTP
+traffic goes through one keep-alive connection pool that counts how often
+connections are opened versus reused. REST calls are made with
+:meth:`GitHubClientManager.request_json` on that pool rather than through
+PyGithub objects, whose private connection the pool could not reach; PyGithub
+only supplies the exception types and GitHub App authentication.
+"""
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import requests
+from github import GithubException
+from github.Requester import Requester
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from app.config import env_float
+from app.datasource import DataSource
+from app.metrics import github_endpoint, github_request_seconds
+from app.ratelimit import DEFAULT_ACCOUNT, rate_limiter
+from app.tokens import APP, Credential, TokenPool, owner_of
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = "https://api.github.com"
+USER_AGENT = "GitHub-Actions-Dashboard"
+
+
+class RequestStats:
+    """GitHub traffic attributed to a single dashboard request"""
+
+    __slots__ = ("calls", "new_connections", "stale", "trace")
+
+    def __init__(self):
+        self.calls = 0
+        self.new_connections = 0
+        # Set when cached data was served because GitHub could not be asked
+        self.stale = False
+        # (method, path, status, seconds) of every GitHub call, in order
+        self.trace: List[Tuple[str, str, int, float]] = []
+
+    @property
+    def reused_connections(self) -> int:
+        return max(self.calls - self.new_connections, 0)
+
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "github_request_stats", default=None
+)
+
+
+def begin_request_stats() -> RequestStats:
+    """Start collecting GitHub call stats for the current request context"""
+    stats = RequestStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+# time.monotonic() of the last GitHub call answered without an error
+_last_success: Optional[float] = None
+
+
+def record_github_call(method: str, url: str, status: int, seconds: float):
+    """Add a finished GitHub call to the latency metrics and the current request's trace"""
+    global _last_success
+    github_request_seconds.observe((method, github_endpoint(url), str(status)), seconds)
+    if 200 <= status < 400:
+        _last_success = time.monotonic()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.trace.append((method, urlparse(url).path, status, seconds))
+
+
+def last_success_age() -> Optional[float]:
+    """Seconds since GitHub last answered a call successfully, None if it never has"""
+    return None if _last_success is None else time.monotonic() - _last_success
+
+
+class _PoolCounters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.new_connections = 0
+
+    def record_call(self):
+        with self._lock:
+            self.calls += 1
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.calls += 1
+
+    def record_new_connection(self):
+        with self._lock:
+            self.new_connections += 1
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.new_connections += 1
+
+
+_counters = _PoolCounters()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _counters.record_new_connection()
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _counters.record_new_connection()
+        return super()._new_conn()
+
+
+class PooledHTTPAdapter(requests.adapters.HTTPAdapter):
+    """Keep-alive adapter that records calls, new connections and the rate-limit budget"""
+
+    def __init__(self, *args, account: Optional[Callable[[Optional[str]], Optional[str]]] = None, **kwargs):
+        # Maps a request's token to the budget it is counted against
+        self.account = account
+        super().__init__(*args, **kwargs)
+
+    def _account(self, request) -> str:
+        if self.account is None:
+            return DEFAULT_ACCOUNT
+        _, _, token = (request.headers.get("Authorization") or "").partition(" ")
+        return self.account(token or None) or DEFAULT_ACCOUNT
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        account = self._account(request)
+        path = urlparse(request.url).path
+        # Querying the rate limit itself is free; GraphQL has a budget of its own
+        charged = not path.endswith("/rate_limit")
+        if charged:
+            rate_limiter.acquire("graphql" if path.endswith("/graphql") else "core", account=account)
+        _counters.record_call()
+        started = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except Exception:
+            # Status 0: no response (timeout, connection error)
+            record_github_call(request.method, request.url, 0, time.perf_counter() - started)
+            raise
+        record_github_call(request.method, request.url, response.status_code, time.perf_counter() - started)
+        # Conditional requests answered with 304 do not count against the limit
+        rate_limiter.update(response.headers, account=account, refund=charged and response.status_code == 304)
+        return response
+
+
+def _error_data(response: requests.Response) -> Any:
+    """An error response's JSON body; proxies and load balancers answer with HTML or plain text"""
+    if not response.content:
+        return None
+    try:
+        return response.json()
+    except ValueError:
+        return {"message": response.text}
+
+
+class GitHubClientManager(DataSource):
+    """
+    Owns the token pool, the shared connection pool and token validation.
+    It is the default data source, talking to GITHUB_API_URL.
+    """
+
+    name = "github"
+
+    def __init__(self):
+        self.api_url = os.getenv("GITHUB_API_URL", DEFAULT_API_URL).rstrip("/")
+        self.pool_size = int(env_float("GITHUB_POOL_SIZE", 20))
+        self.timeout = int(env_float("GITHUB_TIMEOUT", 15))
+        self.validation_interval = env_float("GITHUB_VALIDATION_INTERVAL", 3600)
+
+        # https://api.github.com/graphql, or https://HOST/api/graphql on GitHub Enterprise
+        self.graphql_url = re.sub(r"/v3$", "", self.api_url) + "/graphql"
+        self.tokens = TokenPool(self.api_url, self.validation_interval)
+        self._lock = threading.Lock()
+        self.session = self._build_session()
+        # Downloads redirected away from the API (logs) don't carry the token
+        self._download_session = requests.Session()
+
+    @staticmethod
+    def _retry() -> Retry:
+        # Retrying a rate-limited request would sleep inside the worker thread
+        # until the limit resets; the rate limiter fails fast instead, so only
+        # retry transient errors here.
+        return Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+
+    def _adapter(self, retry: Retry) -> PooledHTTPAdapter:
+        return PooledHTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+            account=self.tokens.account,
+        )
+
+    def _build_session(self) -> requests.Session:
+        """One keep-alive session for every token; the token travels in each request's headers"""
+        session = requests.Session()
+        adapter = self._adapter(self._retry())
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _get(self, credential: Credential, url: str, params: Optional[Mapping[str, Any]] = None,
+             headers: Optional[Mapping[str, str]] = None, **kwargs) -> requests.Response:
+        if url.startswith("/"):
+            url = f"{self.api_url}{url}"
+        request_headers = {
+            "Authorization": f"token {credential.token}",
+            "Accept": "application/vnd.github+json",
+            "User-Agent": USER_AGENT,
+        }
+        if headers:
+            request_headers.update(headers)
+        response = self.session.get(url, params=params, headers=request_headers, timeout=self.timeout, **kwargs)
+        if response.status_code == 401:
+            credential.failed(f"{response.status_code} bad credentials")
+            logger.error(f"GitHub rejected token {credential.name}")
+        return response
+
+    def _validate(self, credential: Credential):
+        """Check a personal token once: one call for the user, none for scopes if possible"""
+        response = self._get(credential, "/user")
+        if response.status_code >= 400:
+            raise Requester.createException(response.status_code, dict(response.headers), _error_data(response))
+        credential.login = response.json()["login"]
+        scopes = response.headers.get("X-OAuth-Scopes")
+        if scopes is not None:
+            # Classic tokens report their scopes on every response
+            credential.private_access = "repo" in [scope.strip() for scope in scopes.split(",")]
+        else:
+            # Fine-grained tokens do not; peek at a single page of private repos
+            try:
+                response = self._get(credential, "/user/repos", params={"visibility": "private", "per_page": 1})
+                response.raise_for_status()
+                credential.private_access = len(response.json()) > 0
+            except Exception as e:
+                logger.warning(f"Warning checking private repositories: {str(e)}")
+                credential.private_access = None
+        logger.info(f"Token {credential.name} connects to GitHub as {credential.login} "
+                    f"(private repo access: {credential.private_access})")
+
+    def _is_fresh(self, credential: Credential) -> bool:
+        return (
+            credential.validated_at is not None
+            and time.monotonic() - credential.validated_at < self.validation_interval
+        )
+
+    def _prepare(self, credential: Credential) -> bool:
+        """Renew or validate a token when due; False if it cannot be used"""
+        if credential.kind == APP:
+            return self.tokens.refresh(credential)
+        if self._is_fresh(credential):
+            return True
+        with self._lock:
+            if self._is_fresh(credential):
+                return True
+            try:
+                self._validate(credential)
+                credential.validated_at = time.monotonic()
+                credential.failed_at = None
+                credential.last_error = None
+                return True
+            except Exception as e:
+                logger.error(f"GitHub token permissions error ({credential.name}): {str(e)}")
+                credential.failed(str(e))
+                return False
+
+    def credential_for(self, url: str) -> Credential:
+        """The token a request for ``url`` is made with, by the owner it is about and budget left"""
+        owner = owner_of(urlparse(url).path)
+        while True:
+            credential = self.tokens.select(owner)
+            if credential is None:
+                raise GithubException(401, {"message": "GitHub client not available"}, None)
+            # A token that fails is left out of the next selection
+            if self._prepare(credential):
+                return credential
+
+    def available(self) -> bool:
+        now = time.monotonic()
+        return any(c.usable(now) and self._prepare(c) for c in self.tokens.credentials())
+
+    @property
+    def login(self) -> Optional[str]:
+        credential = self.tokens.primary()
+        return credential.login if credential is not None else None
+
+    @property
+    def private_access(self) -> Optional[bool]:
+        credential = self.tokens.primary()
+        return credential.private_access if credential is not None else None
+
+    def request_json(self, url: str, params: Optional[Mapping[str, Any]] = None,
+                     headers: Optional[Mapping[str, str]] = None) -> Tuple[int, Mapping[str, str], Any]:
+        """GET a REST resource on the shared pooled session"""
+        response = self._get(self.credential_for(url), url, params=params, headers=headers)
+        if response.status_code >= 400:
+            raise Requester.createException(response.status_code, dict(response.headers), _error_data(response))
+        return response.status_code, response.headers, response.json() if response.content else None
+
+    def graphql(self, query: str, variables: Optional[Mapping[str, Any]] = None,
+                owner: Optional[str] = None) -> Dict[str, Any]:
+        """POST a GraphQL query on the shared pooled session, with a token for ``owner``"""
+        credential = self.credential_for(f"/repos/{owner}" if owner else self.graphql_url)
+        response = self.session.post(self.graphql_url, json={"query": query, "variables": dict(variables or {})},
+                                     headers={"Authorization": f"bearer {credential.token}", "User-Agent": USER_AGENT},
+                                     timeout=self.timeout)
+        if response.status_code == 401:
+            credential.failed(f"{response.status_code} bad credentials")
+        if response.status_code >= 400:
+            raise Requester.createException(response.status_code, dict(response.headers), _error_data(response))
+        return response.json() if response.content else None
+
+    def download(self, path: str, headers: Optional[Mapping[str, str]] = None) -> requests.Response:
+        """
+        The API call goes through the shared session; the redirect target is a
+        pre-signed URL outside the API, fetched without the token or a rate-limit
+        slot.
+        """
+        response = self._get(self.credential_for(path), path, allow_redirects=False)
+        if response.status_code >= 400:
+            raise Requester.createException(response.status_code, dict(response.headers), _error_data(response))
+        location = response.headers.get("Location")
+        if response.status_code not in (301, 302, 303, 307, 308) or not location:
+            raise GithubException(response.status_code, {"message": f"Expected a redirect from {path}"}, None)
+        response.close()
+        download_headers = {"User-Agent": USER_AGENT}
+        if headers:
+            download_headers.update(headers)
+        download = self._download_session.get(urljoin(f"{self.api_url}{path}", location),
+                                              headers=download_headers, timeout=self.timeout, stream=True)
+        if download.status_code >= 400 and download.status_code != 416:
+            download.close()
+            raise GithubException(download.status_code, {"message": f"Download of {path} failed"}, None)
+        return download
+
+    def invalidate(self):
+        """Force token re-validation on next use"""
+        for credential in self.tokens.credentials():
+            credential.validated_at = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Cached figures only, as health checks and metrics read them on the event loop"""
+        primary = self.tokens.known_primary()
+        validated_at = primary.validated_at if primary is not None else None
+        return {
+            "name": self.name,
+            "api_url": self.api_url,
+            "login": primary.login if primary is not None else None,
+            "private_access": primary.private_access if primary is not None else None,
+            "validated_seconds_ago": round(time.monotonic() - validated_at, 1) if validated_at else None,
+            "last_error": primary.last_error if primary is not None else self.tokens.app_error,
+            "pool_size": self.pool_size,
+            "calls": _counters.calls,
+            "new_connections": _counters.new_connections,
+            "reused_connections": max(_counters.calls - _counters.new_connections, 0),
+            "rate_limit": rate_limiter.stats(),
+            **self.tokens.stats(),
+        }
+
+    def close(self):
+        with self._lock:
+            self.session.close()
+            self.session = self._build_session()
+
+
+client_manager = GitHubClientManager()
@@ -0,0 +1,686 @@
+"""
+Blocking GitHub data access for the dashboard API.
+
+PyGithub is synchronous, so every function here is run on a bounded thread
+pool via :func:`run_github` instead of directly inside ``async def`` routes,
+which would stall the event loop for every other dashboard user.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException
+from github import GithubException
+
+from app.cache import cached_get, cached_get_all, cached_iter_pages, can_serve_stale, mark_stale, track_staleness
+from app.database import run_store
+from app.datasource import data_source
+from app.graphql import graphql_backend
+from app.models import EMPTY_SUMMARY, Run, Workflow, author_actor, isoformat
+from app.pagination import next_cursor, page_limit, page_start
+from app.singleflight import endpoint_flight
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# How many of a repository's most recent runs its first history sync reads
+# before falling back to per-workflow queries for workflows it hasn't seen yet
+RUNS_SCAN_LIMIT = max(int(os.getenv("WORKFLOW_RUNS_SCAN_LIMIT", "300")), 100)
+# Upper bound on new or updated runs one incremental sync reads (e.g. after a long downtime)
+SYNC_MAX_RUNS = 1000
+# Stored runs still queued or in progress that a sync re-checks
+SYNC_OPEN_RUNS = 30
+
+# Upper bound on concurrent blocking GitHub calls; keep GITHUB_POOL_SIZE >= this
+MAX_CONCURRENCY = max(int(os.getenv("GITHUB_MAX_CONCURRENCY", "16")), 1)
+
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="github")
+# Separate pool for fan-out from inside a worker, so a busy main pool can't deadlock it
+_commit_executor = ThreadPoolExecutor(
+    max_workers=max(int(os.getenv("COMMIT_FETCH_CONCURRENCY", "8")), 1), thread_name_prefix="github-commits"
+)
+# Repositories a single /api/dashboard request fans out to at once
+DASHBOARD_CONCURRENCY = max(int(os.getenv("DASHBOARD_CONCURRENCY", "8")), 1)
+# Commits are immutable, so SHA -> commit details never expire; only the size is capped
+COMMIT_CACHE_SIZE = max(int(os.getenv("COMMIT_CACHE_SIZE", "5000")), 1)
+_commit_memo: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_commit_memo_lock = threading.Lock()
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+async def run_github(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking GitHub call on the worker pool without blocking the event loop"""
+
+    def call():
+        global _in_flight
+        with _in_flight_lock:
+            _in_flight += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with _in_flight_lock:
+                _in_flight -= 1
+
+    # Copy the request context so per-request GitHub stats follow the call
+    ctx = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(ctx.run, call))
+
+
+def run_on_loop(loop: Optional[asyncio.AbstractEventLoop], func: Callable[..., T], *args: Any) -> T:
+    """
+    From a worker-pool thread, run ``func`` on the event loop that owns the
+    state it changes and wait for its result; called directly without a loop.
+    """
+    if loop is None:
+        return func(*args)
+    try:
+        if asyncio.get_running_loop() is loop:
+            return func(*args)
+    except RuntimeError:
+        pass
+    future: "concurrent.futures.Future[T]" = concurrent.futures.Future()
+
+    def call():
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    loop.call_soon_threadsafe(call)
+    return future.result()
+
+
+async def coalesced_github(key: Tuple[Any, ...], func: Callable[..., T], *args: Any) -> T:
+    """
+    :func:`run_github`, shared by concurrent callers with the same ``key``.
+
+    The first caller runs ``func``; the others await its result. If it was
+    answered from stale cache entries, every caller's response says so.
+    """
+
+    async def run() -> Tuple[T, bool]:
+        with track_staleness() as staleness:
+            result = await run_github(func, *args)
+        return result, staleness.stale
+
+    result, stale = await endpoint_flight.do(key, run)
+    if stale:
+        mark_stale()
+    return result
+
+
+def pool_stats():
+    return {"max_concurrency": MAX_CONCURRENCY, "in_flight": _in_flight}
+
+
+def _fetch_commit(owner: str, repo: str, sha: str) -> Optional[Dict[str, Any]]:
+    try:
+        _, _, data = data_source().request_json(f"/repos/{owner}/{repo}/commits/{sha}")
+    except Exception as commit_error:
+        logger.warning(f"Error getting commit details for {sha}: {str(commit_error)}")
+        return None
+    commit = (data or {}).get('commit') or {}
+    details = {"id": data.get('sha', sha), "message": commit.get('message', '')}
+    author = {k: v for k, v in (commit.get('author') or {}).items() if k in ('name', 'email') and v}
+    if author:
+        details["author"] = author
+    return details
+
+
+def _commit_details(owner: str, repo: str, shas: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Look up commits for a set of SHAs: memoized, deduplicated and fetched concurrently"""
+    found: Dict[str, Dict[str, Any]] = {}
+    missing = []
+    with _commit_memo_lock:
+        for sha in dict.fromkeys(shas):
+            if sha in _commit_memo:
+                _commit_memo.move_to_end(sha)
+                found[sha] = _commit_memo[sha]
+            else:
+                missing.append(sha)
+
+    futures = {
+        sha: _commit_executor.submit(contextvars.copy_context().run, _fetch_commit, owner, repo, sha)
+        for sha in missing
+    }
+    for sha, future in futures.items():
+        details = future.result()
+        if details is None:
+            continue
+        found[sha] = details
+        with _commit_memo_lock:
+            _commit_memo[sha] = details
+            while len(_commit_memo) > COMMIT_CACHE_SIZE:
+                _commit_memo.popitem(last=False)
+    return found
+
+
+def sync_run_history(owner: str, repo: str) -> int:
+    """
+    Bring the stored run history of a repository up to date.
+
+    The repository's run listing is paged newest first (conditional requests,
+    so unchanged pages don't count against the rate limit) until a page holds
+    nothing new or updated. A re-run keeps its ``created_at``, so an older run
+    re-run since can sit below that page: the newest stored run of every
+    workflow and stored runs that were still queued or in progress are
+    re-fetched one by one as well. The first sync of a repository reads its
+    RUNS_SCAN_LIMIT most recent runs. Returns the number of runs added or
+    updated.
+    """
+    first_sync = run_store.watermark(owner, repo) is None
+    limit = RUNS_SCAN_LIMIT if first_sync else SYNC_MAX_RUNS
+    try:
+        raw_runs: List[Dict[str, Any]] = []
+        listed = set()
+        for page in cached_iter_pages("runs", f"/repos/{owner}/{repo}/actions/runs", {"per_page": 100},
+                                      items_key="workflow_runs"):
+            page = page[:limit - len(listed)]
+            listed.update(raw["id"] for raw in page)
+            stored = run_store.stored_updates(owner, repo, [raw["id"] for raw in page])
+            # Unchanged runs are not written again
+            changed = [raw for raw in page if raw["id"] not in stored or stored[raw["id"]] != raw.get("updated_at")]
+            raw_runs.extend(changed)
+            if len(listed) >= limit or (not changed and not first_sync):
+                break
+
+        recheck = run_store.newest_run_ids(owner, repo) + run_store.open_run_ids(owner, repo, SYNC_OPEN_RUNS)
+        for run_id in dict.fromkeys(recheck):
+            if run_id in listed:
+                continue
+            try:
+                raw_runs.append(cached_get("runs", f"/repos/{owner}/{repo}/actions/runs/{run_id}"))
+            except GithubException as e:
+                if e.status != 404:
+                    raise
+                # Deleted on GitHub
+                run_store.delete_runs([run_id])
+    except Exception as e:
+        if first_sync or not can_serve_stale(e):
+            raise
+        # The stored history is the best answer until GitHub can be asked again
+        logger.warning(f"Serving stored run history of {owner}/{repo}: {str(e)}")
+        mark_stale()
+        return 0
+    return run_store.upsert_runs(owner, repo, raw_runs)
+
+
+def _recent_runs_by_workflow(owner: str, repo: str, workflow_ids: List[int],
+                             runs_per_workflow: int) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Group a repository's most recent runs by workflow, from the run history store.
+
+    The history is synced first, so this costs one repository-wide listing of
+    new runs instead of a query per workflow. Workflows with fewer stored runs
+    than requested (rarely used ones, older than the history) are backfilled
+    from their own listing once.
+    """
+    sync_run_history(owner, repo)
+    grouped = run_store.recent_runs(owner, repo, runs_per_workflow)
+    depths = {w["id"]: w["history_depth"] for w in run_store.workflows(owner, repo)}
+    backfilled = False
+    for workflow_id in workflow_ids:
+        if len(grouped.get(workflow_id, ())) < runs_per_workflow and depths.get(workflow_id, 0) < runs_per_workflow:
+            _backfill_workflow(owner, repo, workflow_id, runs_per_workflow)
+            backfilled = True
+    if backfilled:
+        grouped = run_store.recent_runs(owner, repo, runs_per_workflow)
+    return {workflow_id: grouped.get(workflow_id, []) for workflow_id in workflow_ids}
+
+
+def _backfill_workflow(owner: str, repo: str, workflow_id: int, depth: int):
+    """Store a workflow's ``depth`` most recent runs from its own listing"""
+    raw_runs = cached_get_all("runs", f"/repos/{owner}/{repo}/actions/workflows/{workflow_id}/runs",
+                              {"per_page": min(depth, 100)}, items_key="workflow_runs", limit=depth)
+    run_store.upsert_runs(owner, repo, raw_runs)
+    run_store.set_history_depth(owner, repo, workflow_id, depth)
+
+
+def _get_workflow(owner: str, repo: str, workflow_id: str) -> Dict[str, Any]:
+    """A workflow by ID or file name, from the run history store while GitHub can't be asked"""
+    try:
+        return cached_get("workflows", f"/repos/{owner}/{repo}/actions/workflows/{workflow_id}")
+    except Exception as e:
+        if not can_serve_stale(e):
+            raise
+        for stored in run_store.workflows(owner, repo):
+            if workflow_id in (str(stored["id"]), os.path.basename(stored["path"] or "")):
+                logger.warning(f"Serving stored workflow {workflow_id} of {owner}/{repo}: {str(e)}")
+                mark_stale()
+                return stored
+        raise
+
+
+def _stored_workflow_runs(owner: str, repo: str, workflow_id: int, limit: int) -> List[Dict[str, Any]]:
+    """A workflow's ``limit`` most recent runs from the synced (and if needed backfilled) history store"""
+    sync_run_history(owner, repo)
+    raw_runs = run_store.workflow_runs(owner, repo, workflow_id, limit)
+    if len(raw_runs) < limit:
+        depth = next((w["history_depth"] for w in run_store.workflows(owner, repo) if w["id"] == workflow_id), 0)
+        if depth < limit:
+            _backfill_workflow(owner, repo, workflow_id, limit)
+            raw_runs = run_store.workflow_runs(owner, repo, workflow_id, limit)
+    return raw_runs
+
+
+def _list_workflows(owner: str, repo: str) -> List[Dict[str, Any]]:
+    """A repository's workflows, recorded in the run history store"""
+    try:
+        raw_workflows = cached_get_all(
+            "workflows", f"/repos/{owner}/{repo}/actions/workflows", {"per_page": 100}, items_key="workflows"
+        )
+    except Exception as e:
+        stored = run_store.workflows(owner, repo)
+        if not stored or not can_serve_stale(e):
+            raise
+        logger.warning(f"Serving stored workflows of {owner}/{repo}: {str(e)}")
+        mark_stale()
+        return stored
+    run_store.upsert_workflows(owner, repo, raw_workflows)
+    return raw_workflows
+
+
+def _with_stored_workflows(owner: str, repo: str, raw_workflows: List[Dict[str, Any]],
+                           recent_runs: Dict[int, List[Dict[str, Any]]],
+                           runs_per_workflow: int) -> Tuple[List[Dict[str, Any]], Dict[int, List[Dict[str, Any]]]]:
+    """
+    Add the workflows GraphQL didn't see (no runs on the latest default-branch
+    commits) from the run history store, with their stored runs.
+    """
+    seen = {raw["id"] for raw in raw_workflows}
+    stored = [raw for raw in run_store.workflows(owner, repo) if raw["id"] not in seen]
+    if not stored:
+        return raw_workflows, recent_runs
+    stored_runs = run_store.recent_runs(owner, repo, runs_per_workflow)
+    recent_runs = {**{raw["id"]: stored_runs.get(raw["id"], []) for raw in stored}, **recent_runs}
+    return sorted(raw_workflows + stored, key=lambda raw: raw["id"]), recent_runs
+
+
+def _workflows_and_runs(owner: str, repo: str,
+                        runs_per_workflow: int) -> Tuple[List[Dict[str, Any]], Dict[int, List[Dict[str, Any]]]]:
+    """A repository's workflows and each one's ``runs_per_workflow`` most recent runs, from REST or GraphQL"""
+    if graphql_backend.enabled:
+        raw_workflows, recent_runs = graphql_backend.repo_runs(owner, repo, runs_per_workflow)
+        return _with_stored_workflows(owner, repo, raw_workflows, recent_runs, runs_per_workflow)
+    raw_workflows = _list_workflows(owner, repo)
+    recent_runs = _recent_runs_by_workflow(
+        owner, repo, [raw["id"] for raw in raw_workflows], runs_per_workflow
+    ) if raw_workflows else {}
+    return raw_workflows, recent_runs
+
+
+def fetch_workflows(owner: str, repo: str, runs_per_workflow: int = 1):
+    runs_per_workflow = min(max(runs_per_workflow, 1), 100)
+    try:
+        if not data_source().available():
+            raise HTTPException(status_code=500, detail="GitHub authentication not properly configured")
+            
+        raw_workflows, recent_runs = _workflows_and_runs(owner, repo, runs_per_workflow)
+
+        workflows = []
+        for raw in raw_workflows:
+            try:
+                runs = [Run.parse(run) for run in recent_runs.get(raw["id"]) or []]
+                workflow_data = Workflow(raw).payload()
+                workflow_data["latest_run"] = runs[0].summary() if runs else dict(EMPTY_SUMMARY)
+                if runs_per_workflow > 1:
+                    workflow_data["recent_runs"] = [run.summary() for run in runs]
+                workflows.append(workflow_data)
+            except Exception as e:
+                logger.error(f"Error processing workflow {raw.get('id', 'unknown')}: {str(e)}")
+                continue
+
+        return {"workflows": workflows}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_workflows: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch workflows: {str(e)}")
+
+
+def fetch_workflow_runs(owner: str, repo: str, workflow_id: str, per_page: int = 5):
+    try:
+        if not data_source().available():
+            raise HTTPException(status_code=500, detail="GitHub authentication not properly configured")
+        
+        # Get the workflow
+        try:
+            raw_workflow = _get_workflow(owner, repo, workflow_id)
+            workflow = Workflow(raw_workflow)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error getting workflow {workflow_id} from {owner}/{repo}: {str(e)}")
+            # Return empty runs instead of failing
+            return {
+                "runs": [],
+                "workflow": {
+                    "id": workflow_id,
+                    "name": f"Workflow {workflow_id}",
+                    "path": "",
+                    "state": "unknown",
+                    "html_url": f"https://github.com/{owner}/{repo}/actions"
+                }
+            }
+        
+        logger.info(f"Fetching runs for workflow {workflow_id} in {owner}/{repo}")
+        
+        try:
+            # Get the workflow runs with error handling
+            if graphql_backend.enabled and raw_workflow.get("node_id"):
+                raw_runs = graphql_backend.workflow_runs(owner, repo, raw_workflow, max(per_page, 1))
+            else:
+                raw_runs = _stored_workflow_runs(owner, repo, workflow.id, max(per_page, 1))
+            logger.info(f"Runs found: {len(raw_runs)}")
+            
+            # If no runs, return early with empty list
+            if not raw_runs:
+                return {
+                    "runs": [],
+                    "workflow": {
+                        "id": workflow.id,
+                        "name": workflow.name,
+                        "path": workflow.path,
+                        "state": workflow.state,
+                        "html_url": workflow.html_url
+                    }
+                }
+                
+            logger.info(f"Retrieved {len(raw_runs)} most recent runs")
+            if logger.isEnabledFor(logging.DEBUG):
+                for raw in raw_runs:
+                    logger.debug(f"Raw run data: {raw}")
+
+            # Build every run from the list response alone; lazy PyGithub
+            # attributes (actor, head_repository, ...) could each cost a request
+            runs_data = []
+            for raw in raw_runs:
+                try:
+                    runs_data.append(Run.parse(raw).payload(owner, repo))
+                except Exception as e:
+                    logger.warning(f"Error processing workflow run {raw.get('id', 'unknown')}: {str(e)}")
+                    continue
+
+            # Commit messages missing from head_commit are looked up in one
+            # deduplicated, concurrent batch rather than one call per run
+            missing = [run["head_sha"] for run in runs_data
+                       if run.get("head_sha") and "message" not in run.get("head_commit", {})]
+            if missing:
+                commits = _commit_details(owner, repo, missing)
+                for run in runs_data:
+                    commit = commits.get(run.get("head_sha"))
+                    if commit and "message" not in run.get("head_commit", {}):
+                        run["head_commit"] = commit
+                        if run["actor"]["login"] == "unknown" and commit.get("author", {}).get("name"):
+                            run["actor"] = author_actor(commit["author"]["name"]).payload()
+
+            return {
+                "runs": runs_data,
+                "workflow": workflow.payload()
+            }
+            
+        except Exception as e:
+            logger.error(f"Error fetching runs for workflow {workflow_id}: {str(e)}")
+            # Return empty runs with basic workflow info
+            return {
+                "runs": [],
+                "workflow": {
+                    "id": workflow.id,
+                    "name": workflow.name,
+                    "path": workflow.path,
+                    "state": workflow.state,
+                    "html_url": workflow.html_url
+                }
+            }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_workflow_runs: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch workflow runs: {str(e)}")
+
+
+# GitHub's largest page of a run's jobs; job windows are served from whole pages
+JOBS_PAGE_SIZE = 100
+DEFAULT_JOBS_LIMIT = 50
+MAX_JOBS_LIMIT = 500
+
+
+def _seconds_between(start: Optional[str], end: Optional[str]) -> Optional[float]:
+    if not start or not end:
+        return None
+    try:
+        return max((datetime.fromisoformat(isoformat(end)) - datetime.fromisoformat(isoformat(start))).total_seconds(), 0.0)
+    except ValueError:
+        return None
+
+
+def _job_payload(raw: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": raw.get("id"),
+        "name": raw.get("name"),
+        "status": raw.get("status"),
+        "conclusion": raw.get("conclusion"),
+        "created_at": isoformat(raw.get("created_at")),
+        "started_at": isoformat(raw.get("started_at")),
+        "completed_at": isoformat(raw.get("completed_at")),
+        "queued_seconds": _seconds_between(raw.get("created_at"), raw.get("started_at")),
+        "duration_seconds": _seconds_between(raw.get("started_at"), raw.get("completed_at")),
+        "html_url": raw.get("html_url"),
+        "runner_name": raw.get("runner_name"),
+        "labels": raw.get("labels") or [],
+        "steps": [
+            {
+                "number": step.get("number"),
+                "name": step.get("name"),
+                "status": step.get("status"),
+                "conclusion": step.get("conclusion"),
+                "started_at": isoformat(step.get("started_at")),
+                "completed_at": isoformat(step.get("completed_at")),
+                "duration_seconds": _seconds_between(step.get("started_at"), step.get("completed_at")),
+            }
+            for step in raw.get("steps") or []
+        ],
+    }
+
+
+def _load_run(owner: str, repo: str, run_id: int) -> Dict[str, Any]:
+    """A run from the history store if it has finished, otherwise (briefly cached) from GitHub"""
+    raw = run_store.run(owner, repo, run_id)
+    if raw is not None and raw.get("status") == "completed":
+        return raw
+    raw = cached_get("runs", f"/repos/{owner}/{repo}/actions/runs/{run_id}")
+    if run_store.watermark(owner, repo) is not None:
+        run_store.upsert_runs(owner, repo, [raw])
+    return raw
+
+
+def _job_page(owner: str, repo: str, run_id: int, attempt: int, page: int,
+              finished: bool) -> Tuple[List[Dict[str, Any]], int]:
+    """One GitHub page of an attempt's jobs and the listing's total; stored for good once finished"""
+    if finished:
+        total = run_store.job_page_total(run_id, attempt, page)
+        if total is not None:
+            offset = (page - 1) * JOBS_PAGE_SIZE
+            return run_store.jobs(run_id, attempt, offset, offset + JOBS_PAGE_SIZE), total
+    data = cached_get("jobs", f"/repos/{owner}/{repo}/actions/runs/{run_id}/attempts/{attempt}/jobs",
+                      {"per_page": JOBS_PAGE_SIZE, "page": page})
+    raw_jobs = data.get("jobs") or []
+    total = data.get("total_count", len(raw_jobs))
+    if finished and all(job.get("status") == "completed" for job in raw_jobs):
+        run_store.store_job_page(run_id, attempt, page, JOBS_PAGE_SIZE, total, raw_jobs)
+    return raw_jobs, total
+
+
+def fetch_run_jobs(owner: str, repo: str, run_id: int, cursor: Optional[str] = None,
+                   page: Optional[int] = None, limit: Optional[int] = None):
+    """
+    A run with a window of its latest attempt's jobs and their steps.
+
+    Only the GitHub pages covering the window are loaded. Jobs of finished runs
+    are read from the history store after the first request; jobs of runs in
+    progress are refetched once their cache entry expires.
+    """
+    limit = page_limit(limit, default=DEFAULT_JOBS_LIMIT, maximum=MAX_JOBS_LIMIT)
+    start = page_start(cursor, page, limit)
+    try:
+        raw_run = _load_run(owner, repo, run_id)
+        attempt = raw_run.get("run_attempt") or 1
+        finished = raw_run.get("status") == "completed"
+
+        jobs: List[Dict[str, Any]] = []
+        total = 0
+        for github_page in range(start // JOBS_PAGE_SIZE + 1, (start + limit - 1) // JOBS_PAGE_SIZE + 2):
+            raw_jobs, total = _job_page(owner, repo, run_id, attempt, github_page, finished)
+            offset = (github_page - 1) * JOBS_PAGE_SIZE
+            jobs.extend(_job_payload(raw) for raw in raw_jobs[max(start - offset, 0):start + limit - offset])
+            if offset + JOBS_PAGE_SIZE >= total:
+                break
+
+        return {
+            "run": {**Run.parse(raw_run).payload(owner, repo), "run_attempt": attempt},
+            "jobs": jobs,
+            "total": total,
+            "limit": limit,
+            "next_cursor": next_cursor(start + limit, total),
+        }
+    except HTTPException:
+        raise
+    except GithubException as e:
+        if e.status == 404:
+            raise HTTPException(status_code=404, detail=f"Run {run_id} not found in {owner}/{repo}")
+        logger.error(f"Error fetching jobs of run {run_id} in {owner}/{repo}: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"GitHub error {e.status}")
+    except Exception as e:
+        logger.error(f"Error fetching jobs of run {run_id} in {owner}/{repo}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch jobs: {str(e)}")
+
+
+def run_status(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact latest-run status for the dashboard: just what the run row renders"""
+    return Run.parse(raw).status_payload()
+
+
+def _repo_status(owner: str, repo: str, raw_workflows: List[Dict[str, Any]],
+                 recent_runs: Dict[int, List[Dict[str, Any]]], runs_per_workflow: int,
+                 stale: bool) -> Dict[str, Any]:
+    workflows = []
+    for raw in raw_workflows:
+        runs = recent_runs.get(raw["id"]) or []
+        workflow_data = {
+            "id": raw["id"],
+            "name": raw.get("name"),
+            "path": raw.get("path"),
+            "state": raw.get("state"),
+            "html_url": raw.get("html_url"),
+            "latest_run": run_status(runs[0]) if runs else None,
+        }
+        if runs_per_workflow > 1:
+            workflow_data["recent_runs"] = [run_status(run) for run in runs]
+        workflows.append(workflow_data)
+    return {
+        "owner": owner, "name": repo, "full_name": f"{owner}/{repo}",
+        "workflows": workflows, "error": None, "stale": stale,
+    }
+
+
+def fetch_repo_status(owner: str, repo: str, runs_per_workflow: int = 1):
+    """
+    Every workflow of one repository with its latest run(s): the workflow
+    listing plus an incremental sync of the run history.
+    ``stale`` is set when GitHub could not be asked and cached or stored data was used.
+    """
+    runs_per_workflow = min(max(runs_per_workflow, 1), 100)
+    with track_staleness() as staleness:
+        raw_workflows, recent_runs = _workflows_and_runs(owner, repo, runs_per_workflow)
+    return _repo_status(owner, repo, raw_workflows, recent_runs, runs_per_workflow, staleness.stale)
+
+
+def stored_repo_status(owner: str, repo: str) -> Optional[Dict[str, Any]]:
+    """A repository's status as of its last sync, without calling GitHub; None if never synced"""
+    workflows = run_store.workflows(owner, repo)
+    if not workflows:
+        return None
+    return _repo_status(owner, repo, workflows, run_store.recent_runs(owner, repo, 1), 1, False)
+
+
+async def load_dashboard(repos: List[Dict[str, str]], runs_per_workflow: int = 1,
+                         concurrency: int = DASHBOARD_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    Fetch the status of several repositories concurrently.
+
+    At most ``concurrency`` repositories are in flight per call, and a failing
+    repository is reported in its own ``error`` field instead of failing the
+    whole dashboard.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def load(owner: str, name: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return await run_github(fetch_repo_status, owner, name, runs_per_workflow)
+            except Exception as e:
+                return _dashboard_error(owner, name, e)
+
+    unique = {f"{r['owner']}/{r['name']}".lower(): r for r in repos}
+    if graphql_backend.enabled and unique:
+        return await _load_dashboard_graphql([(r["owner"], r["name"]) for r in unique.values()],
+                                             runs_per_workflow, semaphore, load)
+    return await asyncio.gather(*(load(r["owner"], r["name"]) for r in unique.values()))
+
+
+def _dashboard_error(owner: str, name: str, e: Exception) -> Dict[str, Any]:
+    if isinstance(e, GithubException):
+        error = "Repository not found or access denied" if e.status == 404 else f"GitHub error {e.status}"
+    else:
+        error = str(e)
+    logger.warning(f"Error loading dashboard status for {owner}/{name}: {error}")
+    return {"owner": owner, "name": name, "full_name": f"{owner}/{name}", "workflows": [], "error": error,
+            "stale": False}
+
+
+def _graphql_statuses(repos: List[Tuple[str, str]], runs_per_workflow: int) -> List[Dict[str, Any]]:
+    """Dashboard statuses of one chunk of repositories from a single GraphQL query"""
+    statuses = []
+    for (owner, name), result in zip(repos, graphql_backend.fetch(repos, runs_per_workflow)):
+        if isinstance(result, Exception):
+            statuses.append(_dashboard_error(owner, name, result))
+            continue
+        raw_workflows, recent_runs = _with_stored_workflows(owner, name, *result, runs_per_workflow)
+        statuses.append(_repo_status(owner, name, raw_workflows, recent_runs, runs_per_workflow, False))
+    return statuses
+
+
+async def _load_dashboard_graphql(repos: List[Tuple[str, str]], runs_per_workflow: int,
+                                  semaphore: asyncio.Semaphore, load) -> List[Dict[str, Any]]:
+    """
+    The dashboard in a few GraphQL queries. A query that fails as a whole (rate
+    limit, outage) falls back to per-repository REST loads, which can serve
+    cached and stored data.
+    """
+    runs_per_workflow = min(max(runs_per_workflow, 1), 100)
+
+    async def load_chunk(chunk: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        async with semaphore:
+            try:
+                return await run_github(_graphql_statuses, chunk, runs_per_workflow)
+            except Exception as e:
+                logger.warning(f"GraphQL status query for {len(chunk)} repositories failed, using REST: {str(e)}")
+        return list(await asyncio.gather(*(load(owner, name) for owner, name in chunk)))
+
+    chunks = graphql_backend.chunks(repos, runs_per_workflow)
+    loaded = await asyncio.gather(*(load_chunk(chunk) for chunk in chunks))
+    by_key = {status["full_name"].lower(): status for statuses in loaded for status in statuses}
+    return [by_key[f"{owner}/{name}".lower()] for owner, name in repos]
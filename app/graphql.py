@@ -0,0 +1,367 @@
+"""
+Workflow status from the GitHub GraphQL API, batched across repositories.
+
+REST needs a workflow listing plus run listings per repository. One GraphQL
+query instead reads, for many repositories at once, the check suites (and
+their workflow runs) of the latest commits on each default branch, which is
+where the newest run of every active workflow is found. The results are
+rebuilt into the REST payloads the rest of the dashboard works with.
+
+GITHUB_STATUS_BACKEND=graphql selects it. Queries are chunked so that each
+stays within GRAPHQL_MAX_COST rate-limit points by GitHub's cost formula (one
+point per 100 connection requests) and GraphQL's node limit.
+
+Each repository's result is kept in the response cache as long as REST run
+listings are (CACHE_TTL_RUNS), and served stale while GitHub can't be asked.
+
+Workflows without runs on the last GRAPHQL_COMMITS commits of the default
+branch are not seen; callers fill them in from the stored run history.
+"""
+import logging
+import math
+import os
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+from urllib.parse import quote
+
+from github import GithubException
+
+from app.cache import CacheEntry, can_serve_stale, mark_stale, payload_size, response_cache
+from app.datasource import data_source
+
+logger = logging.getLogger(__name__)
+
+STATUS_BACKEND = os.getenv("GITHUB_STATUS_BACKEND", "rest").lower()
+# Latest default-branch commits whose check suites are read per repository
+GRAPHQL_COMMITS = min(max(int(os.getenv("GRAPHQL_COMMITS", "10")), 1), 100)
+# Check suites read per commit (one per workflow triggered by it, plus other apps')
+GRAPHQL_CHECK_SUITES = min(max(int(os.getenv("GRAPHQL_CHECK_SUITES", "20")), 1), 100)
+# Rate-limit points one query may cost
+GRAPHQL_MAX_COST = max(int(os.getenv("GRAPHQL_MAX_COST", "5")), 1)
+# Repositories per query regardless of cost, since large queries risk GitHub's 10s timeout
+GRAPHQL_MAX_REPOS = max(int(os.getenv("GRAPHQL_MAX_REPOS", "50")), 1)
+# Nodes GitHub allows in one query
+NODE_LIMIT = 500_000
+
+_RUN_FIELDS = """
+fragment run on WorkflowRun {
+  databaseId
+  runNumber
+  event
+  createdAt
+  updatedAt
+  url
+  file { path }
+  workflow { id databaseId name state createdAt updatedAt }
+}
+"""
+
+_COMMIT_FIELDS = "oid message author { name email user { login avatarUrl } }"
+_SUITE_FIELDS = "status conclusion creator { login avatarUrl } branch { name }"
+
+STATUS_QUERY = """
+query DashboardStatus($commits: Int!, $suites: Int!, %(variables)s) {
+  rateLimit { cost remaining limit resetAt }
+  %(repositories)s
+}
+fragment repository on Repository {
+  nameWithOwner
+  url
+  defaultBranchRef {
+    name
+    target {
+      ... on Commit {
+        history(first: $commits) {
+          nodes {
+            %(commit)s
+            checkSuites(first: $suites) {
+              nodes { %(suite)s workflowRun { ...run } }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+%(run)s
+"""
+
+WORKFLOW_RUNS_QUERY = """
+query WorkflowRuns($workflow: ID!, $runs: Int!) {
+  rateLimit { cost remaining limit resetAt }
+  node(id: $workflow) {
+    ... on Workflow {
+      runs(first: $runs, orderBy: {field: CREATED_AT, direction: DESC}) {
+        nodes { ...run checkSuite { %(suite)s commit { %(commit)s } } }
+      }
+    }
+  }
+}
+%(run)s
+""" % {"suite": _SUITE_FIELDS, "commit": _COMMIT_FIELDS, "run": _RUN_FIELDS}
+
+# (raw workflows, workflow ID -> raw runs newest first) in REST form
+RepoRuns = Tuple[List[Dict[str, Any]], Dict[int, List[Dict[str, Any]]]]
+
+
+def estimate_cost(repos: int, commits: int = GRAPHQL_COMMITS) -> int:
+    """Points a status query costs: the history once and the check suites once per commit, per repository"""
+    return max(math.ceil(repos * (1 + commits) / 100), 1)
+
+
+def chunk_size(commits: int = GRAPHQL_COMMITS, suites: int = GRAPHQL_CHECK_SUITES) -> int:
+    """Repositories per status query within the cost, node and size limits"""
+    by_cost = GRAPHQL_MAX_COST * 100 // (1 + commits)
+    by_nodes = NODE_LIMIT // (commits * (1 + suites))
+    return max(min(by_cost, by_nodes, GRAPHQL_MAX_REPOS), 1)
+
+
+def _lower(value: Optional[str]) -> Optional[str]:
+    return value.lower() if value else None
+
+
+def _api_url() -> str:
+    return getattr(data_source(), "api_url", "https://api.github.com")
+
+
+def _run_raw(owner: str, repo: str, run: Mapping[str, Any], suite: Mapping[str, Any],
+             commit: Mapping[str, Any], default_branch: Optional[str]) -> Dict[str, Any]:
+    """A workflow run as the REST API lists it"""
+    author = commit.get("author") or {}
+    user = author.get("user") or suite.get("creator") or {}
+    workflow = run.get("workflow") or {}
+    return {
+        "id": run["databaseId"],
+        "name": workflow.get("name"),
+        "workflow_id": workflow.get("databaseId"),
+        "run_number": run.get("runNumber"),
+        "event": run.get("event"),
+        "status": _lower(suite.get("status")),
+        "conclusion": _lower(suite.get("conclusion")),
+        "head_branch": (suite.get("branch") or {}).get("name") or default_branch,
+        "head_sha": commit.get("oid"),
+        "created_at": run.get("createdAt"),
+        "updated_at": run.get("updatedAt"),
+        "url": f"{_api_url()}/repos/{owner}/{repo}/actions/runs/{run['databaseId']}",
+        "html_url": run.get("url"),
+        "actor": {"login": user["login"], "avatar_url": user.get("avatarUrl", "")} if user.get("login") else None,
+        "head_commit": {
+            "id": commit.get("oid"),
+            "message": commit.get("message", ""),
+            "author": {"name": author.get("name", "Unknown"), "email": author.get("email", "")},
+        },
+        "head_repository": {"full_name": f"{owner}/{repo}"},
+    }
+
+
+def _workflow_raw(owner: str, repo: str, run: Mapping[str, Any], repo_url: str,
+                  branch: Optional[str]) -> Dict[str, Any]:
+    """A workflow as the REST API lists it"""
+    workflow = run["workflow"]
+    path = (run.get("file") or {}).get("path", "")
+    return {
+        "id": workflow["databaseId"],
+        "node_id": workflow.get("id"),
+        "name": workflow.get("name"),
+        "path": path,
+        "state": _lower(workflow.get("state")),
+        "created_at": workflow.get("createdAt"),
+        "updated_at": workflow.get("updatedAt"),
+        "url": f"{_api_url()}/repos/{owner}/{repo}/actions/workflows/{workflow['databaseId']}",
+        "html_url": f"{repo_url}/blob/{branch}/{path}",
+        "badge_url": f"{repo_url}/workflows/{quote(workflow.get('name') or '')}/badge.svg",
+    }
+
+
+def _repo_runs(owner: str, repo: str, node: Mapping[str, Any], runs_per_workflow: int) -> RepoRuns:
+    """Workflows and their newest runs from one repository of a status query"""
+    ref = node.get("defaultBranchRef") or {}
+    branch = ref.get("name")
+    history = ((ref.get("target") or {}).get("history") or {}).get("nodes") or []
+    workflows: Dict[int, Dict[str, Any]] = {}
+    runs: Dict[int, List[Dict[str, Any]]] = {}
+    for commit in history:
+        for suite in (commit.get("checkSuites") or {}).get("nodes") or []:
+            run = suite.get("workflowRun")
+            # Check suites of other apps have no workflow run
+            if not run or not run.get("workflow"):
+                continue
+            workflow_id = run["workflow"]["databaseId"]
+            if workflow_id not in workflows:
+                workflows[workflow_id] = _workflow_raw(owner, repo, run, node.get("url") or "", branch)
+            runs.setdefault(workflow_id, []).append(_run_raw(owner, repo, run, suite, commit, branch))
+    for workflow_runs in runs.values():
+        workflow_runs.sort(key=lambda raw: (raw["created_at"] or "", raw["id"]), reverse=True)
+        del workflow_runs[runs_per_workflow:]
+    return [workflows[w] for w in sorted(workflows)], runs
+
+
+def _error(error: Mapping[str, Any]) -> GithubException:
+    status = {"NOT_FOUND": 404, "FORBIDDEN": 403}.get(error.get("type"), 502)
+    return GithubException(status, {"message": error.get("message", "GraphQL error")}, None)
+
+
+class GraphQLStatusBackend:
+    """Batched status queries and the points they cost"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.repos = 0
+        self.estimated_cost = 0
+        self.cost = 0
+        self.errors = 0
+        self.remaining: Optional[int] = None
+
+    @property
+    def enabled(self) -> bool:
+        return STATUS_BACKEND == "graphql"
+
+    def chunks(self, repos: List[Tuple[str, str]], runs_per_workflow: int = 1) -> List[List[Tuple[str, str]]]:
+        """``(owner, name)`` pairs split into queries, one owner per query so it goes out with that owner's token"""
+        size = chunk_size(self._commits(runs_per_workflow))
+        by_owner: Dict[str, List[Tuple[str, str]]] = {}
+        for owner, name in repos:
+            by_owner.setdefault(owner.lower(), []).append((owner, name))
+        return [group[i:i + size] for group in by_owner.values() for i in range(0, len(group), size)]
+
+    @staticmethod
+    def _commits(runs_per_workflow: int) -> int:
+        return min(max(GRAPHQL_COMMITS, runs_per_workflow), 100)
+
+    def _query(self, query: str, variables: Dict[str, Any], owner: Optional[str],
+               estimate: int) -> Dict[str, Any]:
+        try:
+            body = data_source().graphql(query, variables, owner=owner)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        data = body.get("data")
+        if data is None:
+            with self._lock:
+                self.errors += 1
+            raise _error((body.get("errors") or [{}])[0])
+        rate_limit = data.get("rateLimit") or {}
+        with self._lock:
+            self.queries += 1
+            self.estimated_cost += estimate
+            self.cost += rate_limit.get("cost") or 0
+            self.remaining = rate_limit.get("remaining", self.remaining)
+        return body
+
+    @staticmethod
+    def _cache_key(owner: str, name: str, runs_per_workflow: int) -> str:
+        return f"graphql:{owner}/{name}?runs={runs_per_workflow}".lower()
+
+    def fetch(self, repos: List[Tuple[str, str]],
+              runs_per_workflow: int = 1) -> List[Union[RepoRuns, GithubException]]:
+        """
+        Workflows and runs of one chunk of repositories (see :meth:`chunks`),
+        or the error of each. Only repositories without a fresh cached result
+        are queried.
+        """
+        entries = {repo: response_cache.get(self._cache_key(*repo, runs_per_workflow)) for repo in repos}
+        missing = [repo for repo, entry in entries.items() if entry is None or not response_cache.is_fresh(entry)]
+        response_cache.record_many(hits=len(repos) - len(missing), misses=0)
+        if not missing:
+            return [entries[repo].data for repo in repos]
+        try:
+            fetched = self._fetch(missing, runs_per_workflow)
+        except Exception as e:
+            if not can_serve_stale(e) or any(entries[repo] is None for repo in missing):
+                raise
+            logger.warning(f"Serving cached GraphQL status of {len(missing)} repositories: {str(e)}")
+            mark_stale()
+            response_cache.served_stale()
+            return [entries[repo].data for repo in repos]
+        response_cache.record_many(hits=0, misses=len(missing))
+        results = {}
+        for repo, result in zip(missing, fetched):
+            results[repo] = result
+            if not isinstance(result, GithubException):
+                response_cache.put(self._cache_key(*repo, runs_per_workflow),
+                                   CacheEntry("runs", result, None, None, payload_size(result)))
+        return [results[repo] if repo in results else entries[repo].data for repo in repos]
+
+    def _fetch(self, repos: List[Tuple[str, str]],
+               runs_per_workflow: int) -> List[Union[RepoRuns, GithubException]]:
+        commits = self._commits(runs_per_workflow)
+        aliases = [f"r{i}: repository(owner: $o{i}, name: $n{i}) {{ ...repository }}" for i in range(len(repos))]
+        query = STATUS_QUERY % {
+            "variables": ", ".join(f"$o{i}: String!, $n{i}: String!" for i in range(len(repos))),
+            "repositories": "\n  ".join(aliases),
+            "commit": _COMMIT_FIELDS,
+            "suite": _SUITE_FIELDS,
+            "run": _RUN_FIELDS,
+        }
+        variables: Dict[str, Any] = {"commits": commits, "suites": GRAPHQL_CHECK_SUITES}
+        for i, (owner, name) in enumerate(repos):
+            variables[f"o{i}"] = owner
+            variables[f"n{i}"] = name
+        body = self._query(query, variables, repos[0][0] if repos else None, estimate_cost(len(repos), commits))
+        errors = {str((e.get("path") or [""])[0]): e for e in body.get("errors") or []}
+        with self._lock:
+            self.repos += len(repos)
+        results: List[Union[RepoRuns, GithubException]] = []
+        for i, (owner, name) in enumerate(repos):
+            node = body["data"].get(f"r{i}")
+            if node is None:
+                results.append(_error(errors.get(f"r{i}", {"type": "NOT_FOUND", "message": "Not Found"})))
+            else:
+                results.append(_repo_runs(owner, name, node, runs_per_workflow))
+        return results
+
+    def repo_runs(self, owner: str, repo: str, runs_per_workflow: int = 1) -> RepoRuns:
+        result = self.fetch([(owner, repo)], runs_per_workflow)[0]
+        if isinstance(result, GithubException):
+            raise result
+        return result
+
+    def workflow_runs(self, owner: str, repo: str, workflow: Mapping[str, Any], limit: int) -> List[Dict[str, Any]]:
+        """A workflow's ``limit`` newest runs, by its GraphQL node ID"""
+        limit = min(max(limit, 1), 100)
+        key = f"graphql:{owner}/{repo}/workflows/{workflow['id']}?runs={limit}".lower()
+        entry = response_cache.get(key)
+        if entry is not None and response_cache.is_fresh(entry):
+            response_cache.record(hit=True)
+            return entry.data
+        try:
+            runs = self._workflow_runs(owner, repo, workflow, limit)
+        except Exception as e:
+            if entry is None or not can_serve_stale(e):
+                raise
+            logger.warning(f"Serving cached GraphQL runs of workflow {workflow['id']}: {str(e)}")
+            mark_stale()
+            response_cache.served_stale()
+            return entry.data
+        response_cache.record(hit=False)
+        response_cache.put(key, CacheEntry("runs", runs, None, None, payload_size(runs)))
+        return runs
+
+    def _workflow_runs(self, owner: str, repo: str, workflow: Mapping[str, Any], limit: int) -> List[Dict[str, Any]]:
+        body = self._query(WORKFLOW_RUNS_QUERY, {"workflow": workflow["node_id"], "runs": limit}, owner,
+                           estimate_cost(1, 0))
+        node = body["data"].get("node")
+        if node is None:
+            raise _error((body.get("errors") or [{"type": "NOT_FOUND", "message": "Not Found"}])[0])
+        runs = []
+        for run in (node.get("runs") or {}).get("nodes") or []:
+            suite = run.get("checkSuite") or {}
+            runs.append(_run_raw(owner, repo, run, suite, suite.get("commit") or {}, None))
+        return runs
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": STATUS_BACKEND,
+            "queries": self.queries,
+            "repos": self.repos,
+            "estimated_cost": self.estimated_cost,
+            "cost": self.cost,
+            "errors": self.errors,
+            "remaining": self.remaining,
+            "repos_per_query": chunk_size(),
+        }
+
+
+graphql_backend = GraphQLStatusBackend()
@@ -0,0 +1,154 @@
+"""
+Health probes that never call GitHub from the request path.
+
+``/health`` (liveness) does no I/O at all. ``/health/ready`` (readiness)
+reports upstream status kept by :class:`HealthMonitor`, which refreshes it in
+the background: how long ago GitHub last answered, the token and rate-limit
+state and how far the poller is behind. GitHub is only asked when nothing else
+talked to it lately, through the free ``/rate_limit`` endpoint.
+"""
+import asyncio
+import logging
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import env_float
+from app.datasource import data_source
+from app.github_client import last_success_age
+from app.github_data import run_github
+from app.poller import poller
+from app.ratelimit import background_priority, rate_limiter
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds between background upstream checks
+HEALTH_CHECK_INTERVAL = env_float("HEALTH_CHECK_INTERVAL", 60.0)
+# Readiness reports "degraded" when GitHub has not answered for this long...
+HEALTH_MAX_SILENCE = env_float("HEALTH_MAX_SILENCE", 600.0)
+# ...or the poller is this many seconds behind its schedule
+HEALTH_MAX_POLLER_LAG = env_float("HEALTH_MAX_POLLER_LAG", 300.0)
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+def liveness() -> Dict[str, Any]:
+    return {
+        "status": "healthy",
+        "app": "github-actions-dashboard",
+        "version": "1.0.0",
+        "system": {
+            "python_version": ".".join(map(str, sys.version_info[:3])),
+            "platform": sys.platform,
+        },
+    }
+
+
+class HealthMonitor:
+    """Keeps the upstream status that readiness probes report"""
+
+    def __init__(self, interval: float = HEALTH_CHECK_INTERVAL):
+        self.interval = interval
+        self.checked_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.checks = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run(), name="health-monitor")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Error in health monitor: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    async def check(self):
+        """Ask GitHub for the rate limit, unless other calls showed it answering within the interval"""
+        age = last_success_age()
+        if age is None or age > self.interval:
+            self.checks += 1
+            try:
+                with background_priority():
+                    await run_github(data_source().request_json, "/rate_limit")
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)[:200]
+                logger.warning(f"GitHub health check failed: {self.last_error}")
+        else:
+            self.last_error = None
+        self.checked_at = time.monotonic()
+
+    def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        """``(ready, report)`` from cached figures only"""
+        now = time.monotonic()
+        problems: List[str] = []
+        source = data_source().stats()
+        success_age = last_success_age()
+        core = rate_limiter.stats()["buckets"].get("core")
+        lag = poller.lag()
+
+        if self.checked_at is None:
+            problems.append("upstream not checked yet")
+        elif success_age is None:
+            problems.append("GitHub has not answered since startup")
+        elif success_age > HEALTH_MAX_SILENCE:
+            problems.append(f"no successful GitHub call for {round(success_age)}s")
+        if self.last_error:
+            problems.append(f"last GitHub check failed: {self.last_error}")
+        if core is not None and not rate_limiter.background_allowed():
+            problems.append("rate-limit budget down to the interactive reserve")
+        if lag is None:
+            # Followers mirror the polling worker's snapshots instead
+            if not poller.mirroring:
+                problems.append("poller not running")
+        elif lag > HEALTH_MAX_POLLER_LAG:
+            problems.append(f"poller {round(lag)}s behind")
+
+        # Serving stored and cached data is still possible while degraded, so
+        # only an instance that never reached GitHub is taken out of rotation
+        ready = self.checked_at is not None and success_age is not None
+        report = {
+            "status": "ready" if ready and not problems else "degraded" if ready else "unavailable",
+            "problems": problems,
+            "checked_seconds_ago": _round(None if self.checked_at is None else now - self.checked_at),
+            "github": {
+                "source": source.get("name"),
+                "login": source.get("login"),
+                "last_success_seconds_ago": _round(success_age),
+                "token_validated_seconds_ago": source.get("validated_seconds_ago"),
+                "last_error": self.last_error or source.get("last_error"),
+            },
+            "rate_limit": core,
+            "poller": {
+                "role": poller.role,
+                "running": poller.running,
+                "tracked": len(poller.store),
+                "lag_seconds": _round(lag),
+            },
+        }
+        return ready, report
+
+
+health_monitor = HealthMonitor()
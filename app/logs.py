@@ -0,0 +1,536 @@
+"""
+Workflow job logs, downloaded once and served from disk.
+
+A finished job's log never changes, so it is fetched from GitHub a single time
+into a size-capped directory (least recently read logs are evicted beyond
+LOG_CACHE_MAX_BYTES). Byte ranges, line ranges and searches are answered from a
+memory map of the cached file, so only the requested slice is read and sent.
+Logs of jobs that are still running are not cached; they are followed by
+asking GitHub for the bytes appended since the previous poll.
+"""
+import asyncio
+import logging
+import mmap
+import os
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+from github import GithubException
+
+from app.cache import cached_get
+from app.datasource import data_source
+from app.github_data import run_github
+
+logger = logging.getLogger(__name__)
+
+LOG_CACHE_DIR = os.getenv("LOG_CACHE_DIR", os.path.join("data", "logs"))
+LOG_CACHE_MAX_BYTES = int(os.getenv("LOG_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+# Seconds between polls while following the log of a running job
+LOG_STREAM_INTERVAL = float(os.getenv("LOG_STREAM_INTERVAL", "3"))
+
+DEFAULT_LOG_LINES = 500
+MAX_LOG_LINES = 5000
+DEFAULT_SEARCH_MATCHES = 100
+MAX_SEARCH_MATCHES = 1000
+# Every LINE_INDEX_STEP-th line's offset is remembered, so a line range costs
+# at most that many newline scans to locate
+LINE_INDEX_STEP = 1000
+CHUNK_SIZE = 64 * 1024
+
+_NAME = re.compile(r"[A-Za-z0-9_.-]+")
+
+
+class LineIndexer:
+    """Builds a sparse line index from a log's bytes as they are written"""
+
+    def __init__(self):
+        self.size = 0
+        self.newlines = 0
+        self.last_byte = b""
+        self.checkpoints = array("Q", [0])
+
+    def feed(self, chunk: bytes):
+        count = chunk.count(b"\n")
+        if count and (self.newlines + count) // LINE_INDEX_STEP > self.newlines // LINE_INDEX_STEP:
+            pos = -1
+            for n in range(self.newlines + 1, self.newlines + count + 1):
+                pos = chunk.find(b"\n", pos + 1)
+                if n % LINE_INDEX_STEP == 0:
+                    self.checkpoints.append(self.size + pos + 1)
+        self.newlines += count
+        self.size += len(chunk)
+        if chunk:
+            self.last_byte = chunk[-1:]
+
+    @property
+    def lines(self) -> int:
+        return self.newlines + (1 if self.size and self.last_byte != b"\n" else 0)
+
+
+class CachedLog:
+    __slots__ = ("path", "size", "lines", "checkpoints")
+
+    def __init__(self, path: str, size: int, indexer: Optional[LineIndexer] = None):
+        self.path = path
+        self.size = size
+        self.lines = indexer.lines if indexer is not None else None
+        self.checkpoints = indexer.checkpoints if indexer is not None else None
+
+
+class LogView:
+    """Read-only memory map of one cached log"""
+
+    def __init__(self, entry: CachedLog):
+        self.entry = entry
+        self._file = open(entry.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # Zero-length files can't be mapped
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if entry.checkpoints is None:
+            # Logs found on disk at startup are indexed on first use
+            indexer = LineIndexer()
+            for start in range(0, size, CHUNK_SIZE * 16):
+                indexer.feed(self._data[start:start + CHUNK_SIZE * 16])
+            entry.lines, entry.checkpoints = indexer.lines, indexer.checkpoints
+
+    @property
+    def size(self) -> int:
+        return len(self._data)
+
+    def read(self, start: int = 0, end: Optional[int] = None) -> bytes:
+        return self._data[start:end]
+
+    def chunks(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        end = self.size if end is None else min(end, self.size)
+        for offset in range(start, end, CHUNK_SIZE):
+            yield self._data[offset:min(offset + CHUNK_SIZE, end)]
+
+    def _line_start(self, line: int) -> int:
+        """Offset of 1-based ``line``, or the end of the log past its last line"""
+        checkpoint = min((line - 1) // LINE_INDEX_STEP, len(self.entry.checkpoints) - 1)
+        pos = self.entry.checkpoints[checkpoint]
+        for _ in range(line - 1 - checkpoint * LINE_INDEX_STEP):
+            pos = self._data.find(b"\n", pos)
+            if pos < 0:
+                return self.size
+            pos += 1
+        return pos
+
+    def lines(self, start_line: int, count: int) -> List[str]:
+        if start_line > self.entry.lines:
+            return []
+        pos = self._line_start(start_line)
+        lines = []
+        while len(lines) < count and pos < self.size:
+            end = self._data.find(b"\n", pos)
+            if end < 0:
+                end = self.size
+            lines.append(self._data[pos:end].decode("utf-8", "replace").rstrip("\r"))
+            pos = end + 1
+        return lines
+
+    def search(self, pattern: "re.Pattern[bytes]", limit: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """Lines matching ``pattern`` (one entry per line), and whether there were more than ``limit``"""
+        matches = []
+        line, counted_to, next_line_start = 1, 0, 0
+        for match in pattern.finditer(self._data):
+            if match.start() < next_line_start:
+                continue
+            line_start = self._data.rfind(b"\n", 0, match.start()) + 1
+            line_end = self._data.find(b"\n", match.end())
+            if line_end < 0:
+                line_end = self.size
+            if len(matches) == limit:
+                return matches, True
+            line += self._data[counted_to:line_start].count(b"\n")
+            counted_to = line_start
+            matches.append({"line": line, "text": self._data[line_start:line_end].decode("utf-8", "replace").rstrip("\r")})
+            next_line_start = line_end + 1
+        return matches, False
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+
+class LogCache:
+    """Size-capped directory of downloaded logs, evicted least recently read first"""
+
+    def __init__(self, directory: str = LOG_CACHE_DIR, max_bytes: int = LOG_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CachedLog]" = OrderedDict()
+        self._downloads: Dict[str, threading.Lock] = {}
+        self._loaded = False
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.downloaded_bytes = 0
+        self.streams = 0
+
+    def _load(self):
+        """Pick up logs cached by a previous process, oldest read first"""
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                if filename.endswith(".tmp"):
+                    # Interrupted download
+                    os.remove(path)
+                elif filename.endswith(".log"):
+                    stat = os.stat(path)
+                    key = os.path.relpath(path, self.directory)[:-len(".log")].replace(os.sep, "/")
+                    found.append((stat.st_mtime, key, CachedLog(path, stat.st_size)))
+        for _, key, entry in sorted(found, key=lambda f: f[0]):
+            self._entries[key] = entry
+            self.bytes += entry.size
+        self._loaded = True
+        if found:
+            logger.info(f"Found {len(found)} cached logs ({self.bytes} bytes) in {self.directory}")
+        self._evict()
+
+    def _lookup(self, key: str) -> Optional[CachedLog]:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        return entry
+
+    def _evict(self):
+        # The most recent entry stays even if it alone exceeds the cap
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self.bytes -= entry.size
+            self.evictions += 1
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def _discard(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry.size
+
+    def contains(self, key: str) -> bool:
+        return self._lookup(key) is not None
+
+    def get(self, key: str, download: Callable[[], Iterable[bytes]]) -> CachedLog:
+        """The cached log for ``key``, downloading it once if it isn't cached"""
+        entry = self._lookup(key)
+        if entry is not None:
+            self.hits += 1
+            try:
+                # Keeps the LRU order across restarts
+                os.utime(entry.path)
+            except OSError:
+                pass
+            return entry
+        with self._lock:
+            lock = self._downloads.setdefault(key, threading.Lock())
+        # Concurrent requests for the same log wait for a single download
+        with lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            path = os.path.join(self.directory, *key.split("/")) + ".log"
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            indexer = LineIndexer()
+            try:
+                with open(tmp_path, "wb") as f:
+                    for chunk in download():
+                        f.write(chunk)
+                        indexer.feed(chunk)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            finally:
+                with self._lock:
+                    self._downloads.pop(key, None)
+            entry = CachedLog(path, indexer.size, indexer)
+            with self._lock:
+                self._entries[key] = entry
+                self.bytes += entry.size
+                self.downloaded_bytes += entry.size
+                self._evict()
+            return entry
+
+    def view(self, key: str, download: Callable[[], Iterable[bytes]]) -> LogView:
+        """A view of the cached log for ``key``; the caller closes it"""
+        for attempt in range(2):
+            entry = self.get(key, download)
+            try:
+                return LogView(entry)
+            except FileNotFoundError:
+                # Evicted (or deleted) between lookup and open; fetch it again
+                self._discard(key)
+                if attempt:
+                    raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            files = len(self._entries)
+        return {
+            "directory": self.directory,
+            "files": files,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "downloaded_bytes": self.downloaded_bytes,
+            "streams": self.streams,
+        }
+
+
+log_cache = LogCache()
+
+
+def _log_key(owner: str, repo: str, job_id: int) -> str:
+    for part in (owner, repo):
+        if not _NAME.fullmatch(part) or part in (".", ".."):
+            raise HTTPException(status_code=400, detail=f"Invalid repository: {owner}/{repo}")
+    return f"{owner}/{repo}/{job_id}"
+
+
+def _logs_path(owner: str, repo: str, job_id: int) -> str:
+    return f"/repos/{owner}/{repo}/actions/jobs/{job_id}/logs"
+
+
+def _github_error(owner: str, repo: str, job_id: int, e: Exception) -> HTTPException:
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, GithubException):
+        if e.status == 404:
+            return HTTPException(status_code=404, detail=f"Log of job {job_id} not found in {owner}/{repo}")
+        return HTTPException(status_code=502, detail=f"GitHub error {e.status}")
+    logger.error(f"Error fetching log of job {job_id} in {owner}/{repo}: {str(e)}")
+    return HTTPException(status_code=500, detail=f"Error fetching job log: {str(e)}")
+
+
+def _job(owner: str, repo: str, job_id: int) -> Dict[str, Any]:
+    return cached_get("jobs", f"/repos/{owner}/{repo}/actions/jobs/{job_id}")
+
+
+def _download(owner: str, repo: str, job_id: int) -> Iterator[bytes]:
+    response = data_source().download(_logs_path(owner, repo, job_id))
+    try:
+        yield from response.iter_content(CHUNK_SIZE)
+    finally:
+        response.close()
+
+
+def _job_log_view(owner: str, repo: str, job_id: int) -> LogView:
+    try:
+        view = _open_finished_log(owner, repo, job_id)
+    except Exception as e:
+        raise _github_error(owner, repo, job_id, e)
+    if view is None:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job {job_id} is still running; follow its log at /api/logs/{owner}/{repo}/jobs/{job_id}/stream",
+        )
+    return view
+
+
+@contextmanager
+def open_job_log(owner: str, repo: str, job_id: int) -> Iterator[LogView]:
+    """
+    The log of a finished job, from the cache or downloaded into it.
+    Raises 409 for jobs that are still running.
+    """
+    view = _job_log_view(owner, repo, job_id)
+    try:
+        yield view
+    finally:
+        view.close()
+
+
+def fetch_log_lines(owner: str, repo: str, job_id: int, start_line: int = 1,
+                    lines: int = DEFAULT_LOG_LINES) -> Dict[str, Any]:
+    """A window of a finished job's log by 1-based line number"""
+    if start_line < 1:
+        raise HTTPException(status_code=400, detail="start_line must be at least 1")
+    if not 1 <= lines <= MAX_LOG_LINES:
+        raise HTTPException(status_code=400, detail=f"lines must be between 1 and {MAX_LOG_LINES}")
+    with open_job_log(owner, repo, job_id) as log:
+        window = log.lines(start_line, lines)
+        total = log.entry.lines
+        size = log.size
+    end_line = start_line + len(window)
+    return {
+        "job_id": job_id,
+        "size": size,
+        "total_lines": total,
+        "start_line": start_line,
+        "lines": window,
+        "next_line": end_line if end_line <= total else None,
+    }
+
+
+def search_log(owner: str, repo: str, job_id: int, q: str, regex: bool = False,
+               case_sensitive: bool = False, limit: int = DEFAULT_SEARCH_MATCHES) -> Dict[str, Any]:
+    """Lines of a finished job's log containing ``q`` (a regular expression if ``regex``)"""
+    if not q:
+        raise HTTPException(status_code=400, detail="q is required")
+    if not 1 <= limit <= MAX_SEARCH_MATCHES:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_SEARCH_MATCHES}")
+    needle = q.encode()
+    try:
+        pattern = re.compile(needle if regex else re.escape(needle), re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE)
+    except re.error as e:
+        raise HTTPException(status_code=400, detail=f"Invalid regular expression: {str(e)}")
+    with open_job_log(owner, repo, job_id) as log:
+        matches, truncated = log.search(pattern, limit)
+        total = log.entry.lines
+    return {"job_id": job_id, "q": q, "total_lines": total, "matches": matches, "truncated": truncated}
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    ``(start, end)`` (end exclusive) of a ``Range: bytes=...`` header, None
+    without one. Only single ranges are supported; unsatisfiable ones raise 416.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    first, sep, last = spec.strip().partition("-")
+    try:
+        if unit.strip() != "bytes" or not sep or "," in spec:
+            raise ValueError
+        if not first:
+            start, end = max(size - int(last), 0), size
+        else:
+            start = int(first)
+            end = min(int(last) + 1, size) if last else size
+    except ValueError:
+        raise HTTPException(status_code=416, detail="Only a single byte range is supported",
+                            headers={"Content-Range": f"bytes */{size}"})
+    if start >= size or end <= start:
+        raise HTTPException(status_code=416, detail="Range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+def raw_log_response(owner: str, repo: str, job_id: int, range_header: Optional[str] = None) -> Response:
+    """A finished job's log as text: the requested byte range (206), or all of it streamed"""
+    log = _job_log_view(owner, repo, job_id)
+    try:
+        byte_range = parse_range(range_header, log.size)
+        if byte_range is not None:
+            start, end = byte_range
+            content = log.read(start, end)
+    except BaseException:
+        log.close()
+        raise
+    if byte_range is not None:
+        size = log.size
+        log.close()
+        return Response(
+            content=content,
+            status_code=206,
+            media_type="text/plain; charset=utf-8",
+            headers={"Content-Range": f"bytes {start}-{end - 1}/{size}", "Accept-Ranges": "bytes"},
+        )
+
+    def chunks():
+        try:
+            yield from log.chunks()
+        finally:
+            log.close()
+
+    return StreamingResponse(
+        chunks(),
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Length": str(log.size), "Accept-Ranges": "bytes"},
+    )
+
+
+def _log_tail(owner: str, repo: str, job_id: int, offset: int) -> bytes:
+    """Bytes appended to a running job's log since ``offset`` (empty until GitHub has some)"""
+    headers = {"Range": f"bytes={offset}-"} if offset else None
+    try:
+        response = data_source().download(_logs_path(owner, repo, job_id), headers)
+    except GithubException as e:
+        if e.status == 404:
+            return b""
+        raise
+    try:
+        if response.status_code == 416:
+            return b""
+        data = response.content
+    finally:
+        response.close()
+    # A server that ignores the range sends the whole log
+    return data if response.status_code == 206 else data[offset:]
+
+
+def _open_finished_log(owner: str, repo: str, job_id: int) -> Optional[LogView]:
+    """A view of the job's cached log once it has finished, None while it runs"""
+    key = _log_key(owner, repo, job_id)
+    if not log_cache.contains(key) and _job(owner, repo, job_id).get("status") != "completed":
+        return None
+    return log_cache.view(key, lambda: _download(owner, repo, job_id))
+
+
+async def follow_log(owner: str, repo: str, job_id: int, offset: int,
+                     is_disconnected: Callable[[], Awaitable[bool]]) -> AsyncIterator[bytes]:
+    """
+    A job's log from ``offset`` onwards: appended bytes while the job runs,
+    then the rest of the complete log, which is cached on the way.
+    """
+    log_cache.streams += 1
+    try:
+        chunk = b""
+        while True:
+            # While output keeps coming the job is running; check only when it pauses
+            view = None if chunk else await run_github(_open_finished_log, owner, repo, job_id)
+            if view is not None:
+                try:
+                    for chunk in view.chunks(offset):
+                        yield chunk
+                finally:
+                    view.close()
+                return
+            chunk = await run_github(_log_tail, owner, repo, job_id, offset)
+            if chunk:
+                offset += len(chunk)
+                yield chunk
+            await asyncio.sleep(LOG_STREAM_INTERVAL)
+            if await is_disconnected():
+                return
+    except Exception as e:
+        # Headers are gone already; end the stream rather than corrupt it
+        logger.warning(f"Stopped following log of job {job_id} in {owner}/{repo}: {str(e)}")
+    finally:
+        log_cache.streams -= 1
+
+
+async def check_log_request(owner: str, repo: str, job_id: int):
+    """Validate a follow request before the streaming response starts"""
+    if log_cache.contains(_log_key(owner, repo, job_id)):
+        return
+    try:
+        await run_github(_job, owner, repo, job_id)
+    except Exception as e:
+        raise _github_error(owner, repo, job_id, e)
@@ -1,21 +1,67 @@
-import sys
-from datetime import datetime
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse
-from github import Github
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Optional
 import uvicorn
 import logging
 from pydantic import BaseModel
 
+from app.analytics import fetch_repo_analytics, fetch_repo_trend
+from app.cache import response_cache
+from app.catalog import iter_repos, list_repo_summaries, repo_catalog, search_repos
+from app.database import run_store
+from app.encoding import dumps, encoding_stats, json_response
+from app.github_client import client_manager, begin_request_stats
+from app.graphql import graphql_backend
+from app.github_data import (
+    coalesced_github,
+    fetch_run_jobs,
+    fetch_workflow_runs,
+    fetch_workflows,
+    load_dashboard,
+    pool_stats,
+    run_github,
+    stored_repo_status,
+)
+from app.health import health_monitor
+from app.logs import check_log_request, fetch_log_lines, follow_log, log_cache, raw_log_response, search_log
+from app.models import run_models
+from app.poller import poller
+from app.shared import WEB_CONCURRENCY
+from app.singleflight import flight_stats
+from app.stream import event_stream
+from app.warmup import warmup
+from app.workers import coordinator
+from app import health, metrics, webhooks
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="GitHub Actions Dashboard")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the background work once the app can serve; nothing here waits for GitHub"""
+    # With several workers only the one holding the lease polls
+    await coordinator.start(start_polling)
+    health_monitor.start()
+    warmup.start()
+    yield
+    await warmup.stop()
+    await health_monitor.stop()
+    await coordinator.stop()
+    run_store.close()
+
+
+app = FastAPI(title="GitHub Actions Dashboard", lifespan=lifespan)
 
 # Get the absolute path to the static and templates directories
 import os
@@ -26,676 +72,292 @@ templates_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templa
 app.mount("/static", StaticFiles(directory=static_dir), name="static")
 templates = Jinja2Templates(directory=templates_dir)
 
-# GitHub token will be passed as an environment variable
-def get_github_client():
-    token = os.getenv('GITHUB_TOKEN')
-    if not token:
-        logger.error("GITHUB_TOKEN environment variable is not set")
-        return None
-    try:
-        # Create GitHub client with basic settings for compatibility
-        g = Github(login_or_token=token, user_agent="GitHub-Actions-Dashboard")
-        
-        # Test the connection and permissions
-        try:
-            user = g.get_user()
-            logger.info(f"Connected to GitHub as {user.login}")
-            # Try to access private repos to verify permissions
-            # Get first private repo (without per_page parameter for compatibility)
-            try:
-                for repo in user.get_repos():
-                    if getattr(repo, 'private', False):
-                        repo_name = getattr(repo, 'full_name', 'unknown')
-                        logger.info(f"Successfully accessed private repository: {repo_name}")
-                        break
-            except Exception as e:
-                logger.warning(f"Warning checking private repositories: {str(e)}")
-                # Continue even if we can't check private repos, as the token might still work
-                pass
-        except Exception as e:
-            logger.error(f"GitHub token permissions error: {str(e)}")
-            return None
-            
-        return g
-    except Exception as e:
-        logger.error(f"Failed to initialize GitHub client: {e}")
-        return None
-
-g = get_github_client()
+@app.middleware("http")
+async def github_request_stats(request: Request, call_next):
+    """
+    Report how many GitHub calls a request made and how many reused a pooled
+    connection, record its latency and list the calls in ``Server-Timing``.
+    """
+    stats = begin_request_stats()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    route = getattr(request.scope.get("route"), "path", None) or "unmatched"
+    metrics.http_request_seconds.observe((request.method, route, str(response.status_code)), elapsed)
+    response.headers["Server-Timing"] = metrics.server_timing(elapsed, stats.trace)
+    if stats.calls:
+        response.headers["X-GitHub-Calls"] = str(stats.calls)
+        response.headers["X-GitHub-Connections"] = f"new={stats.new_connections}, reused={stats.reused_connections}"
+        logger.debug(f"{request.url.path}: {stats.calls} GitHub calls, {stats.new_connections} new connections")
+    if stats.stale:
+        # Some data came from the cache because GitHub could not be asked (rate limit, outage)
+        response.headers["X-GitHub-Stale"] = "true"
+    return response
 
 class RepoConfig(BaseModel):
     owner: str
     name: str
 
-# In-memory storage for selected repositories
-selected_repos: List[Dict[str, str]] = []
+class DashboardRequest(BaseModel):
+    repos: List[RepoConfig]
+    runs_per_workflow: int = 1
+
+# Upper bound on repositories per /api/dashboard request
+MAX_DASHBOARD_REPOS = int(os.getenv("MAX_DASHBOARD_REPOS", "100"))
+
+def stored_dashboard() -> list:
+    """Repositories on the dashboard with their stored status (None if never synced)"""
+    return [(repo, stored_repo_status(repo["owner"], repo["name"])) for repo in run_store.list_repos()]
+
+async def start_polling():
+    # Repositories added to the dashboard are served from their stored history until the first refresh
+    for repo, data in await run_github(stored_dashboard):
+        if data is not None:
+            poller.restore(repo["owner"], repo["name"], data, pinned=True)
+        else:
+            poller.track(repo["owner"], repo["name"], pinned=True)
+    poller.start()
 
 @app.get("/api/my-repos")
-async def list_my_repos(q: str = None):
+async def list_my_repos(request: Request, q: str = None, cursor: str = None, page: int = None,
+                        limit: int = None, format: str = None):
     """
-    List the authenticated user's repositories, including private ones
+    List the authenticated user's repositories, including private ones.
+    Paginated with ``cursor``/``page`` and ``limit``; ``format=ndjson`` (or an
+    ``Accept: application/x-ndjson`` header) streams one repository per line.
     """
-    try:
-        github = get_github_client()
-        if not github:
-            raise HTTPException(status_code=500, detail="GitHub client not available")
-        
-        # Get the authenticated user
-        user = github.get_user()
-        logger.info(f"Fetching repositories for user: {user.login}")
-        
-        # Get all repositories including private ones
-        # Using a generator to handle pagination manually for compatibility
-        all_repos = []
-        logger.info("Fetching repositories (including private ones)...")
-        
-        try:
-            # Explicitly fetch all repositories (both public and private)
-            repos = user.get_repos(affiliation='owner,collaborator,organization_member', sort='updated', direction='desc')
-        except Exception as e:
-            logger.error(f"Error getting repositories: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error getting repositories: {str(e)}")
-        
-        batch_size = 30
-        batch = []
-        repo_count = 0
-        
-        # Process repositories in batches
-        for repo in repos:
-            try:
-                # Skip if we've reached our limit
-                if repo_count >= 200:  # Increased limit to get more repositories
-                    logger.info("Reached repository limit (200)")
-                    break
-                    
-                # Add to current batch
-                batch.append(repo)
-                repo_count += 1
-                
-                # Process batch if it reaches batch size
-                if len(batch) >= batch_size:
-                    all_repos.extend(batch)
-                    batch = []
-                    logger.info(f"Fetched {repo_count} repositories so far...")
-            except Exception as e:
-                logger.warning(f"Error processing repository: {str(e)}")
-                continue
-        
-        # Add any remaining repos from the last batch
-        if batch:
-            all_repos.extend(batch)
-        
-        logger.info(f"Total repositories fetched: {repo_count}")
-        
-        # Process repositories for output
-        processed_repos = []
-        
-        for repo in all_repos:
-            try:
-                # Get repository details safely
-                repo_name = getattr(repo, 'name', '')
-                repo_description = getattr(repo, 'description', '')
-                repo_private = getattr(repo, 'private', False)
-                
-                # If search term is provided, filter by it
-                search_lower = q.lower() if q else ""
-                if q and search_lower not in repo_name.lower() and \
-                   (not repo_description or search_lower not in repo_description.lower()):
-                    continue
-                
-                # Get owner details safely
-                owner = getattr(repo, 'owner', {})
-                owner_login = getattr(owner, 'login', 'unknown')
-                owner_avatar = getattr(owner, 'avatar_url', '')
-                
-                try:
-                    # Try to get the default branch with better error handling
-                    default_branch = None
-                    try:
-                        default_branch = repo.default_branch
-                        logger.info(f"Got default branch for {owner_login}/{repo_name}: {default_branch}")
-                    except Exception as e:
-                        logger.warning(f"Could not get default branch for {owner_login}/{repo_name}: {str(e)}")
-                    
-                    # Add repo to processed repos
-                    processed_repos.append({
-                        "id": getattr(repo, 'id', 0),
-                        "name": repo_name,
-                        "full_name": f"{owner_login}/{repo_name}",
-                        "owner": {
-                            "login": owner_login,
-                            "avatar_url": owner_avatar,
-                            "html_url": f"https://github.com/{owner_login}"
-                        },
-                        "html_url": f"https://github.com/{owner_login}/{repo_name}",
-                        "description": repo_description,
-                        "stargazers_count": getattr(repo, 'stargazers_count', 0),
-                        "forks_count": getattr(repo, 'forks_count', 0),
-                        "language": getattr(repo, 'language', None),
-                        "updated_at": getattr(repo, 'updated_at', '').isoformat() if hasattr(repo, 'updated_at') else '',
-                        "private": repo_private,
-                        "default_branch": default_branch  # Can be None if not available
-                    })
-                except Exception as e:
-                    logger.error(f"Error processing repository {owner_login}/{repo_name}: {str(e)}")
-                    continue
-                
-                logger.info(f"Found repo: {owner_login}/{repo_name} (private: {repo_private})")
-                
-                # Limit to 200 most recent repos for better coverage
-                if len(processed_repos) >= 200:
-                    logger.info("Reached repository limit (200)")
-                    break
-                    
-            except Exception as e:
-                logger.warning(f"Error processing repository {getattr(repo, 'full_name', 'unknown')}: {str(e)}")
-                continue
-        
-        logger.info(f"Returning {len(processed_repos)} repositories (filtered by search: {'yes' if q else 'no'})")
-        return {"items": processed_repos}
-                
-    except Exception as e:
-        logger.error(f"Error fetching repositories: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error fetching repositories: {str(e)}")
-        
-    except Exception as e:
-        logger.error(f"Error searching repositories: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    if format == "ndjson" or "application/x-ndjson" in request.headers.get("accept", ""):
+        repos = await run_github(iter_repos, q, cursor, page, limit)
+        return StreamingResponse(ndjson_lines(repos), media_type="application/x-ndjson")
+    return await run_github(search_repos, q, cursor, page, limit)
+
+async def ndjson_lines(items, chunk_size: int = 100):
+    """Serialize items one per line, like the JSON endpoints, flushing in chunks rather than per item"""
+    chunk = []
+    for item in items:
+        chunk.append(dumps(item) + b"\n")
+        if len(chunk) >= chunk_size:
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
 
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
     return templates.TemplateResponse("dashboard.html", {"request": request})
 
 @app.get("/api/repos")
-async def list_repos():
-    try:
-        # Get a fresh GitHub client for each request
-        github = get_github_client()
-        if not github:
-            logger.error("Failed to initialize GitHub client")
-            raise HTTPException(status_code=500, detail="GitHub authentication not properly configured")
-        
-        user = github.get_user()
-        if not user:
-            raise HTTPException(status_code=401, detail="Failed to authenticate with GitHub")
-            
-        repos = []
-        for repo in user.get_repos():
-            try:
-                repos.append({
-                    "owner": repo.owner.login,
-                    "name": repo.name,
-                    "full_name": repo.full_name,
-                    "private": repo.private,
-                    "description": repo.description
-                })
-            except Exception as repo_error:
-                logger.warning(f"Error fetching repo {repo.name if hasattr(repo, 'name') else 'unknown'}: {repo_error}")
-                continue
-                
-        return {"repos": repos}
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error in list_repos: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to fetch repositories: {str(e)}")
+async def list_repos(cursor: str = None, page: int = None, limit: int = None):
+    return await run_github(list_repo_summaries, cursor, page, limit)
+
+@app.get("/api/repos/selected")
+async def list_selected_repos():
+    return {"selected_repos": await run_github(run_store.list_repos)}
 
 @app.post("/api/repos/add")
 async def add_repo(repo: RepoConfig):
-    global selected_repos
-    repo_id = f"{repo.owner}/{repo.name}"
-    if not any(r['id'] == repo_id for r in selected_repos):
-        selected_repos.append({
-            "id": repo_id,
-            "owner": repo.owner,
-            "name": repo.name
-        })
-    return {"status": "success", "selected_repos": selected_repos}
+    await run_github(run_store.add_repo, repo.owner, repo.name)
+    poller.track(repo.owner, repo.name, pinned=True)
+    return {"status": "success", "selected_repos": await run_github(run_store.list_repos)}
+
+@app.delete("/api/repos/{owner}/{repo}")
+async def remove_repo(owner: str, repo: str):
+    if not await run_github(run_store.remove_repo, owner, repo):
+        raise HTTPException(status_code=404, detail=f"{owner}/{repo} is not on the dashboard")
+    poller.untrack(owner, repo)
+    return {"status": "success", "selected_repos": await run_github(run_store.list_repos)}
 
 @app.get("/api/workflows/{owner}/{repo}")
-async def get_workflows(owner: str, repo: str):
-    try:
-        github = get_github_client()
-        if not github:
-            raise HTTPException(status_code=500, detail="GitHub authentication not properly configured")
-            
-        repo_obj = github.get_repo(f"{owner}/{repo}")
-        if not repo_obj:
-            raise HTTPException(status_code=404, detail=f"Repository {owner}/{repo} not found")
-            
-        workflows = []
-        for w in repo_obj.get_workflows():
-            try:
-                runs = w.get_runs()
-                latest_run = runs[0] if runs.totalCount > 0 else None
-                
-                workflow_data = {
-                    "id": w.id,
-                    "name": w.name,
-                    "state": w.state,
-                    "path": w.path,
-                    "created_at": w.created_at.isoformat() if w.created_at else None,
-                    "updated_at": w.updated_at.isoformat() if w.updated_at else None,
-                    "url": w.url,
-                    "html_url": w.html_url,
-                    "badge_url": w.badge_url,
-                    "latest_run": {
-                        "id": latest_run.id if latest_run else None,
-                        "status": latest_run.status if latest_run else None,
-                        "conclusion": latest_run.conclusion if latest_run else None,
-                        "created_at": latest_run.created_at.isoformat() if latest_run and latest_run.created_at else None,
-                        "updated_at": latest_run.updated_at.isoformat() if latest_run and latest_run.updated_at else None,
-                        "html_url": latest_run.html_url if latest_run else None
-                    }
-                }
-                
-                workflows.append(workflow_data)
-                
-            except Exception as e:
-                logger.error(f"Error processing workflow {getattr(w, 'id', 'unknown')}: {str(e)}")
-                continue
-                
-        return {"workflows": workflows}
-        
-    except HTTPException as he:
-        logger.error(f"HTTP error in get_workflows: {str(he.detail)}")
-        raise
-    except Exception as e:
-        error_msg = f"Failed to fetch workflows: {str(e)}"
-        logger.error(error_msg)
-        raise HTTPException(status_code=500, detail=error_msg)
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error in get_workflows: {str(e)}")
+async def get_workflows(request: Request, owner: str, repo: str, runs_per_workflow: int = 1, fields: str = None):
+    """A repository's workflows with their latest runs; ``fields`` keeps only those run fields"""
+    workflows = await coalesced_github(("workflows", owner, repo, runs_per_workflow),
+                                       fetch_workflows, owner, repo, runs_per_workflow)
+    return json_response(request, workflows, fields)
 
 @app.get("/api/runs/{owner}/{repo}/{workflow_id}")
-async def get_workflow_runs(owner: str, repo: str, workflow_id: str, per_page: int = 5):
-    try:
-        # Get the repository
-        gh = get_github_client()
-        repo_obj = gh.get_repo(f"{owner}/{repo}")
-        
-        # Get the workflow
-        try:
-            workflow = repo_obj.get_workflow(workflow_id)
-        except Exception as e:
-            logger.error(f"Error getting workflow {workflow_id} from {owner}/{repo}: {str(e)}")
-            # Return empty runs instead of failing
-            return {
-                "runs": [],
-                "workflow": {
-                    "id": workflow_id,
-                    "name": f"Workflow {workflow_id}",
-                    "path": "",
-                    "state": "unknown",
-                    "html_url": f"https://github.com/{owner}/{repo}/actions"
-                }
-            }
-        
-        logger.info(f"Fetching runs for workflow {workflow_id} in {owner}/{repo}")
-        
-        try:
-            # Get the workflow runs with error handling
-            runs = workflow.get_runs()
-            total_count = runs.totalCount
-            logger.info(f"Total runs found: {total_count}")
-            
-            # If no runs, return early with empty list
-            if total_count == 0:
-                return {
-                    "runs": [],
-                    "workflow": {
-                        "id": workflow.id,
-                        "name": workflow.name,
-                        "path": getattr(workflow, 'path', ''),
-                        "state": getattr(workflow, 'state', 'unknown'),
-                        "html_url": getattr(workflow, 'html_url', f"https://github.com/{owner}/{repo}/actions")
-                    }
-                }
-                
-            # Get the most recent runs
-            recent_runs = list(runs[:per_page])
-            logger.info(f"Retrieved {len(recent_runs)} most recent runs")
-            
-            # Debug: Log the raw run data
-            for i, run in enumerate(recent_runs):
-                logger.debug(f"\n=== Run {i+1} ===")
-                logger.debug(f"Run ID: {getattr(run, 'id', 'N/A')}")
-                logger.debug(f"Run number: {getattr(run, 'run_number', 'N/A')}")
-                logger.debug(f"Head SHA: {getattr(run, 'head_sha', 'N/A')}")
-                logger.debug(f"Event: {getattr(run, 'event', 'N/A')}")
-                
-                # Log all available attributes
-                logger.debug("Available attributes: " + ", ".join([attr for attr in dir(run) if not attr.startswith('_')]))
-                
-                # Log raw data if available
-                if hasattr(run, '_rawData'):
-                    logger.debug("Raw run data: " + str(run._rawData))
-                
-                # Log head_commit if available
-                if hasattr(run, 'head_commit'):
-                    logger.debug(f"head_commit: {getattr(run.head_commit, '__dict__', 'N/A')}")
-                
-                # Log actor/user info
-                if hasattr(run, 'actor'):
-                    logger.debug(f"actor: {getattr(run.actor, '__dict__', 'N/A')}")
-                if hasattr(run, 'user'):
-                    logger.debug(f"user: {getattr(run.user, '__dict__', 'N/A')}")
-            
-            runs_data = []
-            for run in recent_runs:
-                try:
-                    # Get raw data directly
-                    raw_data = run._rawData if hasattr(run, '_rawData') else {}
-                    
-                    # Basic run info with raw data fallback
-                    run_id = getattr(run, 'id', raw_data.get('id', 'unknown'))
-                    run_html_url = getattr(run, 'html_url', raw_data.get('html_url', f"https://github.com/{owner}/{repo}/actions"))
-                    
-                    # Safely get run attributes with error handling
-                    run_data = {
-                        "id": run_id,
-                        "run_number": getattr(run, 'run_number', 0),
-                        "event": getattr(run, 'event', 'unknown'),
-                        "status": getattr(run, 'status', 'unknown'),
-                        "conclusion": getattr(run, 'conclusion', 'pending'),
-                        "created_at": run.created_at.isoformat() if hasattr(run, 'created_at') and run.created_at else None,
-                        "updated_at": run.updated_at.isoformat() if hasattr(run, 'updated_at') and run.updated_at else None,
-                        "html_url": run_html_url,
-                        "head_branch": getattr(run, 'head_branch', 'unknown'),
-                    }
-
-                    # Only add head_repository if we can get valid data
-                    try:
-                        if hasattr(run, 'head_repository') and run.head_repository:
-                            full_name = getattr(run.head_repository, 'full_name', None)
-                            if full_name:
-                                run_data["head_repository"] = {"full_name": full_name}
-                    except Exception as e:
-                        logger.warning(f"Error getting head_repository for run {run_id}: {str(e)}")
-
-                    # Get commit message and author information
-                    try:
-                        head_commit_data = {}
-                        
-                        # First try to get from raw data if available
-                        if 'head_commit' in raw_data and raw_data['head_commit']:
-                            head_commit = raw_data['head_commit']
-                            if 'id' in head_commit:
-                                head_commit_data['id'] = head_commit['id']
-                            if 'message' in head_commit:
-                                head_commit_data['message'] = head_commit['message']
-                            if 'author' in head_commit and head_commit['author']:
-                                head_commit_data['author'] = {
-                                    'name': head_commit['author'].get('name', 'Unknown'),
-                                    'email': head_commit['author'].get('email', '')
-                                }
-                        
-                        # Fall back to object attributes if raw data doesn't have what we need
-                        if not head_commit_data and hasattr(run, 'head_commit') and run.head_commit:
-                            if hasattr(run.head_commit, 'sha') and run.head_commit.sha:
-                                head_commit_data["id"] = run.head_commit.sha
-                            if hasattr(run.head_commit, 'message') and run.head_commit.message:
-                                head_commit_data["message"] = run.head_commit.message
-                            if hasattr(run.head_commit, 'author') and run.head_commit.author:
-                                author_data = {}
-                                if hasattr(run.head_commit.author, 'name') and run.head_commit.author.name:
-                                    author_data["name"] = run.head_commit.author.name
-                                if hasattr(run.head_commit.author, 'email') and run.head_commit.author.email:
-                                    author_data["email"] = run.head_commit.author.email
-                                if author_data:
-                                    head_commit_data["author"] = author_data
-                        
-                        # If we still don't have a commit message, try to get it from the repository commits
-                        if 'message' not in head_commit_data and ('head_sha' in raw_data or hasattr(run, 'head_sha')):
-                            sha = raw_data.get('head_sha') or getattr(run, 'head_sha', None)
-                            if sha:
-                                try:
-                                    commit = repo_obj.get_commit(sha=sha)
-                                    if commit and commit.commit:
-                                        head_commit_data["id"] = commit.sha
-                                        head_commit_data["message"] = commit.commit.message
-                                        if commit.commit.author:
-                                            author_data = {}
-                                            if commit.commit.author.name:
-                                                author_data["name"] = commit.commit.author.name
-                                            if commit.commit.author.email:
-                                                author_data["email"] = commit.commit.author.email
-                                            if author_data:
-                                                head_commit_data["author"] = author_data
-                                except Exception as commit_error:
-                                    logger.warning(f"Error getting commit details for {sha}: {str(commit_error)}")
-                        
-                        # If we have a commit message, add it to the run data
-                        if head_commit_data:
-                            run_data["head_commit"] = head_commit_data
-                            
-                    except Exception as e:
-                        logger.warning(f"Error processing commit info for run {run_id}: {str(e)}")
-                        logger.debug(f"Run {run_id} raw data: {raw_data}")
-                        
-                        # Add a default commit message if we couldn't get one
-                        if 'head_commit' not in run_data:
-                            run_data["head_commit"] = {
-                                "message": "No commit message available",
-                                "author": {"name": "Unknown"}
-                            }
-
-                    # Add actor/author info with multiple fallbacks
-                    try:
-                        # First try to get from raw data if available
-                        if 'actor' in raw_data and raw_data['actor']:
-                            actor_data = raw_data['actor']
-                            actor_login = actor_data.get('login') or actor_data.get('name')
-                            if actor_login:
-                                run_data["actor"] = {
-                                    "login": actor_login,
-                                    "name": actor_data.get('name', actor_login),
-                                    "avatar_url": actor_data.get('avatar_url', ''),
-                                    "html_url": f"https://github.com/{actor_login}"
-                                }
-                        
-                        # Then try to get from actor attribute
-                        if 'actor' not in run_data and hasattr(run, 'actor') and run.actor:
-                            actor = run.actor
-                            actor_login = getattr(actor, 'login', None) or getattr(actor, 'name', None)
-                            if actor_login:
-                                run_data["actor"] = {
-                                    "login": actor_login,
-                                    "name": getattr(actor, 'name', actor_login),
-                                    "avatar_url": getattr(actor, 'avatar_url', ''),
-                                    "html_url": f"https://github.com/{actor_login}"
-                                }
-                        
-                        # Try user attribute if actor not found
-                        if 'actor' not in run_data and hasattr(run, 'user') and run.user:
-                            user = run.user
-                            user_login = getattr(user, 'login', None) or getattr(user, 'name', None)
-                            if user_login:
-                                run_data["actor"] = {
-                                    "login": user_login,
-                                    "name": getattr(user, 'name', user_login),
-                                    "avatar_url": getattr(user, 'avatar_url', ''),
-                                    "html_url": f"https://github.com/{user_login}"
-                                }
-                        
-                        # Try to get from head_commit author if available
-                        if 'actor' not in run_data and 'head_commit' in run_data and 'author' in run_data['head_commit']:
-                            author = run_data['head_commit']['author']
-                            if 'name' in author and author['name']:
-                                run_data["actor"] = {
-                                    "login": author['name'],
-                                    "name": author['name'],
-                                    "html_url": f"https://github.com/search?q={author['name']}&type=users"
-                                }
-                        
-                        # If we still don't have an actor, check trigger_actor
-                        if 'actor' not in run_data and 'triggering_actor' in raw_data and raw_data['triggering_actor']:
-                            actor_data = raw_data['triggering_actor']
-                            actor_login = actor_data.get('login') or actor_data.get('name')
-                            if actor_login:
-                                run_data["actor"] = {
-                                    "login": actor_login,
-                                    "name": actor_data.get('name', actor_login),
-                                    "avatar_url": actor_data.get('avatar_url', ''),
-                                    "html_url": f"https://github.com/{actor_login}"
-                                }
-                        
-                        # Add a default actor if we couldn't find one
-                        if 'actor' not in run_data:
-                            run_data["actor"] = {
-                                "login": "unknown",
-                                "name": "Unknown",
-                                "html_url": "#"
-                            }
-                            
-                    except Exception as e:
-                        logger.warning(f"Error getting actor/author info for run {run_id}: {str(e)}")
-                        logger.debug(f"Run {run_id} raw actor data: {raw_data.get('actor')}")
-                        logger.debug(f"Run {run_id} raw data keys: {', '.join(raw_data.keys())}")
-                        
-                        # Ensure we always have an actor object
-                        run_data["actor"] = {
-                            "login": "error",
-                            "name": "Error loading user",
-                            "html_url": "#"
-                        }
-
-                    runs_data.append(run_data)
-                    
-                except Exception as e:
-                    logger.warning(f"Error processing workflow run {getattr(run, 'id', 'unknown')}: {str(e)}")
-                    continue
-                    
-            return {
-                "runs": runs_data,
-                "workflow": {
-                    "id": workflow.id,
-                    "name": getattr(workflow, 'name', f"Workflow {workflow_id}"),
-                    "path": getattr(workflow, 'path', ''),
-                    "state": getattr(workflow, 'state', 'unknown'),
-                    "created_at": workflow.created_at.isoformat() if hasattr(workflow, 'created_at') and workflow.created_at else None,
-                    "updated_at": workflow.updated_at.isoformat() if hasattr(workflow, 'updated_at') and workflow.updated_at else None,
-                    "url": getattr(workflow, 'url', ''),
-                    "html_url": getattr(workflow, 'html_url', f"https://github.com/{owner}/{repo}/actions"),
-                    "badge_url": getattr(workflow, 'badge_url', '') if hasattr(workflow, 'badge_url') else ''
-                }
-            }
-            
-        except Exception as e:
-            logger.error(f"Error fetching runs for workflow {workflow_id}: {str(e)}")
-            # Return empty runs with basic workflow info
-            return {
-                "runs": [],
-                "workflow": {
-                    "id": workflow.id if hasattr(workflow, 'id') else workflow_id,
-                    "name": getattr(workflow, 'name', f"Workflow {workflow_id}"),
-                    "path": getattr(workflow, 'path', ''),
-                    "state": getattr(workflow, 'state', 'unknown'),
-                    "html_url": getattr(workflow, 'html_url', f"https://github.com/{owner}/{repo}/actions")
-                }
-            }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error in get_workflow_runs: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to fetch workflow runs: {str(e)}")
+async def get_workflow_runs(request: Request, owner: str, repo: str, workflow_id: str, per_page: int = 5,
+                            fields: str = None):
+    """A workflow's most recent runs; ``fields`` keeps only those run fields"""
+    runs = await coalesced_github(("runs", owner, repo, workflow_id, per_page),
+                                  fetch_workflow_runs, owner, repo, workflow_id, per_page)
+    return json_response(request, runs, fields)
+
+@app.get("/api/runs/{owner}/{repo}/{run_id}/jobs")
+async def get_run_jobs(request: Request, owner: str, repo: str, run_id: int, cursor: str = None,
+                       page: int = None, limit: int = None):
+    """Jobs of a run with their steps and timings, paginated with ``cursor``/``page`` and ``limit``"""
+    return json_response(request, await run_github(fetch_run_jobs, owner, repo, run_id, cursor, page, limit))
+
+@app.get("/api/logs/{owner}/{repo}/jobs/{job_id}")
+async def get_job_log(owner: str, repo: str, job_id: int, start_line: int = 1, lines: int = 500):
+    """A window of a finished job's log by line number; continue from ``next_line``"""
+    return await run_github(fetch_log_lines, owner, repo, job_id, start_line, lines)
+
+@app.get("/api/logs/{owner}/{repo}/jobs/{job_id}/raw")
+async def get_job_log_raw(request: Request, owner: str, repo: str, job_id: int):
+    """A finished job's log as text; honours a single ``Range: bytes=...`` header"""
+    return await run_github(raw_log_response, owner, repo, job_id, request.headers.get("range"))
+
+@app.get("/api/logs/{owner}/{repo}/jobs/{job_id}/search")
+async def search_job_log(owner: str, repo: str, job_id: int, q: str, regex: bool = False,
+                         case_sensitive: bool = False, limit: int = 100):
+    """Lines of a finished job's log matching ``q``, searched on the server"""
+    return await run_github(search_log, owner, repo, job_id, q, regex, case_sensitive, limit)
+
+@app.get("/api/logs/{owner}/{repo}/jobs/{job_id}/stream")
+async def stream_job_log(request: Request, owner: str, repo: str, job_id: int, offset: int = 0):
+    """
+    A job's log from byte ``offset`` on, as it is written while the job runs
+    and until it has finished.
+    """
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="offset must not be negative")
+    await check_log_request(owner, repo, job_id)
+    return StreamingResponse(
+        follow_log(owner, repo, job_id, offset, request.is_disconnected),
+        media_type="text/plain; charset=utf-8",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/api/dashboard")
+async def get_dashboard(request: DashboardRequest, http_request: Request, fields: str = None):
+    """
+    Latest run status of every workflow in several repositories, in one request.
+    Served from the background poller's snapshots; repositories seen for the
+    first time are fetched (and tracked) on the spot.
+    """
+    if len(request.repos) > MAX_DASHBOARD_REPOS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_DASHBOARD_REPOS} repositories per request")
+    repos = [r.dict() for r in request.repos]
+    if request.runs_per_workflow > 1:
+        # Snapshots only hold the latest run per workflow
+        statuses = await load_dashboard(repos, request.runs_per_workflow)
+    else:
+        statuses = await poller.snapshots(repos)
+    return json_response(http_request, {"repos": statuses}, fields)
+
+@app.get("/api/analytics/{owner}/{repo}")
+async def get_repo_analytics(owner: str, repo: str, days: int = 30):
+    """Per-workflow success/failure rates, duration and queue-time percentiles and flakiness"""
+    return await run_github(fetch_repo_analytics, owner, repo, days)
+
+@app.get("/api/analytics/{owner}/{repo}/trend")
+async def get_repo_trend(owner: str, repo: str, days: int = 30, workflow_id: Optional[int] = None):
+    """Daily run counts, rates and average duration for a repository or one workflow"""
+    return await run_github(fetch_repo_trend, owner, repo, days, workflow_id)
+
+@app.get("/api/github/stats")
+async def github_client_stats():
+    """Connection pool, token and GraphQL query stats for the shared GitHub client"""
+    return {**client_manager.stats(), "worker_pool": pool_stats(), "graphql": graphql_backend.stats()}
+
+@app.get("/api/stream")
+async def stream_updates(request: Request, repos: str):
+    """
+    Server-Sent Events with live updates for ``repos`` (comma-separated
+    ``owner/name``): a full snapshot per repository on connect, then only deltas.
+    """
+    repo_list = []
+    for full_name in filter(None, (r.strip() for r in repos.split(","))):
+        owner, _, name = full_name.partition("/")
+        if not owner or not name or "/" in name:
+            raise HTTPException(status_code=400, detail=f"Invalid repository: {full_name}")
+        repo_list.append({"owner": owner, "name": name})
+    if not repo_list or len(repo_list) > MAX_DASHBOARD_REPOS:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_DASHBOARD_REPOS} repositories required")
+    return StreamingResponse(
+        event_stream(repo_list, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/webhooks/github")
+async def github_webhook(request: Request):
+    """Receive workflow_run / workflow_job webhooks signed with GITHUB_WEBHOOK_SECRET"""
+    body = await request.body()
+    # Store, shared-store and cache writes stay off the event loop; snapshot merges come back to it
+    return await run_github(webhooks.handle_webhook, request.headers, body, asyncio.get_running_loop())
+
+@app.get("/api/webhooks/stats")
+async def webhook_stats():
+    """Counts of applied, ignored, duplicate and rejected webhook deliveries"""
+    return webhooks.stats()
+
+@app.get("/api/poller/stats")
+async def poller_stats():
+    """Tracked repositories and their current refresh intervals"""
+    return poller.stats()
+
+@app.get("/api/workers/stats")
+async def worker_stats():
+    """This worker's role (polling or mirroring) and the shared state backend"""
+    return coordinator.stats()
+
+@app.get("/api/database/stats")
+async def database_stats():
+    """Size of the persisted run history"""
+    return await run_github(run_store.stats)
+
+@app.get("/api/repos/catalog/stats")
+async def repo_catalog_stats():
+    """Size and age of the indexed repository listing"""
+    return repo_catalog.stats()
+
+@app.get("/api/logs/stats")
+async def log_cache_stats():
+    """Size and hit counters of the on-disk job log cache"""
+    return log_cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Request and GitHub call latencies, cache, rate-limit and poller figures for Prometheus"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss/304 counters for the GitHub response cache, and the parsed-run memo"""
+    return {**response_cache.stats(), "run_models": run_models.stats()}
+
+@app.get("/api/startup/stats")
+async def startup_stats():
+    """Import and boot time of this worker and how the background warm-up went"""
+    return warmup.stats()
+
+@app.get("/api/encoding/stats")
+async def response_encoding_stats():
+    """Bytes of JSON produced and sent, 304s and time spent encoding the status endpoints' responses"""
+    return encoding_stats.stats()
+
+@app.get("/api/singleflight/stats")
+async def singleflight_stats():
+    """Identical in-flight fetches that were coalesced into one, and how many are waiting"""
+    return {"flights": flight_stats()}
 
 @app.get("/health")
+@app.get("/health/live")
 async def health_check():
     """
-    Lightweight health check endpoint.
-    Returns 200 if the application is running and can respond to requests.
+    Liveness probe: 200 as long as the application answers requests.
+    Does no I/O, so it is safe to probe as often as the orchestrator likes.
     """
-    try:
-        # Basic response with minimal processing - no datetime dependency
-        response = {
-            "status": "healthy",
-            "app": "github-actions-dashboard",
-            "version": "1.0.0",
-            "system": {
-                "python_version": ".".join(map(str, sys.version_info[:3])),
-                "platform": sys.platform
-            }
-        }
-        
-        # Only check GitHub connection on the first health check or periodically
-        # to reduce API calls
-        current_time = datetime.utcnow()
-        last_github_check = getattr(health_check, '_last_github_check', None)
-        
-        if not last_github_check or (current_time - last_github_check).total_seconds() > 300:  # 5 minutes
-            try:
-                github = get_github_client()
-                if github:
-                    # Just check rate limit as it's lightweight
-                    rate_limit = github.get_rate_limit()
-                    response["github"] = {
-                        "authenticated": True,
-                        "rate_limit": rate_limit.core.remaining,
-                        "rate_limit_reset": rate_limit.core.reset.isoformat()
-                    }
-                    health_check._last_github_check = current_time
-            except Exception as e:
-                logger.debug(f"GitHub status check skipped: {str(e)}")
-                response["github"] = {
-                    "authenticated": False,
-                    "error": str(e)[:100]  # Truncate long error messages
-                }
-        
-        return JSONResponse(status_code=200, content=response)
-        
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        return JSONResponse(
-            status_code=500,
-            content={
-                "status": "error",
-                "message": "Application error",
-                "error": str(e)[:200]  # Truncate long error messages
-            }
-        )
+    return health.liveness()
 
+@app.get("/health/ready")
 @app.get("/health/full")
-async def full_health_check():
-    """Full health check including GitHub API connectivity"""
-    try:
-        # Basic app check
-        github = get_github_client()
-        if not github:
-            return JSONResponse(
-                status_code=500,
-                content={
-                    "status": "error",
-                    "message": "GitHub client not initialized",
-                    "github_connected": False
-                }
-            )
-        
-        # Test GitHub API connection
-        user = github.get_user()
-        return {
-            "status": "healthy",
-            "app": "running",
-            "github_connected": True,
-            "github_user": user.login,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-    except Exception as e:
-        logger.error(f"Full health check failed: {str(e)}")
-        return JSONResponse(
-            status_code=500,
-            content={
-                "status": "error",
-                "message": "GitHub connection failed",
-                "error": str(e),
-                "github_connected": False
-            }
-        )
+async def readiness_check():
+    """
+    Readiness probe from the status the health monitor refreshes in the
+    background: 503 until GitHub has answered once, "degraded" with the
+    problems listed when it stopped answering, the rate-limit budget is low or
+    the poller falls behind. Never calls GitHub itself.
+    """
+    ready, report = health_monitor.readiness()
+    return JSONResponse(status_code=200 if ready else 503, content=report)
+
+warmup.imported(_import_started)
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, log_level="info")
+    # RELOAD=true for development; otherwise WEB_CONCURRENCY worker processes
+    reload = os.getenv("RELOAD", "false").lower() == "true"
+    uvicorn.run("app.main:app", host=os.getenv("HOST", "0.0.0.0"), port=int(os.getenv("PORT", "8000")),
+                reload=reload, workers=None if reload else WEB_CONCURRENCY, log_level="info")
@@ -0,0 +1,237 @@
+"""
+Prometheus metrics, rendered in the text exposition format at ``/metrics``.
+
+Latencies of dashboard requests and outbound GitHub calls are recorded in
+histograms as they happen; cache, rate-limit, poller and pool figures are
+read from their owners at scrape time.
+"""
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+# Seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Server-Timing entries per response; the rest are summarized in one entry
+MAX_TIMING_ENTRIES = 50
+
+_ID_SEGMENT = re.compile(r"/(\d+|[0-9a-f]{40})(?=/|$)")
+_OWNER_REPO = re.compile(r"^/repos/[^/]+/[^/]+")
+_USER_ORG = re.compile(r"^/(users|orgs)/[^/]+")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative histogram per label set, like prometheus_client's"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [count per bucket..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            for upper, count in zip(self.buckets, values):
+                le = f'le="{upper}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {count}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {values[-2]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(values[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {values[-2]}")
+        return lines
+
+
+http_request_seconds = Histogram(
+    "dashboard_http_request_duration_seconds",
+    "Dashboard API request latency by route",
+    ("method", "route", "status"),
+)
+github_request_seconds = Histogram(
+    "dashboard_github_request_duration_seconds",
+    "Outbound GitHub API call latency by endpoint",
+    ("method", "endpoint", "status"),
+)
+
+
+def github_endpoint(url: str) -> str:
+    """``/repos/{owner}/{repo}/actions/runs/{id}`` style template of a GitHub API URL"""
+    path = urlparse(url).path
+    if path.startswith("/api/v3/"):
+        # GitHub Enterprise Server
+        path = path[len("/api/v3"):]
+    path = _OWNER_REPO.sub("/repos/{owner}/{repo}", path)
+    path = _USER_ORG.sub(lambda m: f"/{m.group(1)}/{{name}}", path)
+    return _ID_SEGMENT.sub(lambda m: "/{sha}" if len(m.group(1)) == 40 else "/{id}", path)
+
+
+def server_timing(total_seconds: float, trace: Sequence[Tuple[str, str, int, float]]) -> str:
+    """
+    ``Server-Timing`` header value: the whole request, GitHub time and one
+    entry per GitHub call ``(method, path, status, seconds)`` in call order.
+    """
+    entries = [f"app;dur={total_seconds * 1000:.1f}"]
+    if trace:
+        github_ms = sum(call[3] for call in trace) * 1000
+        entries.append(f'github;desc="{len(trace)} GitHub call{"s" if len(trace) != 1 else ""}";dur={github_ms:.1f}')
+    for i, (method, path, status, seconds) in enumerate(trace[:MAX_TIMING_ENTRIES], 1):
+        entries.append(f'gh{i};desc="{method} {_escape(path)} {status}";dur={seconds * 1000:.1f}')
+    if len(trace) > MAX_TIMING_ENTRIES:
+        rest = trace[MAX_TIMING_ENTRIES:]
+        entries.append(f'gh-more;desc="{len(rest)} more calls";dur={sum(c[3] for c in rest) * 1000:.1f}')
+    return ", ".join(entries)
+
+
+def _sample(lines: List[str], name: str, kind: str, documentation: str,
+            values: Iterable[Tuple[Dict[str, str], Optional[float]]]):
+    values = [(labels, value) for labels, value in values if value is not None]
+    if not values:
+        return
+    lines.append(f"# HELP {name} {documentation}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in values:
+        lines.append(f"{name}{_labels(list(labels), list(labels.values()))} {_number(value)}")
+
+
+def _collect(lines: List[str]):
+    """Figures owned by other components, read at scrape time"""
+    from app.cache import response_cache
+    from app.datasource import data_source
+    from app.encoding import encoding_stats
+    from app.github_data import pool_stats
+    from app.graphql import graphql_backend
+    from app.logs import log_cache
+    from app.models import run_models
+    from app.poller import poller
+    from app.ratelimit import rate_limiter
+    from app.singleflight import flight_stats
+
+    cache = response_cache.stats()
+    for key, documentation in (
+        ("hits", "GitHub responses served from the cache while fresh"),
+        ("misses", "GitHub responses fetched because nothing usable was cached"),
+        ("not_modified", "Cached GitHub responses revalidated with a 304"),
+        ("evictions", "Cached GitHub responses evicted by the memory cap"),
+        ("stale", "Cached GitHub responses served because GitHub could not be asked"),
+    ):
+        _sample(lines, f"dashboard_cache_{key}_total", "counter", documentation, [({}, cache[key])])
+    _sample(lines, "dashboard_cache_hit_ratio", "gauge",
+            "Share of cache lookups that did not spend rate-limit budget", [({}, cache["hit_ratio"])])
+    _sample(lines, "dashboard_cache_bytes", "gauge", "Bytes held by the GitHub response cache", [({}, cache["bytes"])])
+    _sample(lines, "dashboard_cache_entries", "gauge", "Responses held by the GitHub response cache",
+            [({}, cache["entries"])])
+
+    models = run_models.stats()
+    _sample(lines, "dashboard_run_models", "gauge", "Parsed workflow runs held for reuse", [({}, models["runs"])])
+    _sample(lines, "dashboard_run_model_actors", "gauge", "Distinct interned run actors", [({}, models["actors"])])
+    _sample(lines, "dashboard_run_model_hits_total", "counter", "Runs rendered without parsing their JSON again",
+            [({}, models["hits"])])
+    _sample(lines, "dashboard_run_model_misses_total", "counter", "Runs parsed from GitHub JSON",
+            [({}, models["misses"])])
+
+    logs = log_cache.stats()
+    _sample(lines, "dashboard_log_cache_bytes", "gauge", "Bytes of job logs cached on disk", [({}, logs["bytes"])])
+    _sample(lines, "dashboard_log_cache_hits_total", "counter", "Job log reads served from disk",
+            [({}, logs["hits"])])
+    _sample(lines, "dashboard_log_cache_misses_total", "counter", "Job logs downloaded from GitHub",
+            [({}, logs["misses"])])
+
+    limits = rate_limiter.stats()
+    buckets = limits["buckets"]
+    _sample(lines, "github_rate_limit_remaining", "gauge", "Requests left in the current GitHub rate-limit window",
+            [({"resource": r}, b["remaining"]) for r, b in buckets.items()])
+    _sample(lines, "github_rate_limit_limit", "gauge", "Size of the GitHub rate-limit window",
+            [({"resource": r}, b["limit"]) for r, b in buckets.items()])
+    _sample(lines, "github_rate_limit_reset_seconds", "gauge", "Seconds until the GitHub rate-limit window resets",
+            [({"resource": r}, b["resets_in"]) for r, b in buckets.items()])
+    _sample(lines, "dashboard_github_calls_total", "counter", "GitHub calls admitted by the rate limiter",
+            [({"priority": p}, n) for p, n in limits["calls"].items()])
+    _sample(lines, "dashboard_github_deferred_total", "counter",
+            "Background GitHub calls deferred to keep budget for interactive requests", [({}, limits["deferred"])])
+    _sample(lines, "dashboard_github_rejected_total", "counter", "GitHub calls refused with the budget exhausted",
+            [({}, limits["rejected"])])
+
+    # Per token of the pool (sources without tokens, like the mocks, report none)
+    tokens = data_source().stats().get("tokens", [])
+    _sample(lines, "github_token_rate_limit_remaining", "gauge", "Requests left for a token in its rate-limit window",
+            [({"token": t["name"], "resource": r}, b["remaining"]) for t in tokens for r, b in t["buckets"].items()])
+    _sample(lines, "github_token_rate_limit_limit", "gauge", "Size of a token's GitHub rate-limit window",
+            [({"token": t["name"], "resource": r}, b["limit"]) for t in tokens for r, b in t["buckets"].items()])
+    _sample(lines, "dashboard_github_token_calls_total", "counter", "GitHub calls admitted per token",
+            [({"token": t["name"]}, t["calls"]) for t in tokens])
+    _sample(lines, "github_token_expires_seconds", "gauge", "Seconds until an installation token expires",
+            [({"token": t["name"]}, t["expires_in"]) for t in tokens if t["expires_in"] is not None])
+
+    queries = graphql_backend.stats()
+    _sample(lines, "dashboard_graphql_queries_total", "counter", "GraphQL status queries sent to GitHub",
+            [({}, queries["queries"])])
+    _sample(lines, "dashboard_graphql_cost_total", "counter", "GraphQL rate-limit points spent, as GitHub reported them",
+            [({}, queries["cost"])])
+
+    encoded = encoding_stats.stats()
+    _sample(lines, "dashboard_response_json_bytes_total", "counter",
+            "JSON bytes produced for the status endpoints, after fields= projection", [({}, encoded["json_bytes"])])
+    _sample(lines, "dashboard_response_sent_bytes_total", "counter",
+            "Body bytes the status endpoints sent, after compression (none for 304s)", [({}, encoded["sent_bytes"])])
+    _sample(lines, "dashboard_response_encode_seconds_total", "counter",
+            "Time spent serializing, hashing and compressing status responses", [({}, encoded["encode_seconds"])])
+    _sample(lines, "dashboard_responses_total", "counter", "Status responses by content coding, or 304",
+            [({"encoding": e}, n) for e, n in encoded["encodings"].items()])
+
+    flights = flight_stats()
+    _sample(lines, "dashboard_singleflight_executions_total", "counter",
+            "Fetches that ran on behalf of all concurrent callers with the same key",
+            [({"flight": f["name"]}, f["executions"]) for f in flights])
+    _sample(lines, "dashboard_singleflight_coalesced_total", "counter",
+            "Calls that awaited an identical in-flight fetch instead of making their own",
+            [({"flight": f["name"]}, f["coalesced"]) for f in flights])
+    _sample(lines, "dashboard_singleflight_waiters", "gauge", "Calls currently waiting on an in-flight fetch",
+            [({"flight": f["name"]}, f["waiting"]) for f in flights])
+    _sample(lines, "dashboard_singleflight_max_waiters", "gauge", "Most calls seen waiting on a single fetch",
+            [({"flight": f["name"]}, f["max_waiters"]) for f in flights])
+
+    _sample(lines, "dashboard_github_in_flight", "gauge", "Blocking GitHub calls running on the worker pool",
+            [({}, pool_stats()["in_flight"])])
+    polling = poller.stats()
+    _sample(lines, "dashboard_poller_tracked_repos", "gauge", "Repositories refreshed in the background",
+            [({}, polling["tracked"])])
+    _sample(lines, "dashboard_stream_subscribers", "gauge", "Open /api/stream connections",
+            [({}, polling["subscribers"])])
+
+
+def render() -> str:
+    lines = http_request_seconds.render() + github_request_seconds.render()
+    _collect(lines)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,297 @@
+"""
+Compact models of GitHub workflows and runs, parsed once from raw JSON.
+
+A run's list entry carries the whole repository, head repository, actor and
+commit objects; the API only ever needs a few fields of them. :class:`Run`
+keeps just those in ``__slots__``, read in a single pass over the JSON
+without PyGithub objects (whose lazy attributes can each cost a request).
+The same person triggers most runs of a repository, so actors are interned:
+all runs of one actor share one :class:`Actor`.
+
+Parsed runs are memoized by id, attempt and ``updated_at`` (a bounded LRU of
+RUN_MODEL_CACHE_SIZE), so runs served again from the response cache or the
+run history are not parsed again. The ``payload``, ``summary`` and
+``status_payload`` methods render the API's JSON shapes.
+"""
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Parsed runs kept for reuse
+RUN_MODEL_CACHE_SIZE = max(int(os.getenv("RUN_MODEL_CACHE_SIZE", "20000")), 0)
+
+
+class _Missing:
+    """A key absent from the JSON, which the payloads default differently from null"""
+
+    __slots__ = ()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+MISSING: Any = _Missing()
+
+
+def _or(value: Any, default: Any) -> Any:
+    return default if value is MISSING else value
+
+
+def isoformat(value: Optional[str]) -> Optional[str]:
+    """Render a GitHub timestamp the way datetime.isoformat() does (+00:00, not Z)"""
+    if value and value.endswith("Z"):
+        return value[:-1] + "+00:00"
+    return value
+
+
+class Actor:
+    """A user as runs show it; shared by every run with the same user"""
+
+    __slots__ = ("login", "name", "avatar_url", "html_url", "__weakref__")
+
+    def __init__(self, login: Any, name: Any, avatar_url: Optional[str], html_url: str):
+        self.login = login
+        self.name = name
+        # None for commit authors, who have no GitHub avatar to show
+        self.avatar_url = avatar_url
+        self.html_url = html_url
+
+    def payload(self) -> Dict[str, Any]:
+        data = {"login": self.login, "name": self.name}
+        if self.avatar_url is not None:
+            data["avatar_url"] = self.avatar_url
+        data["html_url"] = self.html_url
+        return data
+
+
+_actors: "weakref.WeakValueDictionary[Tuple[Any, ...], Actor]" = weakref.WeakValueDictionary()
+_actors_lock = threading.Lock()
+
+
+def _intern(login: Any, name: Any, avatar_url: Optional[str], html_url: str) -> Actor:
+    key = (login, name, avatar_url, html_url)
+    actor = _actors.get(key)
+    if actor is None:
+        with _actors_lock:
+            actor = _actors.get(key)
+            if actor is None:
+                actor = _actors[key] = Actor(login, name, avatar_url, html_url)
+    return actor
+
+
+def user_actor(data: Optional[Dict[str, Any]]) -> Optional[Actor]:
+    """The actor of a GitHub user object; None without a login or name"""
+    if not data:
+        return None
+    login = data.get("login") or data.get("name")
+    if not login:
+        return None
+    return _intern(login, data.get("name", login), data.get("avatar_url", ""), f"https://github.com/{login}")
+
+
+def author_actor(name: str) -> Actor:
+    """Stand-in actor for a commit author, who may have no GitHub account"""
+    return _intern(name, name, None, f"https://github.com/search?q={name}&type=users")
+
+
+class Commit:
+    __slots__ = ("id", "message", "author_name", "author_email")
+
+    def __init__(self, data: Dict[str, Any]):
+        self.id = data.get("id", MISSING)
+        self.message = data.get("message", MISSING)
+        author = data.get("author")
+        self.author_name = author.get("name", "Unknown") if author else MISSING
+        self.author_email = author.get("email", "") if author else MISSING
+
+    def payload(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        if self.id is not MISSING:
+            data["id"] = self.id
+        if self.message is not MISSING:
+            data["message"] = self.message
+        if self.author_name is not MISSING:
+            data["author"] = {"name": self.author_name, "email": self.author_email}
+        return data
+
+
+UNKNOWN_ACTOR = {"login": "unknown", "name": "Unknown", "html_url": "#"}
+
+
+class Run:
+    """The fields of a workflow run the dashboard shows"""
+
+    __slots__ = ("id", "run_number", "run_attempt", "event", "status", "conclusion", "created_at",
+                 "updated_at", "html_url", "head_branch", "head_sha", "head_repository", "head_commit",
+                 "actor", "status_login")
+
+    def __init__(self, raw: Dict[str, Any]):
+        get = raw.get
+        self.id = get("id", MISSING)
+        self.run_number = get("run_number", MISSING)
+        self.run_attempt = get("run_attempt")
+        self.event = get("event", MISSING)
+        self.status = get("status", MISSING)
+        self.conclusion = get("conclusion", MISSING)
+        self.created_at = isoformat(get("created_at"))
+        self.updated_at = isoformat(get("updated_at"))
+        self.html_url = get("html_url")
+        self.head_branch = get("head_branch", MISSING)
+        self.head_sha = get("head_sha")
+        head_repository = get("head_repository") or {}
+        self.head_repository = head_repository.get("full_name") or None
+        head_commit = get("head_commit") or {}
+        self.head_commit = Commit(head_commit) if head_commit else None
+
+        # Actor fallbacks: actor, then commit author, then triggering actor
+        actor = get("actor")
+        triggering_actor = get("triggering_actor")
+        resolved = user_actor(actor)
+        if resolved is None and self.head_commit is not None and self.head_commit.author_name:
+            resolved = author_actor(self.head_commit.author_name)
+        self.actor = resolved or user_actor(triggering_actor)
+        # The compact status shows the raw login of the actor (or triggering actor)
+        self.status_login = (actor or triggering_actor or {}).get("login", "unknown")
+
+    @classmethod
+    def parse(cls, raw: Dict[str, Any]) -> "Run":
+        """The run for ``raw``, parsed once per id, attempt and update"""
+        return run_models.get(raw)
+
+    def payload(self, owner: str, repo: str) -> Dict[str, Any]:
+        """The full run of ``/api/runs`` and the jobs endpoint"""
+        data = {
+            "id": _or(self.id, "unknown"),
+            "run_number": _or(self.run_number, 0),
+            "event": _or(self.event, "unknown"),
+            "status": _or(self.status, "unknown"),
+            "conclusion": _or(self.conclusion, "pending"),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "html_url": self.html_url or f"https://github.com/{owner}/{repo}/actions",
+            "head_branch": _or(self.head_branch, "unknown"),
+            "head_sha": self.head_sha,
+        }
+        if self.head_repository:
+            data["head_repository"] = {"full_name": self.head_repository}
+        if self.head_commit is not None:
+            commit = self.head_commit.payload()
+            if commit:
+                data["head_commit"] = commit
+        data["actor"] = self.actor.payload() if self.actor is not None else dict(UNKNOWN_ACTOR)
+        return data
+
+    def summary(self) -> Dict[str, Any]:
+        """The latest run of a workflow in ``/api/workflows``"""
+        return {
+            "id": _or(self.id, None),
+            "status": _or(self.status, None),
+            "conclusion": _or(self.conclusion, None),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "html_url": self.html_url,
+        }
+
+    def status_payload(self) -> Dict[str, Any]:
+        """Compact latest-run status for the dashboard: just what the run row renders"""
+        message = self.head_commit.message if self.head_commit is not None else MISSING
+        return {
+            "id": _or(self.id, None),
+            "run_number": _or(self.run_number, None),
+            "status": _or(self.status, None),
+            "conclusion": _or(self.conclusion, None),
+            "event": _or(self.event, None),
+            "head_branch": _or(self.head_branch, None),
+            "head_sha": self.head_sha,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "html_url": self.html_url,
+            "actor": {"login": self.status_login},
+            "head_commit": {"message": message.split("\n", 1)[0]} if message else {},
+        }
+
+
+EMPTY_SUMMARY = {"id": None, "status": None, "conclusion": None, "created_at": None, "updated_at": None,
+                 "html_url": None}
+
+
+class RunModels:
+    """Bounded LRU of parsed runs, keyed by what changes when GitHub updates a run"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._runs: "OrderedDict[Tuple[Any, ...], Run]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, raw: Dict[str, Any]) -> Run:
+        run_id = raw.get("id")
+        if run_id is None or not self.max_size:
+            return Run(raw)
+        # Any change to a run comes with a new updated_at; the size tells the
+        # REST, webhook and GraphQL renderings of the same run apart
+        key = (run_id, raw.get("run_attempt"), raw.get("updated_at"), raw.get("status"), len(raw))
+        with self._lock:
+            run = self._runs.get(key)
+            if run is not None:
+                self._runs.move_to_end(key)
+                self.hits += 1
+                return run
+        run = Run(raw)
+        with self._lock:
+            self.misses += 1
+            self._runs[key] = run
+            while len(self._runs) > self.max_size:
+                self._runs.popitem(last=False)
+        return run
+
+    def clear(self):
+        with self._lock:
+            self._runs.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": len(self._runs),
+            "max_runs": self.max_size,
+            "actors": len(_actors),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+run_models = RunModels(RUN_MODEL_CACHE_SIZE)
+
+
+class Workflow:
+    __slots__ = ("id", "name", "state", "path", "created_at", "updated_at", "url", "html_url", "badge_url")
+
+    def __init__(self, raw: Dict[str, Any]):
+        get = raw.get
+        self.id = get("id")
+        self.name = get("name")
+        self.state = get("state")
+        self.path = get("path")
+        self.created_at = isoformat(get("created_at"))
+        self.updated_at = isoformat(get("updated_at"))
+        self.url = get("url")
+        self.html_url = get("html_url")
+        self.badge_url = get("badge_url")
+
+    def payload(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "state": self.state,
+            "path": self.path,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "url": self.url,
+            "html_url": self.html_url,
+            "badge_url": self.badge_url,
+        }
@@ -0,0 +1,50 @@
+"""
+Cursor/page + limit pagination shared by the list endpoints.
+
+Cursors are opaque to clients; today they encode an offset into the result.
+"""
+import base64
+from typing import Optional
+
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        kind, offset = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":", 1)
+        if kind == "o" and int(offset) >= 0:
+            return int(offset)
+    except (ValueError, UnicodeDecodeError):
+        pass
+    raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_limit(limit: Optional[int], default: Optional[int] = DEFAULT_PAGE_SIZE,
+               maximum: int = MAX_PAGE_SIZE) -> Optional[int]:
+    if limit is None:
+        return default
+    if not 1 <= limit <= maximum:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {maximum}")
+    return limit
+
+
+def page_start(cursor: Optional[str], page: Optional[int], limit: int) -> int:
+    """Offset of the first item requested by ``cursor`` or 1-based ``page``"""
+    if cursor:
+        return decode_cursor(cursor)
+    if page is not None:
+        if page < 1:
+            raise HTTPException(status_code=400, detail="page must be at least 1")
+        return (page - 1) * limit
+    return 0
+
+
+def next_cursor(end: int, total: int) -> Optional[str]:
+    return encode_cursor(end) if end < total else None
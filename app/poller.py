@@ -0,0 +1,650 @@
+"""
+Background refresh of tracked repositories into an in-memory snapshot store.
+
+Instead of every open browser polling GitHub on its own timer, one poller
+refreshes each tracked repository on an adaptive interval: repositories
+with queued or in-progress runs are refreshed quickly, idle ones back off
+exponentially. API requests are answered from the latest snapshot, so GitHub
+call volume grows with the number of repositories, not the number of viewers.
+
+With several workers only one of them polls (see :mod:`app.workers`); it
+publishes its snapshots to the shared store and the others mirror them,
+record which repositories they are asked for and hand webhook runs over.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app.config import env_float
+from app.github_data import load_dashboard, run_github
+from app.ratelimit import background_priority, rate_limiter
+from app.shared import SharedStore
+
+logger = logging.getLogger(__name__)
+
+
+# Refresh interval for repositories with queued or running workflow runs
+POLL_ACTIVE_INTERVAL = env_float("POLL_ACTIVE_INTERVAL", 15)
+# Interval right after an idle repository changed; doubles while nothing changes
+POLL_IDLE_INTERVAL = env_float("POLL_IDLE_INTERVAL", 60)
+POLL_MAX_INTERVAL = env_float("POLL_MAX_INTERVAL", 600)
+# Repositories nobody asked for in this long stop being polled (added repos never expire)
+POLL_TRACK_TTL = env_float("POLL_TRACK_TTL", 3600)
+# Interval for repositories that receive webhooks; polling then only reconciles missed events
+POLL_RECONCILE_INTERVAL = env_float("POLL_RECONCILE_INTERVAL", 300)
+# Repositories refreshed at once in the background, leaving worker threads for interactive requests
+POLL_CONCURRENCY = max(int(env_float("POLL_CONCURRENCY", 4)), 1)
+
+ACTIVE_STATUSES = {"queued", "in_progress", "waiting", "requested", "pending"}
+
+# Undelivered events buffered per stream subscriber before it is told to resync
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Shared store keys: published snapshots, repositories requested from any worker
+# and webhook runs handed to the polling worker
+SNAPSHOT_PREFIX = "snapshot:"
+# Version and refresh time of each published snapshot, so followers only fetch the ones that changed
+VERSION_PREFIX = "version:"
+INTEREST_PREFIX = "interest:"
+RUNS_CHANNEL = "runs"
+# Seconds between interest updates of one repository from a mirroring worker
+INTEREST_INTERVAL = 60
+
+
+def _is_active(data: Optional[Mapping[str, Any]]) -> bool:
+    if not data:
+        return False
+    for workflow in data.get("workflows") or []:
+        runs = workflow.get("recent_runs") or [workflow.get("latest_run")]
+        if any(run and run.get("status") in ACTIVE_STATUSES for run in runs):
+            return True
+    return False
+
+
+def _is_newer(run: Mapping[str, Any], current: Optional[Mapping[str, Any]]) -> bool:
+    """Whether ``run`` should replace ``current`` as a workflow's latest run"""
+    if current is None:
+        return True
+    if run.get("id") == current.get("id"):
+        # Webhooks can arrive out of order; never go back to an older state
+        return (run.get("updated_at") or "") >= (current.get("updated_at") or "")
+    return (run.get("created_at") or "") >= (current.get("created_at") or "")
+
+
+def snapshot_changes(old: Optional[Mapping[str, Any]], new: Mapping[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Per-workflow differences between two snapshots of a repository.
+
+    Returns None when the difference can't be expressed as deltas (first
+    snapshot, the repository started/stopped failing or its data became
+    stale/fresh) and the whole snapshot should be sent instead.
+    """
+    if old is None or old.get("error") or new.get("error") or old.get("stale") != new.get("stale"):
+        return None
+    old_workflows = {w["id"]: w for w in old.get("workflows") or []}
+    new_workflows = {w["id"]: w for w in new.get("workflows") or []}
+
+    changes: List[Dict[str, Any]] = [
+        {"type": "workflow_removed", "workflow_id": workflow_id}
+        for workflow_id in old_workflows.keys() - new_workflows.keys()
+    ]
+    for workflow_id, workflow in new_workflows.items():
+        previous = old_workflows.get(workflow_id)
+        if previous is None:
+            changes.append({"type": "workflow_added", "workflow": workflow})
+        elif previous != workflow:
+            run, previous_run = workflow.get("latest_run"), previous.get("latest_run")
+            if {**previous, "latest_run": run} != workflow or run is None:
+                changes.append({"type": "workflow_updated", "workflow": workflow})
+            else:
+                is_new = previous_run is None or previous_run.get("id") != run.get("id")
+                changes.append({
+                    "type": "run_added" if is_new else "run_updated",
+                    "workflow_id": workflow_id,
+                    "run": run,
+                })
+    return changes
+
+
+class Subscriber:
+    """Event queue of one stream client, limited to the repositories it watches"""
+
+    __slots__ = ("keys", "queue", "loop")
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = set(keys)
+        self.queue: "asyncio.Queue" = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.loop = asyncio.get_running_loop()
+
+    def send(self, event: str, data: Any):
+        """Queue an event; webhooks applied on the worker pool hand it over to the stream's loop"""
+        try:
+            on_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._put(event, data)
+        else:
+            self.loop.call_soon_threadsafe(self._put, event, data)
+
+    def _put(self, event: str, data: Any):
+        try:
+            self.queue.put_nowait((event, data))
+        except asyncio.QueueFull:
+            # Too far behind to catch up with deltas: drop them and resend everything
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(("resync", None))
+
+
+class RepoSnapshot:
+    """Latest known status of one repository plus its refresh schedule"""
+
+    __slots__ = ("owner", "name", "data", "version", "refreshed_at", "interval",
+                 "next_refresh", "last_requested", "pinned", "errors", "webhook_at", "interest_at")
+
+    def __init__(self, owner: str, name: str, pinned: bool = False):
+        self.owner = owner
+        self.name = name
+        self.data: Optional[Dict[str, Any]] = None
+        self.version = 0
+        self.refreshed_at: Optional[datetime] = None
+        self.interval = POLL_IDLE_INTERVAL
+        self.next_refresh = 0.0
+        self.last_requested = time.monotonic()
+        self.pinned = pinned
+        self.errors = 0
+        self.webhook_at: Optional[float] = None
+        # When a mirroring worker last told the polling one about requests for it
+        self.interest_at: Optional[float] = None
+
+    @property
+    def key(self) -> str:
+        return SnapshotStore.key(self.owner, self.name)
+
+    def payload(self) -> Dict[str, Any]:
+        data = self.data or {
+            "owner": self.owner, "name": self.name, "full_name": f"{self.owner}/{self.name}",
+            "workflows": [], "error": None,
+        }
+        return {
+            **data,
+            "version": self.version,
+            "refreshed_at": self.refreshed_at.isoformat() if self.refreshed_at else None,
+        }
+
+
+class SnapshotStore:
+    """Tracked repositories and their most recent snapshots"""
+
+    def __init__(self):
+        self._snapshots: Dict[str, RepoSnapshot] = {}
+        self._subscribers: List[Subscriber] = []
+        self.refreshes = 0
+        self.changes = 0
+        self.events = 0
+
+    @staticmethod
+    def key(owner: str, name: str) -> str:
+        return f"{owner}/{name}".lower()
+
+    def get(self, owner: str, name: str) -> Optional[RepoSnapshot]:
+        return self._snapshots.get(self.key(owner, name))
+
+    def track(self, owner: str, name: str, pinned: bool = False) -> RepoSnapshot:
+        """Start (or keep) polling a repository and mark it as recently requested"""
+        key = self.key(owner, name)
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            snapshot = self._snapshots[key] = RepoSnapshot(owner, name, pinned)
+        snapshot.last_requested = time.monotonic()
+        snapshot.pinned = snapshot.pinned or pinned
+        return snapshot
+
+    def update(self, snapshot: RepoSnapshot, data: Dict[str, Any]) -> bool:
+        """Store a fresh result; returns whether anything changed since the last one"""
+        self.refreshes += 1
+        snapshot.refreshed_at = datetime.now(timezone.utc)
+        changed = data != snapshot.data
+        if changed:
+            previous, snapshot.data = snapshot.data, data
+            snapshot.version += 1
+            self.changes += 1
+            self._publish(snapshot, previous)
+        return changed
+
+    def mirror(self, snapshot: RepoSnapshot, payload: Mapping[str, Any]) -> bool:
+        """Adopt a snapshot published by the polling worker; returns whether its data changed"""
+        if payload["version"] < snapshot.version:
+            return False
+        refreshed_at = payload.get("refreshed_at")
+        snapshot.refreshed_at = datetime.fromisoformat(refreshed_at) if refreshed_at else None
+        if payload["version"] == snapshot.version:
+            # Refreshed without changes
+            return False
+        previous = snapshot.data
+        snapshot.data = {k: v for k, v in payload.items() if k not in ("version", "refreshed_at")}
+        snapshot.version = payload["version"]
+        self.changes += 1
+        self._publish(snapshot, previous)
+        return True
+
+    def subscribe(self, keys: Iterable[str]) -> Subscriber:
+        subscriber = Subscriber(keys)
+        self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        if subscriber in self._subscribers:
+            self._subscribers.remove(subscriber)
+
+    def _publish(self, snapshot: RepoSnapshot, previous: Optional[Dict[str, Any]]):
+        subscribers = [s for s in self._subscribers if snapshot.key in s.keys]
+        if not subscribers:
+            return
+        changes = snapshot_changes(previous, snapshot.data)
+        if changes is None:
+            event, data = "snapshot", snapshot.payload()
+        elif changes:
+            event, data = "delta", {
+                "owner": snapshot.owner,
+                "name": snapshot.name,
+                "version": snapshot.version,
+                "refreshed_at": snapshot.refreshed_at.isoformat(),
+                "changes": changes,
+            }
+        else:
+            return
+        for subscriber in subscribers:
+            subscriber.send(event, data)
+        self.events += len(subscribers)
+
+    def due(self, now: float) -> List[RepoSnapshot]:
+        return [s for s in self._snapshots.values() if s.next_refresh <= now]
+
+    def next_due(self) -> Optional[float]:
+        return min((s.next_refresh for s in self._snapshots.values()), default=None)
+
+    def expire(self, now: float) -> int:
+        expired = [
+            key for key, s in self._snapshots.items()
+            if not s.pinned and now - s.last_requested > POLL_TRACK_TTL
+        ]
+        for key in expired:
+            del self._snapshots[key]
+        return len(expired)
+
+    def __iter__(self):
+        return iter(list(self._snapshots.values()))
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+
+class Poller:
+    """Refreshes the snapshot store in the background on adaptive intervals"""
+
+    def __init__(self, store: SnapshotStore):
+        self.store = store
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        # Set when workers share state; while mirroring, another worker polls
+        self.shared: Optional[SharedStore] = None
+        self.mirroring = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def role(self) -> str:
+        """``single`` without shared state, else ``leader`` (polls) or ``follower`` (mirrors)"""
+        if self.shared is None:
+            return "single"
+        return "follower" if self.mirroring else "leader"
+
+    def start(self):
+        if self.running:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="github-poller")
+        logger.info("Background poller started")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Background poller stopped")
+
+    def track(self, owner: str, name: str, pinned: bool = False) -> RepoSnapshot:
+        snapshot = self.store.track(owner, name, pinned)
+        if self.mirroring:
+            self._note_interest(snapshot)
+        elif snapshot.data is None and self._wake is not None:
+            self._wake.set()
+        return snapshot
+
+    def _note_interest(self, snapshot: RepoSnapshot):
+        """Tell the polling worker a repository is being requested, at most once per INTEREST_INTERVAL"""
+        now = time.monotonic()
+        if snapshot.interest_at is not None and now - snapshot.interest_at < INTEREST_INTERVAL:
+            return
+        snapshot.interest_at = now
+        try:
+            self.shared.set(f"{INTEREST_PREFIX}{snapshot.key}",
+                            {"owner": snapshot.owner, "name": snapshot.name, "at": time.time()},
+                            ttl=POLL_TRACK_TTL)
+        except Exception as e:
+            logger.warning(f"Could not share interest in {snapshot.key}: {str(e)}")
+
+    def restore(self, owner: str, name: str, data: Dict[str, Any], pinned: bool = False) -> RepoSnapshot:
+        """
+        Track a repository starting from persisted data, so it is served right
+        away; it is still refreshed as soon as the poller runs.
+        """
+        snapshot = self.store.track(owner, name, pinned)
+        if snapshot.data is None:
+            snapshot.data = data
+            snapshot.version += 1
+        return snapshot
+
+    def untrack(self, owner: str, name: str):
+        """Stop keeping a repository polled; it expires once nobody requests it"""
+        snapshot = self.store.get(owner, name)
+        if snapshot is not None:
+            snapshot.pinned = False
+
+    def _schedule(self, snapshot: RepoSnapshot, changed: bool, failed: bool):
+        if failed:
+            snapshot.errors += 1
+            snapshot.interval = min(POLL_IDLE_INTERVAL * 2 ** min(snapshot.errors, 10), POLL_MAX_INTERVAL)
+        elif _is_active(snapshot.data):
+            snapshot.errors = 0
+            snapshot.interval = POLL_ACTIVE_INTERVAL
+        elif changed:
+            snapshot.errors = 0
+            snapshot.interval = POLL_IDLE_INTERVAL
+        else:
+            snapshot.errors = 0
+            snapshot.interval = min(max(snapshot.interval, POLL_IDLE_INTERVAL / 2) * 2, POLL_MAX_INTERVAL)
+        if not failed:
+            # Spread background work out as the rate-limit budget runs down
+            snapshot.interval = min(snapshot.interval * rate_limiter.background_scale(), POLL_MAX_INTERVAL)
+        if snapshot.webhook_at is not None and time.monotonic() - snapshot.webhook_at < 2 * POLL_RECONCILE_INTERVAL:
+            snapshot.interval = max(snapshot.interval, POLL_RECONCILE_INTERVAL)
+        snapshot.next_refresh = time.monotonic() + snapshot.interval
+
+    def _share(self, snapshot: RepoSnapshot):
+        """
+        Publish a snapshot to the other workers. Mirroring workers only seed
+        repositories the polling worker has no snapshot of yet.
+        """
+        if self.shared is None:
+            return
+        key = f"{SNAPSHOT_PREFIX}{snapshot.key}"
+        payload = snapshot.payload()
+        try:
+            if not self.mirroring:
+                self.shared.set(key, payload, ttl=2 * POLL_TRACK_TTL)
+            elif not self.shared.add(key, payload, ttl=2 * POLL_TRACK_TTL):
+                # The polling worker got there first: its version wins
+                snapshot.version = 0
+                self.mirror([snapshot])
+                return
+            self.shared.set(f"{VERSION_PREFIX}{snapshot.key}",
+                            {"version": payload["version"], "refreshed_at": payload["refreshed_at"]},
+                            ttl=2 * POLL_TRACK_TTL)
+        except Exception as e:
+            logger.warning(f"Could not share snapshot of {snapshot.key}: {str(e)}")
+
+    def _published(self, versions: Mapping[str, int]) -> Dict[str, Mapping[str, Any]]:
+        """
+        Blocking: what the polling worker published for the snapshots with
+        ``versions``. Only newer versions are read in full; for the others the
+        version entry (with its refresh time) stands in.
+        """
+        index = self.shared.scan(VERSION_PREFIX)
+        published: Dict[str, Mapping[str, Any]] = {}
+        for key, version in versions.items():
+            entry = index.get(f"{VERSION_PREFIX}{key}")
+            if entry is None:
+                continue
+            if entry["version"] > version:
+                payload = self.shared.get(f"{SNAPSHOT_PREFIX}{key}")
+                if payload is not None:
+                    published[key] = payload
+            else:
+                published[key] = entry
+        return published
+
+    def _mirror(self, snapshots: List[RepoSnapshot], published: Mapping[str, Mapping[str, Any]]) -> int:
+        mirrored = 0
+        for snapshot in snapshots:
+            payload = published.get(snapshot.key)
+            if payload is not None and self.store.mirror(snapshot, payload):
+                mirrored += 1
+        return mirrored
+
+    def mirror(self, snapshots: Optional[Iterable[RepoSnapshot]] = None) -> int:
+        """
+        Bring local snapshots (all of them by default) up to the versions the
+        polling worker published; returns how many changed.
+        """
+        if self.shared is None:
+            return 0
+        snapshots = list(self.store if snapshots is None else snapshots)
+        return self._mirror(snapshots, self._published({s.key: s.version for s in snapshots}))
+
+    async def mirror_shared(self, snapshots: Optional[Iterable[RepoSnapshot]] = None) -> int:
+        """:meth:`mirror`, reading the shared store on the worker pool"""
+        if self.shared is None:
+            return 0
+        snapshots = list(self.store if snapshots is None else snapshots)
+        published = await run_github(self._published, {s.key: s.version for s in snapshots})
+        return self._mirror(snapshots, published)
+
+    def read_shared(self, list_pinned: Callable[[], List[Dict[str, str]]]) -> Tuple[Any, ...]:
+        """
+        Blocking, for :meth:`adopt`: the repositories on the dashboard, those
+        requested from other workers and the webhook runs they handed over.
+        """
+        return list_pinned(), self.shared.scan(INTEREST_PREFIX), self.shared.pop_all(RUNS_CHANNEL)
+
+    async def adopt(self, pinned_repos: Iterable[Mapping[str, str]], interest: Mapping[str, Any],
+                    runs: Iterable[Mapping[str, Any]]):
+        """
+        Polling worker: take over repositories added to the dashboard and those
+        requested from other workers, and apply the webhook runs they handed
+        over, as :meth:`read_shared` returned them.
+        """
+        pinned = {SnapshotStore.key(r["owner"], r["name"]): r for r in pinned_repos}
+        requested = {key[len(INTEREST_PREFIX):]: value for key, value in interest.items()}
+        now, wall = time.monotonic(), time.time()
+        added: Dict[str, RepoSnapshot] = {}
+        for key, repo in {**requested, **pinned}.items():
+            # Monotonic equivalent of the other worker's wall-clock request time
+            requested_at = now - max(wall - requested[key]["at"], 0.0) if key in requested else None
+            if key not in pinned and now - requested_at > POLL_TRACK_TTL:
+                continue
+            snapshot = self.store.get(repo["owner"], repo["name"])
+            if snapshot is None:
+                snapshot = added[key] = self.store.track(repo["owner"], repo["name"])
+            if requested_at is not None and (key in added or requested_at > snapshot.last_requested):
+                snapshot.last_requested = requested_at
+        for snapshot in self.store:
+            snapshot.pinned = snapshot.key in pinned
+        if added:
+            # Start from what other workers already fetched
+            await self.mirror_shared(added.values())
+            if self._wake is not None:
+                self._wake.set()
+        for message in runs:
+            self.apply_run(message["owner"], message["name"], message["workflow"], message["run"])
+
+    def find_run(self, owner: str, name: str, run_id: int) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """The (workflow, latest run) pair in a snapshot whose latest run is ``run_id``"""
+        snapshot = self.store.get(owner, name)
+        if snapshot is None or not snapshot.data:
+            return None
+        for workflow in snapshot.data.get("workflows") or []:
+            run = workflow.get("latest_run")
+            if run and run.get("id") == run_id:
+                return workflow, run
+        return None
+
+    def apply_run(self, owner: str, name: str, workflow: Mapping[str, Any], run: Dict[str, Any]) -> bool:
+        """
+        Merge a run received from a webhook into a tracked repository's snapshot.
+
+        ``workflow`` only needs the fields of a snapshot workflow for workflows
+        not seen yet. Returns whether the snapshot changed; mirroring workers
+        hand the run to the polling worker and return False.
+        """
+        if self.mirroring:
+            self.shared.push(RUNS_CHANNEL, {"owner": owner, "name": name, "workflow": dict(workflow), "run": run})
+            return False
+        snapshot = self.store.get(owner, name)
+        if snapshot is None or not snapshot.data or snapshot.data.get("error"):
+            return False
+        workflows, found = [], False
+        for current in snapshot.data.get("workflows") or []:
+            if current["id"] == workflow["id"]:
+                found = True
+                if _is_newer(run, current.get("latest_run")):
+                    current = {**current, "latest_run": run}
+            workflows.append(current)
+        if not found:
+            workflows.append({**workflow, "latest_run": run})
+
+        # A webhook is as good as a refresh, so push the next poll back
+        snapshot.webhook_at = time.monotonic()
+        snapshot.interval = max(snapshot.interval, POLL_RECONCILE_INTERVAL)
+        snapshot.next_refresh = max(snapshot.next_refresh, snapshot.webhook_at + POLL_RECONCILE_INTERVAL)
+        changed = self.store.update(snapshot, {**snapshot.data, "workflows": workflows})
+        if changed:
+            self._share(snapshot)
+        return changed
+
+    async def refresh(self, snapshots: Iterable[RepoSnapshot], background: bool = False):
+        """Fetch the given repositories now and update their snapshots"""
+        snapshots = list(snapshots)
+        if not snapshots:
+            return
+        repos = [{"owner": s.owner, "name": s.name} for s in snapshots]
+        if background:
+            with background_priority():
+                results = await load_dashboard(repos, concurrency=POLL_CONCURRENCY)
+        else:
+            results = await load_dashboard(repos)
+        for snapshot, data in zip(snapshots, results):
+            failed = bool(data.get("error"))
+            if failed and snapshot.data is not None and not snapshot.data.get("error"):
+                # Keep serving the last good snapshot through transient errors, flagged as stale
+                self.store.update(snapshot, {**snapshot.data, "stale": True})
+                changed = False
+            else:
+                changed = self.store.update(snapshot, data)
+            self._schedule(snapshot, changed, failed)
+            # Every refresh, not only changes, so followers see refreshed_at move
+            self._share(snapshot)
+
+    def _defer(self, snapshots: List[RepoSnapshot], now: float) -> List[RepoSnapshot]:
+        """Push due refreshes past the rate-limit reset while the budget is reserved"""
+        if not snapshots or rate_limiter.background_allowed():
+            return snapshots
+        delay = max(rate_limiter.seconds_until_reset(), 1.0)
+        for snapshot in snapshots:
+            snapshot.next_refresh = now + delay
+        logger.warning(f"Deferring {len(snapshots)} background refreshes for {round(delay)}s (rate limit budget low)")
+        return []
+
+    async def snapshots(self, repos: Iterable[Mapping[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Snapshots for the requested repositories, tracking any new ones.
+
+        Repositories without a snapshot yet are fetched immediately; when
+        nobody polls in the background, stale snapshots are refreshed inline.
+        """
+        tracked: Dict[str, RepoSnapshot] = {}
+        for repo in repos:
+            snapshot = self.track(repo["owner"], repo["name"])
+            tracked.setdefault(snapshot.key, snapshot)
+        if self.shared is not None:
+            # Another worker may have fetched them already
+            self.mirror([s for s in tracked.values() if s.data is None])
+        now = time.monotonic()
+        pending = [
+            s for s in tracked.values()
+            if s.data is None or (not self.running and not self.mirroring and s.next_refresh <= now)
+        ]
+        await self.refresh(pending)
+        return [s.payload() for s in tracked.values()]
+
+    async def _run(self):
+        while True:
+            try:
+                now = time.monotonic()
+                expired = self.store.expire(now)
+                if expired:
+                    logger.info(f"Stopped polling {expired} repositories nobody requested recently")
+                await self.refresh(self._defer(self.store.due(now), now), background=True)
+            except Exception as e:
+                logger.error(f"Error in background poller: {str(e)}")
+
+            next_due = self.store.next_due()
+            timeout = POLL_MAX_INTERVAL if next_due is None else next_due - time.monotonic()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=min(max(timeout, 1.0), POLL_MAX_INTERVAL))
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def lag(self) -> Optional[float]:
+        """Seconds the most overdue repository is past its refresh time; None while stopped"""
+        if not self.running:
+            return None
+        next_due = self.store.next_due()
+        return 0.0 if next_due is None else max(time.monotonic() - next_due, 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "running": self.running,
+            "role": self.role,
+            "tracked": len(self.store),
+            "refreshes": self.store.refreshes,
+            "changes": self.store.changes,
+            "subscribers": len(self.store._subscribers),
+            "events_sent": self.store.events,
+            "intervals": {
+                "active": POLL_ACTIVE_INTERVAL,
+                "idle": POLL_IDLE_INTERVAL,
+                "max": POLL_MAX_INTERVAL,
+                "reconcile": POLL_RECONCILE_INTERVAL,
+                "rate_limit_scale": round(rate_limiter.background_scale(), 2),
+            },
+            "concurrency": POLL_CONCURRENCY,
+            "repos": [
+                {
+                    "repo": f"{s.owner}/{s.name}",
+                    "active": _is_active(s.data),
+                    "interval": s.interval,
+                    "next_refresh_in": round(max(s.next_refresh - now, 0.0), 1),
+                    "version": s.version,
+                    "pinned": s.pinned,
+                    "webhooks": s.webhook_at is not None,
+                    "stale": bool(s.data and s.data.get("stale")),
+                }
+                for s in self.store
+            ],
+        }
+
+
+poller = Poller(SnapshotStore())
@@ -0,0 +1,263 @@
+"""
+GitHub rate-limit budget shared by every outgoing request.
+
+Every response's ``X-RateLimit-*`` headers update the remaining budget of the
+token it was made with; GitHub's count is authoritative over the optimistic
+one-per-request charge, and 304s (which GitHub does not count) are refunded.
+Requests carry a priority: interactive ones (serving a browser) may spend the
+whole budget, background ones (the poller) stop once only the reserved share
+is left and are spaced out further as the budget shrinks. Once the budget is
+exhausted, requests fail fast with :class:`RateLimitExceeded` instead of
+hitting GitHub, so callers can fall back to cached data.
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+# Budget of requests made without a token from the pool
+DEFAULT_ACCOUNT = "default"
+
+# Share of the hourly limit kept for interactive requests
+RATE_LIMIT_RESERVE = float(os.getenv("RATE_LIMIT_RESERVE", "0.2"))
+# Background intervals start stretching once less than this share is left
+RATE_LIMIT_SLOWDOWN = float(os.getenv("RATE_LIMIT_SLOWDOWN", "0.5"))
+MAX_BACKGROUND_SCALE = 10.0
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar("github_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def background_priority():
+    """Mark GitHub calls made in this context (and tasks/threads spawned from it) as background work"""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class RateLimitExceeded(HTTPException):
+    """Raised instead of calling GitHub when the budget does not allow the request"""
+
+    def __init__(self, retry_after: float, reason: str):
+        retry_after = max(int(retry_after) + 1, 1)
+        super().__init__(
+            status_code=503,
+            detail=f"GitHub rate limit {reason}; retry in {retry_after}s",
+            headers={"Retry-After": str(retry_after)},
+        )
+        self.retry_after = retry_after
+
+    def __str__(self) -> str:
+        return self.detail
+
+
+class RateLimitBucket:
+    __slots__ = ("limit", "remaining", "reset", "used")
+
+    def __init__(self, limit: int, remaining: int, reset: float, used: int = 0):
+        self.limit = limit
+        self.remaining = remaining
+        self.reset = reset
+        self.used = used
+
+
+class RateLimiter:
+    """
+    Tracks GitHub's rate-limit buckets and admits requests by priority.
+
+    Each token has its own budget (``account``); background pacing looks at
+    the budgets of all tokens added up.
+    """
+
+    def __init__(self, reserve: float = RATE_LIMIT_RESERVE, slowdown: float = RATE_LIMIT_SLOWDOWN):
+        self.reserve = reserve
+        self.slowdown = slowdown
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, str], RateLimitBucket] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self.calls = {INTERACTIVE: 0, BACKGROUND: 0}
+        self.account_calls: Counter = Counter()
+        self.deferred = 0
+        self.rejected = 0
+
+    def _bucket(self, account: str, resource: str, now: float) -> Optional[RateLimitBucket]:
+        bucket = self._buckets.get((account, resource))
+        if bucket is None or bucket.reset <= now:
+            # Unknown, or the window has reset since we last heard
+            return None
+        return bucket
+
+    def _total(self, resource: str, now: float) -> Optional[RateLimitBucket]:
+        """Budget of every token added up; resets when the first window does"""
+        live = [b for (_, r), b in self._buckets.items() if r == resource and b.reset > now]
+        if not live:
+            return None
+        return RateLimitBucket(
+            limit=sum(b.limit for b in live),
+            remaining=sum(b.remaining for b in live),
+            reset=min(b.reset for b in live),
+            used=sum(b.used for b in live),
+        )
+
+    def _all_blocked_until(self, now: float) -> float:
+        """When the first token comes out of a secondary-limit cool-down, if all of them are in one"""
+        accounts = {account for account, _ in self._buckets} | set(self._blocked_until)
+        until = [self._blocked_until.get(account, 0.0) for account in accounts]
+        return min(until) if until and min(until) > now else 0.0
+
+    def acquire(self, resource: str = "core", account: str = DEFAULT_ACCOUNT):
+        """Admit one request at the current priority or raise RateLimitExceeded"""
+        priority = _priority.get()
+        now = time.time()
+        with self._lock:
+            blocked_until = self._blocked_until.get(account, 0.0)
+            if now < blocked_until:
+                self.rejected += 1
+                raise RateLimitExceeded(blocked_until - now, "cool-down after a secondary limit")
+            bucket = self._bucket(account, resource, now)
+            if bucket is not None:
+                if priority == BACKGROUND and bucket.remaining <= bucket.limit * self.reserve:
+                    self.deferred += 1
+                    raise RateLimitExceeded(bucket.reset - now, "budget reserved for interactive requests")
+                if bucket.remaining <= 0:
+                    self.rejected += 1
+                    raise RateLimitExceeded(bucket.reset - now, "exhausted")
+                # Optimistic until the response reports the real number
+                bucket.remaining -= 1
+            self.calls[priority] += 1
+            self.account_calls[account] += 1
+
+    def update(self, headers: Mapping[str, str], account: str = DEFAULT_ACCOUNT, refund: bool = False):
+        """
+        Record the budget reported by a GitHub response. ``refund`` gives back
+        the optimistic charge of a response GitHub did not count (a 304).
+        """
+        resource = headers.get("X-RateLimit-Resource", "core")
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            if refund:
+                self._refund(account, resource)
+            return
+        try:
+            bucket = RateLimitBucket(
+                limit=int(headers.get("X-RateLimit-Limit", 0)),
+                remaining=int(remaining),
+                reset=float(headers.get("X-RateLimit-Reset", 0)),
+                used=int(headers.get("X-RateLimit-Used", 0)),
+            )
+            retry_after = float(headers.get("Retry-After", 0))
+        except ValueError:
+            return
+        with self._lock:
+            current = self._buckets.get((account, resource))
+            if (current is not None and current.reset == bucket.reset and "X-RateLimit-Used" in headers
+                    and bucket.used < current.used):
+                # Overtaken by a response GitHub counted later; its figures stand
+                bucket = current
+                if refund:
+                    current.remaining = min(current.remaining + 1, current.limit)
+            else:
+                # GitHub's count is authoritative, and drops our optimistic charges
+                self._buckets[(account, resource)] = bucket
+            if retry_after:
+                self._blocked_until[account] = max(self._blocked_until.get(account, 0.0), time.time() + retry_after)
+        if bucket.remaining == 0 or retry_after:
+            logger.warning(f"GitHub {resource} rate limit hit ({account}); resets at {time.ctime(bucket.reset)}")
+
+    def _refund(self, account: str, resource: str):
+        with self._lock:
+            bucket = self._bucket(account, resource, time.time())
+            if bucket is not None:
+                bucket.remaining = min(bucket.remaining + 1, bucket.limit)
+
+    def budget(self, account: str, resource: str = "core") -> float:
+        """Requests a token has left: infinite while unknown, -1 during a cool-down"""
+        now = time.time()
+        with self._lock:
+            if now < self._blocked_until.get(account, 0.0):
+                return -1
+            bucket = self._bucket(account, resource, now)
+            return float("inf") if bucket is None else bucket.remaining
+
+    def background_allowed(self, resource: str = "core") -> bool:
+        now = time.time()
+        with self._lock:
+            if self._all_blocked_until(now):
+                return False
+            bucket = self._total(resource, now)
+            return bucket is None or bucket.remaining > bucket.limit * self.reserve
+
+    def background_scale(self, resource: str = "core") -> float:
+        """Factor to stretch background intervals by as the budget runs down"""
+        with self._lock:
+            bucket = self._total(resource, time.time())
+            if bucket is None or not bucket.limit:
+                return 1.0
+            share = bucket.remaining / bucket.limit
+        if share >= self.slowdown:
+            return 1.0
+        return min(self.slowdown / max(share, 0.001), MAX_BACKGROUND_SCALE)
+
+    def seconds_until_reset(self, resource: str = "core") -> float:
+        now = time.time()
+        with self._lock:
+            bucket = self._total(resource, now)
+            reset = bucket.reset if bucket is not None else now
+            return max(reset, self._all_blocked_until(now)) - now
+
+    @staticmethod
+    def _bucket_stats(bucket: RateLimitBucket, now: float) -> Dict[str, Any]:
+        return {
+            "limit": bucket.limit,
+            "remaining": bucket.remaining,
+            "used": bucket.used,
+            "resets_in": round(max(bucket.reset - now, 0.0)),
+        }
+
+    def account_stats(self, account: str) -> Dict[str, Any]:
+        """Budget and calls of one token"""
+        now = time.time()
+        with self._lock:
+            return {
+                "calls": self.account_calls[account],
+                "buckets": {
+                    resource: self._bucket_stats(b, now)
+                    for (a, resource), b in self._buckets.items() if a == account
+                },
+                "blocked_for": round(max(self._blocked_until.get(account, 0.0) - now, 0.0)),
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            resources = {resource for _, resource in self._buckets}
+            totals = {resource: self._total(resource, now) for resource in resources}
+            buckets = {resource: self._bucket_stats(b, now) for resource, b in totals.items() if b is not None}
+        return {
+            "buckets": buckets,
+            "reserve": self.reserve,
+            "background_allowed": self.background_allowed(),
+            "background_scale": round(self.background_scale(), 2),
+            "calls": dict(self.calls),
+            "deferred": self.deferred,
+            "rejected": self.rejected,
+        }
+
+
+rate_limiter = RateLimiter()
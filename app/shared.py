@@ -0,0 +1,338 @@
+"""
+State shared between worker processes.
+
+With several workers (WEB_CONCURRENCY > 1) every process would otherwise keep
+its own response cache and snapshots and run its own poller. A shared store
+gives them one view: cached GitHub responses, repository snapshots published
+by the single worker that polls, interest in repositories, webhook hand-offs
+and the lease that decides which worker polls.
+
+SHARED_STATE_URL selects the backend: ``sqlite:///path/to/shared.db`` (the
+default with several workers, next to DATABASE_PATH) or ``redis://host:6379/0``
+for any Redis-compatible server (needs the ``redis`` package). Without it, and
+with a single worker, state stays in process as before.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Worker processes started by uvicorn (it reads the same variable)
+WEB_CONCURRENCY = max(int(os.getenv("WEB_CONCURRENCY", "1") or 1), 1)
+
+
+def _default_url() -> str:
+    if WEB_CONCURRENCY <= 1:
+        return ""
+    database = os.getenv("DATABASE_PATH", os.path.join("data", "dashboard.db"))
+    return "sqlite:///" + os.path.join(os.path.dirname(database), "shared.db")
+
+
+SHARED_STATE_URL = os.getenv("SHARED_STATE_URL", _default_url())
+
+
+class SharedStore:
+    """Interface of a cross-process key/value store; values are JSON-serializable"""
+
+    name = "abstract"
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Set ``key`` only if it does not exist; returns whether it was set"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def scan(self, prefix: str) -> Dict[str, Any]:
+        """All live entries whose key starts with ``prefix``"""
+        raise NotImplementedError
+
+    def push(self, channel: str, value: Any):
+        """Append a message to a queue consumed with :meth:`pop_all`"""
+        raise NotImplementedError
+
+    def pop_all(self, channel: str) -> List[Any]:
+        """Remove and return every queued message, oldest first"""
+        raise NotImplementedError
+
+    def lease(self, name: str, holder: str, ttl: float) -> bool:
+        """Acquire or renew a lease; False while another holder's lease is live"""
+        raise NotImplementedError
+
+    def release(self, name: str, holder: str):
+        raise NotImplementedError
+
+    def purge(self):
+        """Drop expired entries, for backends that don't expire them on their own"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+    def close(self):
+        pass
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _prefix_end(prefix: str) -> str:
+    """Smallest string greater than every string starting with ``prefix``"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class SQLiteSharedStore(SharedStore):
+    """Shared state in a SQLite file (WAL mode), for workers on the same host"""
+
+    name = "sqlite"
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL);
+    CREATE TABLE IF NOT EXISTS messages (id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL,
+                                         value TEXT NOT NULL);
+    CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires REAL NOT NULL);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=10000")
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(self.SCHEMA)
+                    self._initialized = True
+                    logger.info(f"Shared state database ready at {self.path}")
+        self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _expires(ttl: Optional[float]) -> Optional[float]:
+        return None if ttl is None else time.time() + ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._connect().execute(
+            "SELECT value FROM entries WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, time.time())
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._connect().execute(
+            "INSERT INTO entries (key, value, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires",
+            (key, _dumps(value), self._expires(ttl)),
+        )
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        cursor = self._connect().execute(
+            "INSERT INTO entries (key, value, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires "
+            "WHERE entries.expires IS NOT NULL AND entries.expires <= ?",
+            (key, _dumps(value), self._expires(ttl), time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key: str):
+        self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def scan(self, prefix: str) -> Dict[str, Any]:
+        rows = self._connect().execute(
+            "SELECT key, value FROM entries WHERE key >= ? AND key < ? AND (expires IS NULL OR expires > ?)",
+            (prefix, _prefix_end(prefix), time.time()),
+        )
+        return {key: json.loads(value) for key, value in rows}
+
+    def push(self, channel: str, value: Any):
+        self._connect().execute("INSERT INTO messages (channel, value) VALUES (?, ?)", (channel, _dumps(value)))
+
+    def pop_all(self, channel: str) -> List[Any]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT id, value FROM messages WHERE channel = ? ORDER BY id", (channel,)).fetchall()
+            if rows:
+                conn.execute("DELETE FROM messages WHERE channel = ? AND id <= ?", (channel, rows[-1][0]))
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return [json.loads(value) for _, value in rows]
+
+    def lease(self, name: str, holder: str, ttl: float) -> bool:
+        now = time.time()
+        cursor = self._connect().execute(
+            "INSERT INTO leases (name, holder, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, expires = excluded.expires "
+            "WHERE leases.holder = excluded.holder OR leases.expires <= ?",
+            (name, holder, now + ttl, now),
+        )
+        return cursor.rowcount > 0
+
+    def release(self, name: str, holder: str):
+        self._connect().execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+
+    def purge(self):
+        self._connect().execute("DELETE FROM entries WHERE expires <= ?", (time.time(),))
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connect()
+        size = sum(os.path.getsize(path) for path in (self.path, f"{self.path}-wal") if os.path.exists(path))
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "bytes": size,
+            "entries": conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0],
+        }
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RedisSharedStore(SharedStore):
+    """Shared state in a Redis-compatible server, which also works across hosts"""
+
+    name = "redis"
+    PREFIX = "dashboard:"
+
+    # Renew our own lease, or take it if nobody holds it
+    LEASE_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('pexpire', KEYS[1], ARGV[2])
+    end
+    if redis.call('set', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+        return 1
+    end
+    return 0
+    """
+    RELEASE_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(f"SHARED_STATE_URL={url} needs the redis package (pip install redis)") from e
+        self.url = url
+        self._redis = redis.Redis.from_url(url)
+        self._lease = self._redis.register_script(self.LEASE_SCRIPT)
+        self._release = self._redis.register_script(self.RELEASE_SCRIPT)
+
+    def _key(self, key: str) -> str:
+        return self.PREFIX + key
+
+    @staticmethod
+    def _px(ttl: Optional[float]) -> Optional[int]:
+        return None if ttl is None else max(int(ttl * 1000), 1)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._redis.get(self._key(key))
+        return None if value is None else json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._redis.set(self._key(key), _dumps(value), px=self._px(ttl))
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        return bool(self._redis.set(self._key(key), _dumps(value), px=self._px(ttl), nx=True))
+
+    def delete(self, key: str):
+        self._redis.delete(self._key(key))
+
+    def scan(self, prefix: str) -> Dict[str, Any]:
+        keys = list(self._redis.scan_iter(match=self._key(prefix) + "*", count=500))
+        if not keys:
+            return {}
+        values = self._redis.mget(keys)
+        return {
+            key.decode()[len(self.PREFIX):]: json.loads(value)
+            for key, value in zip(keys, values) if value is not None
+        }
+
+    def push(self, channel: str, value: Any):
+        self._redis.rpush(self._key(f"queue:{channel}"), _dumps(value))
+
+    def pop_all(self, channel: str) -> List[Any]:
+        key = self._key(f"queue:{channel}")
+        pipe = self._redis.pipeline()
+        pipe.lrange(key, 0, -1)
+        pipe.delete(key)
+        values, _ = pipe.execute()
+        return [json.loads(value) for value in values]
+
+    def lease(self, name: str, holder: str, ttl: float) -> bool:
+        return bool(self._lease(keys=[self._key(f"lease:{name}")], args=[holder, self._px(ttl)]))
+
+    def release(self, name: str, holder: str):
+        self._release(keys=[self._key(f"lease:{name}")], args=[holder])
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "url": self.url}
+
+    def close(self):
+        self._redis.close()
+
+
+def open_store(url: str) -> Optional[SharedStore]:
+    if not url:
+        return None
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSharedStore(url)
+    # sqlite:///relative/path or sqlite:////absolute/path, like SQLAlchemy URLs
+    if url.startswith("sqlite:///"):
+        return SQLiteSharedStore(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported SHARED_STATE_URL: {url}")
+
+
+_store: Optional[SharedStore] = None
+_opened = False
+_lock = threading.Lock()
+
+
+def shared_store() -> Optional[SharedStore]:
+    """The configured shared store, None when state stays in process"""
+    global _store, _opened
+    if not _opened:
+        with _lock:
+            if not _opened:
+                _store = open_store(SHARED_STATE_URL)
+                if _store is not None:
+                    logger.info(f"Sharing state between {WEB_CONCURRENCY} workers through {_store.name}")
+                _opened = True
+    return _store
+
+
+def set_shared_store(store: Optional[SharedStore]):
+    global _store, _opened
+    with _lock:
+        _store = store
+        _opened = True
@@ -0,0 +1,151 @@
+"""
+Single-flight coalescing of identical in-flight GitHub fetches.
+
+When several requests ask for the same resource at the same moment (a few
+tabs opening the dashboard, every client refreshing once a cached response
+expires), only the first one - the leader - does the work; the others wait
+for it and get the same result, or the same exception. Nothing is kept once
+the call completes: caching is the response cache's job, this only flattens
+the herd while a fetch is running.
+
+:class:`SingleFlight` is for blocking code on the worker pool (cache misses),
+:class:`AsyncSingleFlight` for coroutines (whole endpoint results), where
+waiting does not hold a worker thread.
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Stats:
+    """Calls, coalesced waiters and the peak number waiting on one call"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        # Calls that did the work
+        self.executions = 0
+        # Calls that waited for another's result instead of fetching
+        self.coalesced = 0
+        self.waiting = 0
+        self.max_waiters = 0
+
+    def _joined(self, waiters: int):
+        """Under the lock: one more call is waiting on a call with ``waiters`` waiters"""
+        self.coalesced += 1
+        self.waiting += 1
+        self.max_waiters = max(self.max_waiters, waiters)
+
+    def _left(self):
+        with self._lock:
+            self.waiting -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.executions + self.coalesced
+        return {
+            "name": self.name,
+            "in_flight": len(self._calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "waiting": self.waiting,
+            "max_waiters": self.max_waiters,
+            "coalesced_ratio": round(self.coalesced / calls, 3) if calls else None,
+        }
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight(_Stats):
+    """Coalesce concurrent blocking calls with the same key"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                call.waiters += 1
+                self._joined(call.waiters)
+        if not leader:
+            try:
+                call.done.wait()
+            finally:
+                self._left()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+
+class AsyncSingleFlight(_Stats):
+    """
+    Coalesce concurrent coroutines with the same key.
+
+    The work runs as a task of its own, so a leader whose client goes away
+    does not cancel it for the requests waiting on it.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._calls: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self._waiters: Dict[Hashable, int] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            with self._lock:
+                self.executions += 1
+            task = self._calls[key] = asyncio.ensure_future(func())
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done: self._finished(key, done))
+            return await asyncio.shield(task)
+        with self._lock:
+            self._waiters[key] += 1
+            self._joined(self._waiters[key])
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._left()
+
+    def _finished(self, key: Hashable, task: "asyncio.Task[Any]"):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._waiters[key]
+        # Retrieved here so an error nobody is left waiting for is not reported as unhandled
+        if not task.cancelled():
+            task.exception()
+
+
+# Cache misses of single GitHub resources
+github_flight = SingleFlight("github")
+# Whole endpoint results (/api/workflows, /api/runs)
+endpoint_flight = AsyncSingleFlight("endpoints")
+
+
+def flight_stats() -> List[Dict[str, Any]]:
+    return [github_flight.stats(), endpoint_flight.stats()]
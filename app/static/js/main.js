@@ -36,7 +36,7 @@ async function loadMyRepos() {
     
     try {
         console.log('Making API request to /api/my-repos...');
-        const response = await fetch('/api/my-repos');
+        const response = await fetch('/api/my-repos?limit=200');
         console.log('API response status:', response.status);
         
         if (!response.ok) {
@@ -282,10 +282,16 @@ function startPolling() {
     // Initial load
     refreshAllWorkflows(true);
     
+    // Prefer updates pushed by the server; poll only without EventSource support
+    if (startLiveUpdates()) {
+        return;
+    }
+    
     // Set up polling with error handling
     pollingIntervalId = setInterval(async () => {
         try {
-            await refreshAllWorkflows(false);
+            // Served from the server's snapshot store, so this no longer hits GitHub
+            await refreshAllWorkflows(false, true);
         } catch (error) {
             console.error('Polling error:', error);
             // Reset on error to prevent cascading failures
@@ -297,6 +303,7 @@ function startPolling() {
 
 // Stop polling
 function stopPolling() {
+    stopLiveUpdates();
     if (pollingIntervalId) {
         clearInterval(pollingIntervalId);
         pollingIntervalId = null;
@@ -384,6 +391,20 @@ function getSavedRepos() {
     return JSON.parse(localStorage.getItem('addedRepos') || '[]');
 }
 
+// Register a repository with the server so it keeps its history and is polled across restarts
+function persistRepo(owner, name) {
+    fetch('/api/repos/add', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ owner, name })
+    }).catch(error => console.warn(`Could not save ${owner}/${name} on the server:`, error));
+}
+
+function forgetRepo(owner, name) {
+    fetch(`/api/repos/${encodeURIComponent(owner)}/${encodeURIComponent(name)}`, { method: 'DELETE' })
+        .catch(error => console.warn(`Could not remove ${owner}/${name} on the server:`, error));
+}
+
 function updateReposList(repos) {
     const repoList = document.getElementById('repoList');
     const noReposMessage = document.getElementById('noReposMessage');
@@ -492,6 +513,8 @@ function removeRepository(owner, repoName) {
         
         // Update the saved repositories
         localStorage.setItem('addedRepos', JSON.stringify(updatedRepos));
+        forgetRepo(owner, repoName);
+        startLiveUpdates();
         
         // Update the active state in the sidebar
         const repoButtons = document.querySelectorAll('#repoList .list-group-item');
@@ -504,6 +527,195 @@ function removeRepository(owner, repoName) {
     }
 }
 
+// Fetch the latest run of every workflow for several repositories in one request
+async function fetchDashboard(repos) {
+    const response = await fetch('/api/dashboard', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ repos: repos.map(repo => ({ owner: repo.owner, name: repo.name })) })
+    });
+    if (!response.ok) {
+        const errorText = await response.text();
+        console.error(`HTTP error! status: ${response.status}, response:`, errorText);
+        throw new Error(`Failed to load workflows: ${response.status} ${response.statusText}`);
+    }
+    const data = await response.json();
+    return Array.isArray(data.repos) ? data.repos : [];
+}
+
+// DOM id fragment for a repository card
+function repoCardId(owner, repo) {
+    return `${owner}_${repo}`.replace(/[^a-zA-Z0-9-_]/g, '_');
+}
+
+// Create (or replace) the card for a repository and return its workflow list element
+function createRepoCard(owner, repo, container, prepend = true) {
+    const repoId = repoCardId(owner, repo);
+    const workflowContainerId = `workflows-${repoId}`;
+
+    // Remove existing card if it exists
+    const existingCard = document.getElementById(`repo-${repoId}`);
+    if (existingCard) {
+        existingCard.remove();
+    }
+
+    const repoCard = document.createElement('div');
+    repoCard.className = 'card mb-3';
+    repoCard.id = `repo-${repoId}`;
+    repoCard.innerHTML = `
+        <div class="card-header">
+            <h5 class="mb-0">
+                <a href="https://github.com/${owner}/${repo}" target="_blank" class="text-decoration-none">
+                    ${owner}/${repo}
+                </a>
+            </h5>
+        </div>
+        <div class="card-body">
+            <div id="${workflowContainerId}" class="workflow-list"></div>
+        </div>`;
+
+    if (prepend && container.firstChild) {
+        container.insertBefore(repoCard, container.firstChild);
+    } else {
+        container.appendChild(repoCard);
+    }
+    return repoCard.querySelector('.workflow-list');
+}
+
+// Render one repository entry of the /api/dashboard response
+function renderDashboardRepo(repoData, workflowContainer) {
+    const { owner, name } = repoData;
+
+    if (repoData.error) {
+        workflowContainer.innerHTML = `
+            <div class="alert alert-danger">
+                <i class="bi bi-exclamation-triangle"></i>
+                Failed to load workflows: ${repoData.error}
+            </div>`;
+        return;
+    }
+
+    const workflows = Array.isArray(repoData.workflows) ? repoData.workflows : [];
+    if (workflows.length === 0) {
+        workflowContainer.innerHTML = '<p class="text-muted">No workflows found for this repository.</p>';
+        return;
+    }
+
+    workflowContainer.innerHTML = (repoData.stale ? `
+        <div class="alert alert-warning py-2 small">
+            <i class="bi bi-clock-history me-1"></i>
+            GitHub is unavailable or rate limited; showing the last known status.
+        </div>` : '') + workflows.map(workflow => renderWorkflowCard(owner, name, workflow)).join('');
+    workflowContainer.querySelectorAll('.workflow-runs').forEach(attachRunClickHandlers);
+    if (repoData.version !== undefined) {
+        workflowContainer.dataset.version = repoData.version;
+    }
+}
+
+// Build the card for one workflow and its latest run
+function renderWorkflowCard(owner, repo, workflow) {
+    return `
+        <div class="workflow-card card mb-3" data-workflow-id="${workflow.id}">
+            <div class="card-header d-flex justify-content-between align-items-center">
+                <h6 class="mb-0">${workflow.name}</h6>
+                <span class="badge bg-secondary">#${workflow.id}</span>
+            </div>
+            <div class="workflow-runs list-group list-group-flush">
+                ${workflow.latest_run ? renderRunItem(owner, repo, workflow.latest_run) : `
+                <div class="list-group-item text-center py-4">
+                    <i class="bi bi-inbox fs-1 text-muted mb-2"></i>
+                    <p class="mb-0">No workflow runs found</p>
+                    <small class="text-muted">Push a commit to trigger a workflow run</small>
+                </div>`}
+            </div>
+        </div>`;
+}
+
+// Live updates pushed by the server over Server-Sent Events
+let eventSource = null;
+
+function startLiveUpdates() {
+    stopLiveUpdates();
+    const savedRepos = getSavedRepos();
+    if (savedRepos.length === 0 || typeof EventSource === 'undefined') {
+        return false;
+    }
+
+    const repos = savedRepos.map(repo => `${repo.owner}/${repo.name}`).join(',');
+    eventSource = new EventSource(`/api/stream?repos=${encodeURIComponent(repos)}`);
+    eventSource.addEventListener('snapshot', event => applySnapshot(JSON.parse(event.data)));
+    eventSource.addEventListener('delta', event => applyDelta(JSON.parse(event.data)));
+    eventSource.onerror = () => {
+        // EventSource reconnects by itself and receives fresh snapshots
+        console.warn('Live update stream interrupted, reconnecting...');
+    };
+    return true;
+}
+
+function stopLiveUpdates() {
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
+}
+
+// Only repositories currently shown get updated
+function getWorkflowContainer(owner, repo) {
+    return document.getElementById(`workflows-${repoCardId(owner, repo)}`);
+}
+
+function applySnapshot(repoData) {
+    const workflowContainer = getWorkflowContainer(repoData.owner, repoData.name);
+    if (!workflowContainer || workflowContainer.dataset.version === String(repoData.version)) {
+        return;
+    }
+    renderDashboardRepo(repoData, workflowContainer);
+}
+
+// Patch the affected workflow cards in place instead of re-rendering the repository
+function applyDelta(delta) {
+    const { owner, name } = delta;
+    const workflowContainer = getWorkflowContainer(owner, name);
+    if (!workflowContainer || Number(workflowContainer.dataset.version) >= delta.version) {
+        return;
+    }
+
+    delta.changes.forEach(change => {
+        const workflowId = change.workflow_id ?? change.workflow.id;
+        const card = workflowContainer.querySelector(`.workflow-card[data-workflow-id="${workflowId}"]`);
+        switch (change.type) {
+            case 'workflow_removed':
+                if (card) card.remove();
+                break;
+            case 'workflow_added':
+            case 'workflow_updated': {
+                const placeholder = workflowContainer.querySelector(':scope > p.text-muted');
+                if (placeholder) placeholder.remove();
+                const template = document.createElement('template');
+                template.innerHTML = renderWorkflowCard(owner, name, change.workflow).trim();
+                const newCard = template.content.firstElementChild;
+                if (card) {
+                    card.replaceWith(newCard);
+                } else {
+                    workflowContainer.appendChild(newCard);
+                }
+                attachRunClickHandlers(newCard.querySelector('.workflow-runs'));
+                break;
+            }
+            case 'run_added':
+            case 'run_updated': {
+                const runsContainer = card && card.querySelector('.workflow-runs');
+                if (runsContainer) {
+                    runsContainer.innerHTML = renderRunItem(owner, name, change.run);
+                    attachRunClickHandlers(runsContainer);
+                }
+                break;
+            }
+        }
+    });
+    workflowContainer.dataset.version = delta.version;
+}
+
 // Function to refresh all workflows for saved repositories
 async function refreshAllWorkflows(forceRefresh = false, background = false) {
     console.log('Refreshing all workflows...', { forceRefresh, background });
@@ -514,6 +726,9 @@ async function refreshAllWorkflows(forceRefresh = false, background = false) {
         console.error('Main container not found');
         return;
     }
+    if (savedRepos.length === 0) {
+        return;
+    }
     
     // Only update UI if not a background refresh
     if (!background) {
@@ -528,22 +743,13 @@ async function refreshAllWorkflows(forceRefresh = false, background = false) {
     }
     
     try {
-        // Process repositories in parallel with a concurrency limit
-        const BATCH_SIZE = 3; // Process 3 repositories at a time
-        for (let i = 0; i < savedRepos.length; i += BATCH_SIZE) {
-            const batch = savedRepos.slice(i, i + BATCH_SIZE);
-            await Promise.all(batch.map(repo => 
-                loadWorkflows(repo.owner, repo.name, container)
-                    .catch(error => {
-                        console.error(`Error refreshing workflows for ${repo.owner}/${repo.name}:`, error);
-                        return null; // Continue with next repository even if one fails
-                    })
-            ));
-            // Small delay between batches to avoid rate limiting
-            if (i + BATCH_SIZE < savedRepos.length) {
-                await new Promise(resolve => setTimeout(resolve, 1000));
-            }
-        }
+        // One request for every saved repository; the server fans out to GitHub
+        const repos = await fetchDashboard(savedRepos);
+        container.innerHTML = '';
+        repos.forEach(repoData => {
+            const workflowContainer = createRepoCard(repoData.owner, repoData.name, container, false);
+            renderDashboardRepo(repoData, workflowContainer);
+        });
     } catch (error) {
         console.error('Error in refreshAllWorkflows:', error);
         if (!background) {
@@ -557,121 +763,33 @@ async function refreshAllWorkflows(forceRefresh = false, background = false) {
 }
 
 async function loadWorkflows(owner, repo, container) {
-    try {
-        if (!container) {
-            console.error('No container provided for workflows');
-            return;
-        }
-
-        // Show loading state
-        container.innerHTML = `
-            <div class="d-flex justify-content-center align-items-center" style="min-height: 200px;">
-                <div class="spinner-border text-primary" role="status">
-                    <span class="visually-hidden">Loading...</span>
-                </div>
-                <span class="ms-2">Loading workflows for ${owner}/${repo}...</span>
-            </div>`;
+    if (!container) {
+        console.error('No container provided for workflows');
+        return;
+    }
 
-        // Generate IDs
-        const repoId = `${owner}_${repo}`.replace(/[^a-zA-Z0-9-_]/g, '_');
-        const workflowContainerId = `workflows-${repoId}`;
-        
-        // Remove existing card if it exists
-        const existingCard = document.getElementById(`repo-${repoId}`);
-        if (existingCard) {
-            existingCard.remove();
-        }
-        
-        // Create new card
-        const repoCard = document.createElement('div');
-        repoCard.className = 'card mb-3';
-        repoCard.id = `repo-${repoId}`;
-        repoCard.innerHTML = `
-            <div class="card-header">
-                <h5 class="mb-0">
-                    <a href="https://github.com/${owner}/${repo}" target="_blank" class="text-decoration-none">
-                        ${owner}/${repo}
-                    </a>
-                </h5>
+    const workflowContainer = createRepoCard(owner, repo, container);
+    workflowContainer.innerHTML = `
+        <div class="d-flex justify-content-center align-items-center" style="min-height: 200px;">
+            <div class="spinner-border text-primary" role="status">
+                <span class="visually-hidden">Loading...</span>
             </div>
-            <div class="card-body">
-                <div id="${workflowContainerId}" class="workflow-list"></div>
-            </div>`;
-        
-        // Insert the new card at the top of the container
-        if (container.firstChild) {
-            container.insertBefore(repoCard, container.firstChild);
-        } else {
-            container.appendChild(repoCard);
-        }
-        
-        // Get reference to the workflow container
-        const workflowContainer = document.getElementById(workflowContainerId);
-        if (!workflowContainer) {
-            console.error(`Failed to create workflow container for ${owner}/${repo}`);
-            return;
-        }
-        
-        // Scroll to the top to show the newly added card
-        container.scrollTo({ top: 0, behavior: 'smooth' });
-        
-        // Now load the workflows for this repository
-        try {
-            const apiUrl = `/api/workflows/${encodeURIComponent(owner)}/${encodeURIComponent(repo)}`;
-            console.log(`Fetching workflows from: ${apiUrl}`);
-            
-            const response = await fetch(apiUrl);
-            if (!response.ok) {
-                const errorText = await response.text();
-                console.error(`HTTP error! status: ${response.status}, response:`, errorText);
-                
-                // Handle 404 specifically
-                if (response.status === 404) {
-                    throw new Error('Repository not found or access denied');
-                }
-                throw new Error(`Failed to load workflows: ${response.status} ${response.statusText}`);
-            }
-            
-            const data = await response.json();
-            
-            // Ensure workflows is an array
-            const workflows = Array.isArray(data) ? data : (data.workflows || []);
-            
-            // Clear the loading state
-            workflowContainer.innerHTML = '';
-            
-            // Process and display workflows
-            if (workflows.length === 0) {
-                workflowContainer.innerHTML = '<p class="text-muted">No workflows found for this repository.</p>';
-                return;
-            }
-            
-            // Load workflow runs for each workflow
-            workflows.forEach(workflow => {
-                loadWorkflowRuns(owner, repo, workflow.id, workflow.name, workflowContainer);
-            });
-            
-        } catch (error) {
-            console.error('Error loading workflows:', error);
-            if (workflowContainer) {
-                workflowContainer.innerHTML = `
-                    <div class="alert alert-danger">
-                        <i class="bi bi-exclamation-triangle"></i>
-                        Failed to load workflows: ${error.message}
-                    </div>`;
-            }
-        }
+            <span class="ms-2">Loading workflows for ${owner}/${repo}...</span>
+        </div>`;
+
+    // Scroll to the top to show the newly added card
+    container.scrollTo({ top: 0, behavior: 'smooth' });
+
+    try {
+        const [repoData] = await fetchDashboard([{ owner, name: repo }]);
+        renderDashboardRepo(repoData || { owner, name: repo, workflows: [] }, workflowContainer);
     } catch (error) {
         console.error(`Error loading workflows for ${owner}/${repo}:`, error);
-        const workflowList = document.getElementById(`workflows-${owner}-${repo}`);
-        if (workflowList) {
-            workflowList.innerHTML = `
-                <div class="alert alert-danger">
-                    <i class="bi bi-exclamation-triangle-fill"></i>
-                    Failed to load workflows. Please try again later.
-                    ${error.message ? `<div class="small mt-2">${error.message}</div>` : ''}
-                </div>`;
-        }
+        workflowContainer.innerHTML = `
+            <div class="alert alert-danger">
+                <i class="bi bi-exclamation-triangle"></i>
+                Failed to load workflows: ${error.message}
+            </div>`;
     }
 }
 
@@ -755,13 +873,9 @@ async function loadWorkflowRuns(owner, repo, workflowId, workflowName, container
         });
         
         // Only fetch the most recent run with cache control
-        response = await fetch(`/api/runs/${owner}/${repo}/${workflowId}?per_page=1&t=${Date.now()}`, {
+        response = await fetch(`/api/runs/${owner}/${repo}/${workflowId}?per_page=1`, {
             signal: controller.signal,
-            headers: {
-                'Cache-Control': 'no-cache, no-store, must-revalidate',
-                'Pragma': 'no-cache',
-                'Expires': '0'
-            }
+            cache: 'no-cache'
         });
         
         // Check if the request was aborted
@@ -803,67 +917,7 @@ async function loadWorkflowRuns(owner, repo, workflowId, workflowName, container
         runs.sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
         
         // Format the runs HTML
-        const runsHtml = runs.map(run => {
-            const runStatus = run.conclusion || run.status || 'unknown';
-            const statusClass = getStatusBadgeClass(runStatus);
-            const runDate = formatDate(run.created_at);
-            const runUrl = `https://github.com/${owner}/${repo}/actions/runs/${run.id}`;
-            const commitMessage = run.head_commit?.message || 'No commit message';
-            const shortSha = run.head_sha ? run.head_sha.substring(0, 7) : 'N/A';
-            // Try multiple possible fields for branch name
-            const branch = run.head_branch || run.head_ref || run.head_repo?.default_branch || 'N/A';
-            const actor = run.actor?.login || run.triggering_actor?.login || 'unknown';
-            
-            // Format duration
-            let duration = 'N/A';
-            if (run.updated_at && run.created_at) {
-                const start = new Date(run.created_at);
-                const end = new Date(run.updated_at);
-                const diffMs = end - start;
-                const diffMins = Math.floor(diffMs / 60000);
-                const diffSecs = Math.floor((diffMs % 60000) / 1000);
-                duration = diffMins > 0 ? `${diffMins}m ${diffSecs}s` : `${diffSecs}s`;
-            }
-            
-            return `
-                <div class="list-group-item list-group-item-action p-3">
-                    <div class="d-flex justify-content-between align-items-start mb-2">
-                        <div class="d-flex align-items-center">
-                            <span class="badge bg-${statusClass} me-2">
-                                <i class="bi ${runStatus === 'success' ? 'bi-check-circle' : runStatus === 'failure' ? 'bi-x-circle' : 'bi-arrow-repeat'} me-1"></i>
-                                ${runStatus.charAt(0).toUpperCase() + runStatus.slice(1)}
-                            </span>
-                            <a href="${runUrl}" target="_blank" class="text-decoration-none fw-bold me-2">
-                                #${run.run_number}
-                            </a>
-                            <span class="badge bg-light text-dark border me-2">
-                                <i class="bi-git me-1"></i>${branch}
-                            </span>
-                            <span class="badge bg-light text-dark border">
-                                <i class="bi-person-fill me-1"></i>${actor}
-                            </span>
-                        </div>
-                        <small class="text-muted" title="${new Date(run.created_at).toLocaleString()}">
-                            <i class="bi-clock-history me-1"></i>${runDate}
-                        </small>
-                    </div>
-                    
-                    <div class="d-flex justify-content-between align-items-center">
-                        <div class="text-truncate me-2" title="${commitMessage.replace(/"/g, '&quot;')}">
-                            <i class="bi-git me-1"></i>
-                            ${commitMessage.split('\n')[0]}
-                        </div>
-                        <div class="text-nowrap text-muted small">
-                            <span class="me-2" title="Commit SHA">
-                                <i class="bi-hash"></i> ${shortSha}
-                            </span>
-                            <span title="Duration">
-                                <i class="bi-stopwatch"></i> ${duration}
-                            </span>
-                        </div>
-                    </div>
-                </div>`;
-        }).join('');
+        const runsHtml = runs.map(run => renderRunItem(owner, repo, run)).join('');
         
         // Update the runs container
         if (runsContainer) {
@@ -876,17 +930,7 @@ async function loadWorkflowRuns(owner, repo, workflowId, workflowName, container
             runsContainer.parentNode.replaceChild(newRunsContainer, runsContainer);
             runsContainer = newRunsContainer;
             
-            // Add click handlers for each run item
-            runsContainer.querySelectorAll('.list-group-item').forEach(item => {
-                item.addEventListener('click', (e) => {
-                    // Don't navigate if the click was on a link or button
-                    if (e.target.tagName === 'A' || e.target.closest('a, button')) {
-                        return;
-                    }
-                    // Toggle active class on the clicked item
-                    item.classList.toggle('active');
-                });
-            });
+            attachRunClickHandlers(runsContainer);
         }
     } catch (error) {
         // Don't log aborted requests as errors
@@ -909,6 +953,274 @@ async function loadWorkflowRuns(owner, repo, workflowId, workflowName, container
     }
 }
 
+// Build the list item for a single workflow run
+function renderRunItem(owner, repo, run) {
+    const runStatus = run.conclusion || run.status || 'unknown';
+    const statusClass = getStatusBadgeClass(runStatus);
+    const runDate = formatDate(run.created_at);
+    const runUrl = `https://github.com/${owner}/${repo}/actions/runs/${run.id}`;
+    const commitMessage = run.head_commit?.message || 'No commit message';
+    const shortSha = run.head_sha ? run.head_sha.substring(0, 7) : 'N/A';
+    // Try multiple possible fields for branch name
+    const branch = run.head_branch || run.head_ref || run.head_repo?.default_branch || 'N/A';
+    const actor = run.actor?.login || run.triggering_actor?.login || 'unknown';
+    
+    // Format duration
+    let duration = 'N/A';
+    if (run.updated_at && run.created_at) {
+        const start = new Date(run.created_at);
+        const end = new Date(run.updated_at);
+        const diffMs = end - start;
+        const diffMins = Math.floor(diffMs / 60000);
+        const diffSecs = Math.floor((diffMs % 60000) / 1000);
+        duration = diffMins > 0 ? `${diffMins}m ${diffSecs}s` : `${diffSecs}s`;
+    }
+    
+    return `
+        <div class="list-group-item list-group-item-action p-3" data-owner="${owner}" data-repo="${repo}" data-run-id="${run.id}">
+            <div class="d-flex justify-content-between align-items-start mb-2">
+                <div class="d-flex align-items-center">
+                    <span class="badge bg-${statusClass} me-2">
+                        <i class="bi ${runStatus === 'success' ? 'bi-check-circle' : runStatus === 'failure' ? 'bi-x-circle' : 'bi-arrow-repeat'} me-1"></i>
+                        ${runStatus.charAt(0).toUpperCase() + runStatus.slice(1)}
+                    </span>
+                    <a href="${runUrl}" target="_blank" class="text-decoration-none fw-bold me-2">
+                        #${run.run_number}
+                    </a>
+                    <span class="badge bg-light text-dark border me-2">
+                        <i class="bi-git me-1"></i>${branch}
+                    </span>
+                    <span class="badge bg-light text-dark border">
+                        <i class="bi-person-fill me-1"></i>${actor}
+                    </span>
+                </div>
+                <small class="text-muted" title="${new Date(run.created_at).toLocaleString()}">
+                    <i class="bi-clock-history me-1"></i>${runDate}
+                </small>
+            </div>
+            
+            <div class="d-flex justify-content-between align-items-center">
+                <div class="text-truncate me-2" title="${commitMessage.replace(/"/g, '&quot;')}">
+                    <i class="bi-git me-1"></i>
+                    ${commitMessage.split('\n')[0]}
+                </div>
+                <div class="text-nowrap text-muted small">
+                    <span class="me-2" title="Commit SHA">
+                        <i class="bi-hash"></i> ${shortSha}
+                    </span>
+                    <span title="Duration">
+                        <i class="bi-stopwatch"></i> ${duration}
+                    </span>
+                </div>
+            </div>
+            <div class="run-jobs mt-2 d-none"></div>
+        </div>`;
+}
+
+// Toggle the active state of run items on click
+function attachRunClickHandlers(runsContainer) {
+    runsContainer.querySelectorAll('.list-group-item').forEach(item => {
+        item.addEventListener('click', (e) => {
+            // Don't navigate if the click was on a link or button
+            if (e.target.tagName === 'A' || e.target.closest('a, button')) {
+                return;
+            }
+            // Nor when working with the expanded jobs and logs
+            if (e.target.closest('.run-jobs')) {
+                return;
+            }
+            // Toggle active class on the clicked item
+            item.classList.toggle('active');
+            toggleRunJobs(item);
+        });
+    });
+}
+
+function formatSeconds(seconds) {
+    if (seconds === null || seconds === undefined) return '';
+    const mins = Math.floor(seconds / 60);
+    const secs = Math.round(seconds % 60);
+    return mins > 0 ? `${mins}m ${secs}s` : `${secs}s`;
+}
+
+// Show or hide a run's jobs, loading them the first time
+function toggleRunJobs(item) {
+    const jobsContainer = item.querySelector('.run-jobs');
+    if (!jobsContainer || !item.dataset.runId) return;
+    jobsContainer.classList.toggle('d-none');
+    if (!jobsContainer.classList.contains('d-none') && !jobsContainer.dataset.loaded) {
+        jobsContainer.dataset.loaded = 'true';
+        jobsContainer.addEventListener('click', (e) => {
+            const button = e.target.closest('.job-log-toggle');
+            if (button) {
+                toggleJobLog(item.dataset.owner, item.dataset.repo, button.closest('.run-job'));
+            }
+        });
+        loadRunJobs(item.dataset.owner, item.dataset.repo, item.dataset.runId, jobsContainer);
+    }
+}
+
+async function loadRunJobs(owner, repo, runId, jobsContainer, cursor = null) {
+    jobsContainer.querySelector('.load-more-jobs')?.remove();
+    const loading = document.createElement('div');
+    loading.className = 'text-muted small';
+    loading.innerHTML = '<span class="spinner-border spinner-border-sm me-1" role="status"></span> Loading jobs...';
+    jobsContainer.appendChild(loading);
+    try {
+        const params = new URLSearchParams({ limit: '50' });
+        if (cursor) params.set('cursor', cursor);
+        const response = await fetch(`/api/runs/${owner}/${repo}/${runId}/jobs?${params}`);
+        if (!response.ok) {
+            const error = await response.json().catch(() => ({}));
+            throw new Error(error.detail || `HTTP error! status: ${response.status}`);
+        }
+        const data = await response.json();
+        loading.remove();
+        if (!cursor && data.jobs.length === 0) {
+            jobsContainer.innerHTML = '<div class="text-muted small">No jobs</div>';
+            return;
+        }
+        jobsContainer.insertAdjacentHTML('beforeend', data.jobs.map(renderJobItem).join(''));
+        if (data.next_cursor) {
+            const more = document.createElement('button');
+            more.className = 'btn btn-sm btn-link load-more-jobs';
+            more.textContent = `Load more jobs (${data.total - jobsContainer.querySelectorAll('.run-job').length} left)`;
+            more.addEventListener('click', () => loadRunJobs(owner, repo, runId, jobsContainer, data.next_cursor));
+            jobsContainer.appendChild(more);
+        }
+    } catch (error) {
+        console.error(`Error loading jobs for run ${runId}:`, error);
+        loading.remove();
+        jobsContainer.dataset.loaded = '';
+        jobsContainer.insertAdjacentHTML('beforeend',
+            `<div class="text-danger small">Failed to load jobs: ${error.message}</div>`);
+    }
+}
+
+function renderJobItem(job) {
+    const jobStatus = job.conclusion || job.status || 'unknown';
+    const steps = job.steps.map(step => {
+        const stepStatus = step.conclusion || step.status || 'unknown';
+        return `
+            <li class="d-flex justify-content-between ${stepStatus === 'failure' ? 'text-danger fw-bold' : ''}">
+                <span>${step.number}. ${step.name}</span>
+                <span class="text-muted">${formatSeconds(step.duration_seconds)}</span>
+            </li>`;
+    }).join('');
+    return `
+        <div class="run-job border-start border-3 border-${getStatusBadgeClass(jobStatus)} ps-2 mb-2 small"
+             data-job-id="${job.id}" data-running="${job.status !== 'completed'}">
+            <div class="d-flex justify-content-between">
+                <span>
+                    <a href="${job.html_url}" target="_blank" class="text-decoration-none fw-bold">${job.name}</a>
+                    <button type="button" class="btn btn-sm btn-link p-0 ms-2 job-log-toggle">
+                        <i class="bi-terminal"></i> Log
+                    </button>
+                </span>
+                <span class="text-muted">${formatSeconds(job.duration_seconds)}</span>
+            </div>
+            <ul class="list-unstyled mb-0 ms-2">${steps}</ul>
+            <div class="job-log mt-1 d-none"></div>
+        </div>`;
+}
+
+// Show or hide a job's log; finished logs are paged by line, running ones are followed
+function toggleJobLog(owner, repo, jobElement) {
+    const panel = jobElement.querySelector('.job-log');
+    panel.classList.toggle('d-none');
+    if (panel.classList.contains('d-none') || panel.dataset.loaded) return;
+    panel.dataset.loaded = 'true';
+    panel.innerHTML = `
+        <form class="input-group input-group-sm mb-1 job-log-search">
+            <input type="search" class="form-control" placeholder="Search log">
+            <button class="btn btn-outline-secondary" type="submit"><i class="bi-search"></i></button>
+        </form>
+        <div class="job-log-matches mb-1"></div>
+        <pre class="job-log-text bg-dark text-light p-2 mb-1" style="max-height: 400px; overflow: auto;"></pre>
+        <button type="button" class="btn btn-sm btn-link p-0 job-log-more d-none">Load more lines</button>`;
+
+    const base = `/api/logs/${owner}/${repo}/jobs/${jobElement.dataset.jobId}`;
+    const text = panel.querySelector('.job-log-text');
+    const more = panel.querySelector('.job-log-more');
+    const matches = panel.querySelector('.job-log-matches');
+    let nextLine = 1;
+
+    const loadLines = async (startLine, reset = false) => {
+        more.classList.add('d-none');
+        try {
+            const response = await fetch(`${base}?start_line=${startLine}&lines=500`);
+            const data = await response.json();
+            if (!response.ok) throw new Error(data.detail || `HTTP error! status: ${response.status}`);
+            if (reset) text.textContent = '';
+            text.textContent += data.lines.join('\n') + (data.lines.length ? '\n' : '');
+            nextLine = data.next_line;
+            more.classList.toggle('d-none', !nextLine);
+        } catch (error) {
+            text.textContent += `Failed to load log: ${error.message}\n`;
+        }
+    };
+
+    more.addEventListener('click', () => loadLines(nextLine));
+    panel.querySelector('.job-log-search').addEventListener('submit', async (e) => {
+        e.preventDefault();
+        const q = e.target.querySelector('input').value.trim();
+        matches.innerHTML = '';
+        if (!q) return;
+        try {
+            const response = await fetch(`${base}/search?${new URLSearchParams({ q, limit: '100' })}`);
+            const data = await response.json();
+            if (!response.ok) throw new Error(data.detail || `HTTP error! status: ${response.status}`);
+            if (data.matches.length === 0) {
+                matches.innerHTML = '<div class="text-muted">No matches</div>';
+            }
+            data.matches.forEach(match => {
+                const link = document.createElement('a');
+                link.href = '#';
+                link.className = 'd-block text-truncate font-monospace';
+                link.textContent = `${match.line}: ${match.text}`;
+                link.addEventListener('click', (ev) => {
+                    ev.preventDefault();
+                    loadLines(Math.max(match.line - 20, 1), true);
+                });
+                matches.appendChild(link);
+            });
+            if (data.truncated) {
+                matches.insertAdjacentHTML('beforeend', '<div class="text-muted">More matches not shown</div>');
+            }
+        } catch (error) {
+            matches.innerHTML = `<div class="text-danger">Search failed: ${error.message}</div>`;
+        }
+    });
+
+    if (jobElement.dataset.running === 'true') {
+        followJobLog(`${base}/stream`, text, () => {
+            // Once the job has finished its log is searchable
+            jobElement.dataset.running = 'false';
+        });
+    } else {
+        loadLines(1);
+    }
+}
+
+async function followJobLog(url, text, onDone) {
+    try {
+        const response = await fetch(url);
+        if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            const atBottom = text.scrollTop + text.clientHeight >= text.scrollHeight - 5;
+            text.textContent += decoder.decode(value, { stream: true });
+            if (atBottom) text.scrollTop = text.scrollHeight;
+        }
+        onDone();
+    } catch (error) {
+        text.textContent += `Failed to follow log: ${error.message}\n`;
+    }
+}
+
 // Helper function to update UI when workflow runs fail to load
 function updateWorkflowErrorUI(workflowId, workflowName, container, errorMessage) {
     // Try to find existing workflow element
@@ -1159,6 +1471,8 @@ document.addEventListener('DOMContentLoaded', function() {
     const savedPolling = localStorage.getItem('autoRefreshEnabled');
     if (savedPolling === 'true' && typeof startPolling === 'function') {
         startPolling();
+    } else {
+        startLiveUpdates();
     }
     
     // Set up form submission with delegation
@@ -1245,7 +1559,8 @@ async function handleAddRepo(event) {
 
     try {
         // Verify the repository exists and we have access to it
-        const response = await fetch(`/api/workflows/${owner}/${repoName}`);
+        // Only the repository's existence matters here, not its runs
+        const response = await fetch(`/api/workflows/${owner}/${repoName}?fields=status`);
         if (!response.ok) {
             const error = await response.json().catch(() => ({}));
             throw new Error(error.detail || 'Repository not found or access denied');
@@ -1268,6 +1583,8 @@ async function handleAddRepo(event) {
 
         savedRepos.push(newRepo);
         localStorage.setItem('addedRepos', JSON.stringify(savedRepos));
+        persistRepo(newRepo.owner, newRepo.name);
+        startLiveUpdates();
 
         // Update the repositories list
         updateReposList(savedRepos);
@@ -1437,6 +1754,8 @@ async function handleAddRepo(event) {
         const newRepo = { owner, name: repoName, full_name: `${owner}/${repoName}` };
         savedRepos.push(newRepo);
         localStorage.setItem('addedRepos', JSON.stringify(savedRepos));
+        persistRepo(newRepo.owner, newRepo.name);
+        startLiveUpdates();
         
         // Update the UI
         updateReposList(savedRepos);
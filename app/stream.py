@@ -0,0 +1,64 @@
+"""
+Server-Sent Events stream of dashboard updates.
+
+A client subscribes to a set of repositories, receives one ``snapshot`` event
+per repository and afterwards only ``delta`` events describing runs that
+started or changed state and workflows that appeared or disappeared, as the
+background poller detects them.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List
+
+from app.encoding import dumps
+from app.poller import SnapshotStore, poller
+
+logger = logging.getLogger(__name__)
+
+# Seconds between keep-alive comments on an idle stream
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", "15"))
+# Reconnect delay suggested to EventSource clients, in milliseconds
+STREAM_RETRY_MS = 5000
+
+
+def format_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+async def event_stream(repos: List[Dict[str, str]],
+                       is_disconnected: Callable[[], Awaitable[bool]]) -> AsyncIterator[str]:
+    # Subscribe before taking the initial snapshots so no change falls in between
+    subscriber = poller.store.subscribe(SnapshotStore.key(r["owner"], r["name"]) for r in repos)
+    try:
+        yield f"retry: {STREAM_RETRY_MS}\n\n"
+        sent: Dict[str, int] = {}
+        for payload in await poller.snapshots(repos):
+            sent[SnapshotStore.key(payload["owner"], payload["name"])] = payload["version"]
+            yield format_event("snapshot", payload)
+
+        while True:
+            try:
+                event, data = await asyncio.wait_for(subscriber.queue.get(), timeout=STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    return
+                # An open stream counts as interest in its repositories
+                for repo in repos:
+                    poller.track(repo["owner"], repo["name"])
+                yield ": keep-alive\n\n"
+                continue
+
+            if event == "resync":
+                for payload in await poller.snapshots(repos):
+                    sent[SnapshotStore.key(payload["owner"], payload["name"])] = payload["version"]
+                    yield format_event("snapshot", payload)
+                continue
+            key = SnapshotStore.key(data["owner"], data["name"])
+            if data["version"] <= sent.get(key, 0):
+                # Already covered by a snapshot this client received
+                continue
+            sent[key] = data["version"]
+            yield format_event(event, data)
+    finally:
+        poller.store.unsubscribe(subscriber)
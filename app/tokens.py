@@ -0,0 +1,279 @@
+"""
+Pool of GitHub credentials: personal access tokens and GitHub App installations.
+
+GITHUB_TOKEN and GITHUB_TOKENS (comma-separated) provide personal access
+tokens; an entry written ``owner=token`` is only used for that owner's
+repositories. With GITHUB_APP_ID and GITHUB_APP_PRIVATE_KEY (or
+GITHUB_APP_PRIVATE_KEY_PATH), each installation of the app adds a token for the
+account it is installed on. Installation tokens last an hour and are renewed
+TOKEN_REFRESH_MARGIN seconds before they expire.
+
+Requests are routed by the owner in their path: to the tokens for that owner
+if there are any, else to the unrestricted ones, picking the token with the
+most rate-limit budget left. Requests without an owner (``/user/repos``,
+``/rate_limit``) use the primary token, so their answers don't depend on which
+token happened to be picked.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from github import Auth, GithubIntegration
+
+from app.config import env_float
+from app.ratelimit import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds before expiry at which installation tokens are renewed
+TOKEN_REFRESH_MARGIN = env_float("TOKEN_REFRESH_MARGIN", 300)
+# Seconds a token that failed (bad credentials, revoked) is left out before it is tried again
+TOKEN_RETRY_INTERVAL = env_float("TOKEN_RETRY_INTERVAL", 60)
+
+PAT = "pat"
+APP = "app"
+
+_OWNER_PATH = re.compile(r"^(?:/api/v3)?/(?:repos|users|orgs)/([^/?]+)")
+
+
+def owner_of(path: str) -> Optional[str]:
+    """The repository owner, user or organization a REST path is about"""
+    m = _OWNER_PATH.match(path)
+    return m.group(1).lower() if m else None
+
+
+class Credential:
+    """One token of the pool, with the budget it is accounted under (``name``)"""
+
+    __slots__ = ("name", "kind", "token", "owners", "general", "installation_id", "expires_at",
+                 "login", "private_access", "validated_at", "failed_at", "last_error")
+
+    def __init__(self, name: str, kind: str, token: Optional[str] = None, owners: Iterable[str] = (),
+                 general: bool = False, installation_id: Optional[int] = None):
+        self.name = name
+        self.kind = kind
+        self.token = token
+        self.owners = set(owners)
+        # Used for owners without tokens of their own
+        self.general = general
+        self.installation_id = installation_id
+        # Wall-clock expiry of installation tokens
+        self.expires_at: Optional[float] = None
+        self.login: Optional[str] = None
+        self.private_access: Optional[bool] = None
+        self.validated_at: Optional[float] = None
+        self.failed_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def usable(self, now: float) -> bool:
+        return self.failed_at is None or now - self.failed_at > TOKEN_RETRY_INTERVAL
+
+    def needs_refresh(self, now: float) -> bool:
+        return self.kind == APP and (self.token is None or self.expires_at - now < TOKEN_REFRESH_MARGIN)
+
+    def failed(self, error: str):
+        self.failed_at = time.monotonic()
+        self.validated_at = None
+        self.last_error = error[:200]
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "owners": sorted(self.owners),
+            "general": self.general,
+            "login": self.login,
+            "private_access": self.private_access,
+            "expires_in": round(self.expires_at - time.time()) if self.expires_at else None,
+            "validated_seconds_ago": round(now - self.validated_at, 1) if self.validated_at else None,
+            "last_error": self.last_error,
+            **rate_limiter.account_stats(self.name),
+        }
+
+
+def _parse_tokens(*values: Optional[str]) -> List[Tuple[Optional[str], str]]:
+    """``(owner or None, token)`` pairs from comma-separated ``[owner=]token`` lists"""
+    entries = []
+    for value in values:
+        for item in (value or "").replace("\n", ",").split(","):
+            owner, _, token = item.strip().rpartition("=")
+            if token.strip():
+                entries.append((owner.strip().lower() or None, token.strip()))
+    return entries
+
+
+def _app_private_key() -> Optional[str]:
+    key = os.getenv("GITHUB_APP_PRIVATE_KEY")
+    if key:
+        # Environment files often hold the PEM on one line with literal \n
+        return key.replace("\\n", "\n")
+    path = os.getenv("GITHUB_APP_PRIVATE_KEY_PATH")
+    if path:
+        with open(path) as f:
+            return f.read()
+    return None
+
+
+class TokenPool:
+    """The configured credentials and the choice of one per request"""
+
+    def __init__(self, api_url: str, discovery_interval: float):
+        self.api_url = api_url
+        self.discovery_interval = discovery_interval
+        self._lock = threading.RLock()
+        self._config: Optional[Tuple[Optional[str], ...]] = None
+        self._credentials: List[Credential] = []
+        self._by_token: Dict[str, Credential] = {}
+        self._integration: Optional[GithubIntegration] = None
+        self._discovered_at: Optional[float] = None
+        self.app_error: Optional[str] = None
+
+    @staticmethod
+    def _read_config() -> Tuple[Optional[str], ...]:
+        return (os.getenv("GITHUB_TOKEN"), os.getenv("GITHUB_TOKENS"), os.getenv("GITHUB_APP_ID"),
+                os.getenv("GITHUB_APP_PRIVATE_KEY"), os.getenv("GITHUB_APP_PRIVATE_KEY_PATH"))
+
+    def _load(self):
+        """(Re)build the pool when the configuration changed, e.g. a rotated token"""
+        config = self._read_config()
+        if config == self._config:
+            return
+        with self._lock:
+            if config == self._config:
+                return
+            credentials: Dict[str, Credential] = {}
+            for owner, token in _parse_tokens(config[0], config[1]):
+                credential = credentials.get(token)
+                if credential is None:
+                    credential = credentials[token] = Credential(f"pat-{len(credentials) + 1}", PAT, token)
+                if owner:
+                    credential.owners.add(owner)
+                else:
+                    credential.general = True
+            self._credentials = list(credentials.values())
+            self._integration = None
+            self._discovered_at = None
+            self.app_error = None
+            app_id, key = config[2], None
+            if app_id:
+                try:
+                    key = _app_private_key()
+                    if not key:
+                        raise ValueError("GITHUB_APP_PRIVATE_KEY or GITHUB_APP_PRIVATE_KEY_PATH is not set")
+                    self._integration = GithubIntegration(auth=Auth.AppAuth(app_id.strip(), key),
+                                                          base_url=self.api_url)
+                except Exception as e:
+                    self.app_error = str(e)
+                    logger.error(f"GitHub App {app_id} not usable: {str(e)}")
+            self._reindex()
+            self._config = config
+            if not self._credentials and self._integration is None:
+                logger.error("No GitHub credentials: set GITHUB_TOKEN, GITHUB_TOKENS or GITHUB_APP_ID")
+
+    def _reindex(self):
+        self._by_token = {c.token: c for c in self._credentials if c.token}
+
+    def _discover(self):
+        """Add a credential for every installation of the GitHub App, every discovery interval"""
+        if self._integration is None:
+            return
+        now = time.monotonic()
+        if self._discovered_at is not None and now - self._discovered_at < self.discovery_interval:
+            return
+        with self._lock:
+            if self._discovered_at is not None and now - self._discovered_at < self.discovery_interval:
+                return
+            self._discovered_at = now
+            try:
+                installations = list(self._integration.get_installations())
+            except Exception as e:
+                self.app_error = str(e)
+                logger.error(f"Could not list GitHub App installations: {str(e)}")
+                return
+            self.app_error = None
+            existing = {c.installation_id: c for c in self._credentials if c.kind == APP}
+            for installation in installations:
+                account = (installation.raw_data.get("account") or {}).get("login")
+                if not account or installation.id in existing:
+                    continue
+                credential = Credential(f"app-{account.lower()}", APP, owners=[account.lower()],
+                                        installation_id=installation.id)
+                credential.login = account
+                self._credentials.append(credential)
+                logger.info(f"GitHub App installation {installation.id} serves {account}")
+
+    def refresh(self, credential: Credential) -> bool:
+        """Mint a new installation token when the current one is about to expire; False if that failed"""
+        if not credential.needs_refresh(time.time()):
+            return True
+        with self._lock:
+            if not credential.needs_refresh(time.time()):
+                return True
+            try:
+                authorization = self._integration.get_access_token(credential.installation_id)
+            except Exception as e:
+                credential.failed(str(e))
+                logger.error(f"Could not renew the token of {credential.name}: {str(e)}")
+                return False
+            credential.token = authorization.token
+            credential.expires_at = authorization.expires_at.timestamp()
+            credential.private_access = True
+            credential.validated_at = time.monotonic()
+            credential.failed_at = None
+            credential.last_error = None
+            self._reindex()
+            logger.info(f"Renewed the installation token of {credential.name}")
+            return True
+
+    def credentials(self) -> List[Credential]:
+        self._load()
+        self._discover()
+        return list(self._credentials)
+
+    @staticmethod
+    def _primary(credentials: List[Credential]) -> Optional[Credential]:
+        return next((c for c in credentials if c.general), credentials[0] if credentials else None)
+
+    def primary(self) -> Optional[Credential]:
+        """The token for requests that are not about one owner"""
+        return self._primary(self.credentials())
+
+    def known_primary(self) -> Optional[Credential]:
+        """The primary token as last loaded, without reloading the configuration or discovering installations"""
+        return self._primary(list(self._credentials))
+
+    def select(self, owner: Optional[str]) -> Optional[Credential]:
+        """The token to use for a request about ``owner``, None if none is usable"""
+        credentials = self.credentials()
+        now = time.monotonic()
+        if owner is None:
+            primary = self.primary()
+            candidates = [primary] if primary is not None else []
+        else:
+            candidates = [c for c in credentials if owner in c.owners] or [c for c in credentials if c.general]
+        usable = [c for c in candidates if c.usable(now)]
+        if not usable:
+            return None
+        # Most budget left first; tokens not used yet (infinite) get tried and so measured
+        return max(usable, key=lambda c: rate_limiter.budget(c.name))
+
+    def account(self, token: Optional[str]) -> Optional[str]:
+        """Name of the credential a token belongs to, which its budget is tracked under"""
+        credential = self._by_token.get(token) if token else None
+        return credential.name if credential is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        # Read from health checks and metrics on the event loop: no discovery (a network call) here
+        return {
+            "tokens": [c.stats() for c in list(self._credentials)],
+            "app": {
+                "configured": bool(os.getenv("GITHUB_APP_ID")),
+                "installations": sum(1 for c in self._credentials if c.kind == APP),
+                "error": self.app_error,
+            },
+        }
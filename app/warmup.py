@@ -0,0 +1,105 @@
+"""
+Start-up work that used to run while ``app.main`` was imported.
+
+Importing the app does no I/O, so uvicorn serves (and ``/health`` answers)
+as soon as the process is up. Once it is, :class:`Warmup` runs in the
+background: it validates the GitHub tokens, then, unless ``PREWARM_CACHE``
+is off, loads the status of the repositories on the dashboard so the first
+page view is answered from the response cache. Neither
+step fails start-up; errors are logged and reported in ``/api/startup/stats``.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from app.database import run_store
+from app.datasource import data_source
+from app.github_data import load_dashboard, run_github
+from app.ratelimit import background_priority
+
+logger = logging.getLogger(__name__)
+
+# Load the configured repositories into the response cache after start-up
+PREWARM_CACHE = os.getenv("PREWARM_CACHE", "true").lower() not in ("0", "false", "no")
+# Repositories pre-warmed at once
+PREWARM_CONCURRENCY = max(int(os.getenv("PREWARM_CONCURRENCY", "4")), 1)
+
+
+def _seconds(start: Optional[float], end: Optional[float]) -> Optional[float]:
+    return None if start is None or end is None else round(end - start, 3)
+
+
+class Warmup:
+    def __init__(self):
+        self.import_started_at: Optional[float] = None
+        self.imported_at: Optional[float] = None
+        self.serving_at: Optional[float] = None
+        self.validated_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.repos = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def imported(self, started_at: float):
+        """Record how long importing the app took, from ``started_at``"""
+        self.import_started_at = started_at
+        self.imported_at = time.perf_counter()
+
+    def start(self):
+        """Called from the lifespan hook, once the app can serve requests"""
+        if self.running:
+            return
+        self.serving_at = time.perf_counter()
+        self._task = asyncio.create_task(self._run(), name="warmup")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        with background_priority():
+            try:
+                if not await run_github(data_source().available):
+                    raise RuntimeError("GitHub is not available with the configured credentials")
+                self.validated_at = time.perf_counter()
+                if PREWARM_CACHE:
+                    repos = await run_github(run_store.list_repos)
+                    self.repos = len(repos)
+                    statuses = await load_dashboard(repos, concurrency=PREWARM_CONCURRENCY)
+                    self.errors = sum(1 for status in statuses if status.get("error"))
+            except Exception as e:
+                self.last_error = str(e)[:200]
+                logger.warning(f"Start-up warm-up failed: {self.last_error}")
+        self.finished_at = time.perf_counter()
+        logger.info(f"Warm-up done in {_seconds(self.serving_at, self.finished_at)}s "
+                    f"({self.repos} repositories, {self.errors} errors)")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "import_seconds": _seconds(self.import_started_at, self.imported_at),
+            # From importing the app to serving requests
+            "boot_seconds": _seconds(self.import_started_at, self.serving_at),
+            "validated_seconds": _seconds(self.serving_at, self.validated_at),
+            "warmup_seconds": _seconds(self.serving_at, self.finished_at),
+            "running": self.running,
+            "prewarm": PREWARM_CACHE,
+            "repos": self.repos,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+warmup = Warmup()
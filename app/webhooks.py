@@ -0,0 +1,240 @@
+"""
+Receiver for GitHub ``workflow_run`` and ``workflow_job`` webhooks.
+
+Verified deliveries are merged into the background poller's snapshots (and
+from there pushed to live streams), the run history store and the cached run
+listings, so run state is current without calling the API and polling only
+has to reconcile missed events.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import threading
+from collections import Counter, deque
+from typing import Any, Dict, Mapping, Optional, Set
+
+from fastapi import HTTPException
+
+from app.cache import response_cache
+from app.database import run_store
+from app.github_data import isoformat, run_on_loop, run_status
+from app.poller import poller
+from app.shared import shared_store
+
+logger = logging.getLogger(__name__)
+
+# Delivery IDs remembered to ignore GitHub redeliveries
+RECENT_DELIVERIES = 1000
+# Seconds a delivery ID is remembered in the shared store, where redeliveries to other workers are caught
+SHARED_DELIVERY_TTL = 86400
+
+_recent_deliveries: "deque[str]" = deque(maxlen=RECENT_DELIVERIES)
+# Deliveries being handled right now, so concurrent redeliveries are applied once
+_pending: Set[str] = set()
+_counters: Counter = Counter()
+_lock = threading.Lock()
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check an ``X-Hub-Signature-256`` header against the raw request body"""
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f"sha256={expected}", signature)
+
+
+def _count(key: str):
+    with _lock:
+        _counters[key] += 1
+
+
+def _reserve(delivery: str) -> bool:
+    """
+    Claim a delivery for handling; False when it was handled already or is
+    being handled (in this worker or, with a shared store, in another one).
+    """
+    with _lock:
+        if delivery in _pending or delivery in _recent_deliveries:
+            return False
+        _pending.add(delivery)
+    store = shared_store()
+    if store is not None and not store.add(f"delivery:{delivery}", True, ttl=SHARED_DELIVERY_TTL):
+        with _lock:
+            _pending.discard(delivery)
+        return False
+    return True
+
+
+def _release(delivery: str, handled: bool):
+    """Remember a handled delivery; forget a failed one, so GitHub's redelivery is applied"""
+    with _lock:
+        _pending.discard(delivery)
+        if handled:
+            _recent_deliveries.append(delivery)
+    store = shared_store()
+    if not handled and store is not None:
+        store.delete(f"delivery:{delivery}")
+
+
+def _per_page(key: str) -> int:
+    m = re.search(r"[?&]per_page=(\d+)", key)
+    return int(m.group(1)) if m else 30
+
+
+def _is_first_page(key: str) -> bool:
+    m = re.search(r"[?&]page=(\d+)", key)
+    return m is None or m.group(1) == "1"
+
+
+def _raw_is_newer(run: Mapping[str, Any], current: Mapping[str, Any]) -> bool:
+    return (run.get("updated_at") or "") >= (current.get("updated_at") or "")
+
+
+def patch_cached_runs(owner: str, repo: str, raw_run: Dict[str, Any]) -> int:
+    """
+    Update (or prepend) a run in every cached run listing of the repository it
+    belongs to: the repository-wide listing and its workflow's listing.
+    """
+    workflow_refs = {str(raw_run.get("workflow_id")), os.path.basename(raw_run.get("path") or "")}
+    pattern = re.compile(
+        rf"/repos/{re.escape(owner)}/{re.escape(repo)}/actions/(?:runs|workflows/([^/?]+)/runs)(?:\?|$)",
+        re.IGNORECASE,
+    )
+
+    def patch(key: str, data: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(data, dict):
+            return None
+        workflow_ref = pattern.search(key).group(1)
+        if workflow_ref is not None and workflow_ref not in workflow_refs:
+            return None
+        runs = list(data.get("workflow_runs") or [])
+        for i, current in enumerate(runs):
+            if current.get("id") == raw_run["id"]:
+                if not _raw_is_newer(raw_run, current):
+                    return None
+                runs[i] = raw_run
+                return {**data, "workflow_runs": runs}
+        # A run we have not seen yet: newest first, so it belongs on page one
+        if not _is_first_page(key):
+            return None
+        runs.insert(0, raw_run)
+        return {
+            **data,
+            "total_count": data.get("total_count", len(runs) - 1) + 1,
+            "workflow_runs": runs[:_per_page(key)],
+        }
+
+    return response_cache.patch(pattern, patch)
+
+
+def _handle_workflow_run(owner: str, repo: str, payload: Dict[str, Any],
+                         loop: Optional[asyncio.AbstractEventLoop]) -> Dict[str, Any]:
+    raw_run = payload["workflow_run"]
+    workflow = payload.get("workflow") or {}
+    patched = patch_cached_runs(owner, repo, raw_run)
+    # Only repositories with synced history: a lone run would become the sync watermark
+    stored = run_store.upsert_runs(owner, repo, [raw_run]) if run_store.watermark(owner, repo) else 0
+    changed = _apply_to_snapshot(loop, owner, repo, {
+        "id": raw_run.get("workflow_id"),
+        "name": workflow.get("name") or raw_run.get("name"),
+        "path": workflow.get("path") or raw_run.get("path"),
+        "state": workflow.get("state", "active"),
+        "html_url": workflow.get("html_url"),
+    }, run_status(raw_run))
+    return {"cache_entries_patched": patched, "runs_stored": stored, "snapshot_changed": changed}
+
+
+def _apply_to_snapshot(loop: Optional[asyncio.AbstractEventLoop], owner: str, repo: str,
+                       workflow: Mapping[str, Any], run: Dict[str, Any]) -> bool:
+    if poller.mirroring:
+        # Only handed to the polling worker through the shared store, from this thread
+        return poller.apply_run(owner, repo, workflow, run)
+    # Snapshots belong to the event loop, where the poller merges its results too
+    return run_on_loop(loop, poller.apply_run, owner, repo, workflow, run)
+
+
+def _handle_workflow_job(owner: str, repo: str, payload: Dict[str, Any],
+                         loop: Optional[asyncio.AbstractEventLoop]) -> Dict[str, Any]:
+    """A job starting means its run is in progress, even if no workflow_run event says so yet"""
+    job = payload["workflow_job"]
+    changed = False
+    if job.get("status") == "in_progress":
+        found = run_on_loop(loop, poller.find_run, owner, repo, job.get("run_id"))
+        if found is not None:
+            workflow, run = found
+            if run.get("status") not in ("in_progress", "completed"):
+                # apply_run only takes the run if it is still newer than the snapshot's
+                changed = _apply_to_snapshot(loop, owner, repo, workflow, {
+                    **run,
+                    "status": "in_progress",
+                    "updated_at": isoformat(job.get("started_at")) or run.get("updated_at"),
+                })
+    return {"snapshot_changed": changed}
+
+
+HANDLERS = {
+    "workflow_run": _handle_workflow_run,
+    "workflow_job": _handle_workflow_job,
+}
+
+
+def handle_webhook(headers: Mapping[str, str], body: bytes,
+                   loop: Optional[asyncio.AbstractEventLoop] = None) -> Dict[str, Any]:
+    """
+    Verify and apply one webhook delivery. Run on the worker pool, it hands
+    snapshot changes to ``loop``, the event loop the poller runs on.
+    """
+    secret = os.getenv("GITHUB_WEBHOOK_SECRET")
+    if not secret:
+        raise HTTPException(status_code=503, detail="GITHUB_WEBHOOK_SECRET is not configured")
+    if not verify_signature(secret, body, headers.get("X-Hub-Signature-256")):
+        _count("rejected")
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    event = headers.get("X-GitHub-Event", "")
+    delivery = headers.get("X-GitHub-Delivery")
+    if not delivery:
+        return _apply(event, body, loop)
+    if not _reserve(delivery):
+        _count("duplicates")
+        return {"status": "duplicate", "event": event}
+    try:
+        result = _apply(event, body, loop)
+    except BaseException:
+        _release(delivery, handled=False)
+        raise
+    _release(delivery, handled=True)
+    return result
+
+
+def _apply(event: str, body: bytes, loop: Optional[asyncio.AbstractEventLoop]) -> Dict[str, Any]:
+    if event == "ping":
+        return {"status": "pong"}
+    handler = HANDLERS.get(event)
+    if handler is None:
+        _count("ignored")
+        return {"status": "ignored", "event": event}
+
+    try:
+        payload = json.loads(body)
+        owner, repo = payload["repository"]["full_name"].split("/", 1)
+        # The object the event is about: workflow_run or workflow_job
+        if not isinstance(payload[event], dict):
+            raise TypeError(f"{event} is not an object")
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Malformed webhook payload")
+
+    result = handler(owner, repo, payload, loop)
+    _count(event)
+    logger.info(f"Webhook {event}/{payload.get('action')} for {owner}/{repo}: {result}")
+    return {"status": "ok", "event": event, "action": payload.get("action"), **result}
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        counters = dict(_counters)
+    return {"configured": bool(os.getenv("GITHUB_WEBHOOK_SECRET")), **counters}
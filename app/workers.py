@@ -0,0 +1,129 @@
+"""
+Coordination of worker processes sharing one dashboard.
+
+Without a shared store the process polls on its own, as it always did. With
+one, workers compete for a lease: the holder runs the background poller,
+publishes its snapshots and adopts the repositories requested from the others;
+everybody else mirrors the published snapshots. The lease is renewed every
+SHARED_SYNC_INTERVAL seconds, so when the polling worker exits or hangs
+another one takes over within LEADER_LEASE_TTL seconds. Every shared-store
+and SQLite call of a sync runs on the worker pool, and followers only read
+the snapshots whose published version changed.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config import env_float
+from app.database import run_store
+from app.github_data import run_github
+from app.poller import poller
+from app.shared import SharedStore, shared_store
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds a polling worker's lease lasts without renewal
+LEADER_LEASE_TTL = env_float("LEADER_LEASE_TTL", 15)
+# Seconds between lease renewals and snapshot syncs
+SHARED_SYNC_INTERVAL = env_float("SHARED_SYNC_INTERVAL", 1)
+# Seconds between sweeps of expired shared entries
+PURGE_INTERVAL = 300
+
+LEASE_NAME = "poller"
+
+
+class WorkerCoordinator:
+    """Decides whether this process polls and keeps its snapshots in sync with the others"""
+
+    def __init__(self):
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+        self.store: Optional[SharedStore] = None
+        self.leader = False
+        self.elections = 0
+        self.syncs = 0
+        self.errors = 0
+        self._on_leader: Optional[Callable[[], Awaitable[None]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._purged_at = 0.0
+
+    async def start(self, on_leader: Callable[[], Awaitable[None]]):
+        """``on_leader`` prepares and starts the poller once this process is to poll"""
+        self._on_leader = on_leader
+        self.store = shared_store()
+        if self.store is None:
+            self.leader = True
+            await on_leader()
+            return
+        poller.shared = self.store
+        poller.mirroring = True
+        self._task = asyncio.create_task(self._run(), name="worker-coordinator")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await poller.stop()
+        if self.store is not None and self.leader:
+            # Let another worker take over right away instead of after the TTL
+            await run_github(self.store.release, LEASE_NAME, self.holder)
+        self.leader = False
+
+    async def _lead(self):
+        logger.info(f"Worker {self.holder} is now polling GitHub")
+        self.elections += 1
+        await poller.mirror_shared()
+        poller.mirroring = False
+        self.leader = True
+        await poller.adopt(*await run_github(poller.read_shared, run_store.list_repos))
+        await self._on_leader()
+
+    async def _follow(self):
+        logger.warning(f"Worker {self.holder} lost the poller lease; mirroring snapshots instead")
+        self.leader = False
+        await poller.stop()
+        poller.mirroring = True
+
+    async def _run(self):
+        while True:
+            try:
+                # Shared-store and SQLite calls block, so each runs on the worker pool
+                held = await run_github(self.store.lease, LEASE_NAME, self.holder, LEADER_LEASE_TTL)
+                if held and not self.leader:
+                    await self._lead()
+                elif not held and self.leader:
+                    await self._follow()
+                elif self.leader:
+                    await poller.adopt(*await run_github(poller.read_shared, run_store.list_repos))
+                else:
+                    await poller.mirror_shared()
+                    poller.store.expire(time.monotonic())
+                if self.leader and time.monotonic() - self._purged_at > PURGE_INTERVAL:
+                    await run_github(self.store.purge)
+                    self._purged_at = time.monotonic()
+                self.syncs += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Error syncing shared state: {str(e)}")
+            await asyncio.sleep(SHARED_SYNC_INTERVAL)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker": self.holder,
+            "role": poller.role,
+            "leader": self.leader,
+            "elections": self.elections,
+            "syncs": self.syncs,
+            "errors": self.errors,
+            "shared_state": self.store.stats() if self.store is not None else None,
+        }
+
+
+coordinator = WorkerCoordinator()
@@ -0,0 +1,118 @@
+"""
+Concurrent load benchmark for the dashboard API against the local mock GitHub.
+
+Starts :mod:`benchmarks.mock_github` in-process, points the app at it and fires
+concurrent requests through an in-process ASGI transport, reporting latency
+percentiles and throughput per mode:
+
+* ``inline``: GitHub calls run directly on the event loop (the old behaviour
+  of calling PyGithub inside ``async def`` routes)
+* ``offload``: GitHub calls run on the bounded worker pool (``run_github``)
+
+Usage::
+
+    python -m benchmarks.bench_api --latency-ms 50 --concurrency 20 --requests 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_github import MockDataset, MockGitHubServer  # noqa: E402
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100.0 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+async def _inline(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+async def run_load(app, paths: List[str], total: int, concurrency: int) -> Dict[str, float]:
+    import httpx
+
+    latencies: List[float] = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(paths[i % len(paths)])
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def worker():
+            nonlocal errors
+            while True:
+                try:
+                    path = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+        "rps": total / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard API load benchmark")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="mock GitHub latency per call")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--repos", type=int, default=5)
+    parser.add_argument("--workflows", type=int, default=4)
+    parser.add_argument("--path", action="append", help="API path(s) to hit (default: /api/workflows for every repo)")
+    parser.add_argument("--mode", choices=["inline", "offload", "both"], default="both")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    dataset = MockDataset(repos=args.repos, workflows=args.workflows)
+    with MockGitHubServer(latency_ms=args.latency_ms, dataset=dataset) as server:
+        os.environ["GITHUB_API_URL"] = server.url
+        os.environ.setdefault("GITHUB_TOKEN", "mock-token")
+
+        import app.main as dashboard
+
+        paths = args.path or [f"/api/workflows/{name}" for name in dataset.repos]
+        offload = dashboard.run_github
+        modes = ["inline", "offload"] if args.mode == "both" else [args.mode]
+
+        print(f"mock latency={args.latency_ms}ms concurrency={args.concurrency} requests={args.requests}")
+        print(f"{'mode':<8} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'req/s':>8} {'errors':>7} {'gh calls':>9}")
+        for mode in modes:
+            dashboard.run_github = _inline if mode == "inline" else offload
+            calls_before = server.requests
+            result = asyncio.run(run_load(dashboard.app, paths, args.requests, args.concurrency))
+            print(
+                f"{mode:<8} {result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['mean_ms']:>9.1f} "
+                f"{result['rps']:>8.1f} {result['errors']:>7} {server.requests - calls_before:>9}"
+            )
+        dashboard.run_github = offload
+
+
+if __name__ == "__main__":
+    main()
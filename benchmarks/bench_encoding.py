@@ -0,0 +1,129 @@
+"""
+Response encoding benchmark: bytes on the wire and serialization CPU of the
+status endpoints, with FastAPI's default encoder and with :mod:`app.encoding`.
+
+The payloads are the real ``/api/workflows``, ``/api/runs`` and
+``/api/dashboard`` responses for the mock dataset, served in-process. Each
+variant encodes every payload ``--rounds`` times and reports the mean body
+size and CPU time per response:
+
+- ``default``: ``jsonable_encoder`` and ``json.dumps``, as before
+- ``orjson``: ``dumps`` alone (``json`` when orjson is not installed)
+- ``gzip`` / ``br``: compressed as for a browser (br needs the brotli package)
+- ``fields+gzip``: ``fields=status,conclusion,created_at,updated_at``, compressed
+- ``304``: a revalidation of an unchanged response (hash only, no body)
+
+It then checks over HTTP that the endpoints compress and answer an
+``If-None-Match`` of their ``ETag`` with ``304 Not Modified``.
+
+Usage::
+
+    python -m benchmarks.bench_encoding --repos 20 --runs 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_github import InProcessSource, MockDataset, MockGitHubServer  # noqa: E402
+
+UI_FIELDS = "status,conclusion,created_at,updated_at"
+
+
+def _measure(payloads: List[Any], encode: Callable[[Any], bytes], rounds: int) -> Dict[str, float]:
+    sizes = [len(encode(payload)) for payload in payloads]
+    started = time.process_time()
+    for _ in range(rounds):
+        for payload in payloads:
+            encode(payload)
+    cpu = time.process_time() - started
+    return {"bytes": sum(sizes) / len(sizes), "cpu_us": cpu / (rounds * len(payloads)) * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response encoding benchmark")
+    parser.add_argument("--repos", type=int, default=20)
+    parser.add_argument("--workflows", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=50, help="runs per workflow in the mock")
+    parser.add_argument("--per-page", type=int, default=20, help="runs per /api/runs response")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    scratch = tempfile.mkdtemp(prefix="dashboard-bench-")
+    os.environ["DATABASE_PATH"] = os.path.join(scratch, "dashboard.db")
+    os.environ["LOG_CACHE_DIR"] = os.path.join(scratch, "logs")
+    os.environ.setdefault("GITHUB_TOKEN", "mock-token")
+
+    import httpx
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    import app.main as dashboard
+    from app import encoding
+    from app.datasource import set_data_source
+    from app.github_data import fetch_workflow_runs, fetch_workflows, load_dashboard
+
+    dataset = MockDataset(repos=args.repos, workflows=args.workflows, runs=args.runs)
+    set_data_source(InProcessSource(MockGitHubServer(dataset=dataset, bind=False)))
+    repos = [{"owner": r["owner"]["login"], "name": r["name"]} for r in dataset.repos.values()]
+
+    payloads = {
+        "workflows": [fetch_workflows(r["owner"], r["name"], 5) for r in repos],
+        "runs": [
+            fetch_workflow_runs(*full_name.split("/"), str(workflow["id"]), args.per_page)
+            for full_name, workflows in dataset.workflows.items() for workflow in workflows
+        ],
+        "dashboard": [{"repos": asyncio.run(load_dashboard(repos))}],
+    }
+
+    fields = encoding.parse_fields(UI_FIELDS)
+    variants: Dict[str, Callable[[Any], bytes]] = {
+        "default": lambda p: JSONResponse(jsonable_encoder(p)).body,
+        "orjson": encoding.dumps,
+        "gzip": lambda p: encoding.compress(encoding.dumps(p), "gzip"),
+    }
+    if encoding.brotli is not None:
+        variants["br"] = lambda p: encoding.compress(encoding.dumps(p), "br")
+    variants["fields+gzip"] = lambda p: encoding.compress(encoding.dumps(encoding.project(p, fields)), "gzip")
+    variants["304"] = lambda p: encoding._digest(encoding.dumps(p)) and b""
+
+    print(f"serializer={'orjson' if encoding.orjson is not None else 'json'} "
+          f"brotli={'yes' if encoding.brotli is not None else 'no'} repos={args.repos} "
+          f"runs/page={args.per_page} rounds={args.rounds}")
+    print(f"{'endpoint':<10} {'variant':<12} {'bytes':>10} {'vs default':>10} {'cpu us':>9} {'vs default':>10}")
+    for endpoint, items in payloads.items():
+        baseline = None
+        for name, encode in variants.items():
+            result = _measure(items, encode, args.rounds)
+            baseline = baseline or result
+            print(f"{endpoint:<10} {name:<12} {result['bytes']:>10.0f} "
+                  f"{result['bytes'] / baseline['bytes']:>9.1%} {result['cpu_us']:>9.1f} "
+                  f"{result['cpu_us'] / baseline['cpu_us']:>9.1%}")
+
+    async def check():
+        transport = httpx.ASGITransport(app=dashboard.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://dashboard") as client:
+            full_name, workflows = next(iter(dataset.workflows.items()))
+            path = f"/api/runs/{full_name}/{workflows[0]['id']}?per_page={args.per_page}"
+            first = await client.get(path, headers={"Accept-Encoding": "gzip"})
+            again = await client.get(path, headers={"Accept-Encoding": "gzip",
+                                                    "If-None-Match": first.headers["etag"]})
+            print(f"GET {path}: {first.status_code} {first.headers.get('content-encoding')} "
+                  f"{first.headers['content-length']} bytes, revalidated: {again.status_code} "
+                  f"{len(again.content)} bytes")
+            if again.status_code != 304:
+                sys.exit(1)
+
+    asyncio.run(check())
+
+
+if __name__ == "__main__":
+    main()
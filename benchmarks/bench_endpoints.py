@@ -0,0 +1,147 @@
+"""
+Endpoint benchmark suite: throughput and latency of the main dashboard API
+endpoints under concurrent load, against the offline mock GitHub.
+
+Each scenario (``my-repos``, ``workflows``, ``runs``, ``health``) is warmed up
+once per path, then hit with ``--requests`` requests from ``--concurrency``
+concurrent clients. Results can be saved as JSON (``--output``) and compared
+with a saved run (``--baseline``): the suite exits non-zero when a scenario's
+p95 latency grew past ``--max-slowdown`` times the baseline, it makes clearly
+more GitHub calls per request, or it returns errors it didn't before.
+
+Usage::
+
+    python -m benchmarks.bench_endpoints --latency-ms 50 --concurrency 20 --requests 200
+    python -m benchmarks.bench_endpoints --output benchmarks/baseline.json
+    python -m benchmarks.bench_endpoints --baseline benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_api import run_load  # noqa: E402
+from benchmarks.mock_github import InProcessSource, MockDataset, MockGitHubServer  # noqa: E402
+
+SCENARIOS = ("my-repos", "workflows", "runs", "health")
+# Latency differences below this many milliseconds are noise, not regressions
+MIN_REGRESSION_MS = 5.0
+
+
+def scenario_paths(name: str, dataset: MockDataset) -> List[str]:
+    if name == "my-repos":
+        return ["/api/my-repos?limit=100", "/api/my-repos?q=repo-1&limit=50", "/api/my-repos?q=mock&page=2&limit=20"]
+    if name == "workflows":
+        return [f"/api/workflows/{full_name}" for full_name in dataset.repos]
+    if name == "runs":
+        return [
+            f"/api/runs/{full_name}/{workflow['id']}?per_page=5"
+            for full_name, workflows in dataset.workflows.items()
+            for workflow in workflows
+        ]
+    return ["/health"]
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            max_slowdown: float) -> List[str]:
+    """Regressions of ``results`` against ``baseline``, one message each"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * max_slowdown and result["p95_ms"] - base["p95_ms"] > MIN_REGRESSION_MS:
+            regressions.append(f"{name}: p95 {result['p95_ms']:.1f}ms vs {base['p95_ms']:.1f}ms baseline")
+        # Background refreshes add some timing-dependent calls, hence the slack
+        if result["github_calls_per_request"] > base["github_calls_per_request"] * 1.5 + 0.05:
+            regressions.append(
+                f"{name}: {result['github_calls_per_request']:.2f} GitHub calls per request "
+                f"vs {base['github_calls_per_request']:.2f} baseline"
+            )
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{name}: {result['errors']} errors vs {base['errors']} baseline")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard endpoint benchmark suite")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="mock GitHub latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="random +/- variation of the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of GitHub calls that fail")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--repos", type=int, default=20)
+    parser.add_argument("--workflows", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="scenario(s) to run (default: all)")
+    parser.add_argument("--in-process", action="store_true",
+                        help="serve GitHub data from the mock in-process instead of over HTTP")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results to compare against; exit 1 on regressions")
+    parser.add_argument("--max-slowdown", type=float, default=2.0,
+                        help="p95 latency allowed, as a multiple of the baseline")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    scratch = tempfile.mkdtemp(prefix="dashboard-bench-")
+    os.environ["DATABASE_PATH"] = os.path.join(scratch, "dashboard.db")
+    os.environ["LOG_CACHE_DIR"] = os.path.join(scratch, "logs")
+
+    dataset = MockDataset(repos=args.repos, workflows=args.workflows, runs=args.runs)
+    with MockGitHubServer(latency_ms=args.latency_ms, dataset=dataset, jitter_ms=args.jitter_ms,
+                          error_rate=args.error_rate, rate_limit=1_000_000) as server:
+        os.environ["GITHUB_API_URL"] = server.url
+        os.environ.setdefault("GITHUB_TOKEN", "mock-token")
+
+        import app.main as dashboard
+        from app.datasource import set_data_source
+
+        if args.in_process:
+            set_data_source(InProcessSource(server))
+
+        config = {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "scenario")}
+        print(f"mock latency={args.latency_ms}ms concurrency={args.concurrency} requests={args.requests} "
+              f"repos={args.repos} data={'in-process' if args.in_process else 'http'}")
+        print(f"{'scenario':<10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean ms':>8} {'req/s':>8} "
+              f"{'errors':>7} {'gh/req':>7}")
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for name in args.scenario or SCENARIOS:
+            paths = scenario_paths(name, dataset)
+            # One request per path first, so the numbers are for warm caches
+            asyncio.run(run_load(dashboard.app, paths, len(paths), args.concurrency))
+            calls_before = server.requests
+            result = asyncio.run(run_load(dashboard.app, paths, args.requests, args.concurrency))
+            result["github_calls_per_request"] = (server.requests - calls_before) / args.requests
+            results[name] = {k: round(v, 3) if isinstance(v, float) else v for k, v in result.items()}
+            print(
+                f"{name:<10} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+                f"{result['mean_ms']:>8.1f} {result['rps']:>8.1f} {result['errors']:>7} "
+                f"{result['github_calls_per_request']:>7.2f}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.max_slowdown)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+REST versus GraphQL status backend, against the mock GitHub over HTTP.
+
+Each backend runs in a fresh process (empty response cache and run history)
+and loads the status of ``--repos`` repositories the way the dashboard does:
+one batched ``load_dashboard`` call, cold and then ``--rounds`` times warm,
+and the per-repository ``/api/workflows`` loop of the frontend. For every
+phase it reports the time taken, GitHub calls and rate-limit points spent
+(REST: requests that were not ``304 Not Modified``; GraphQL: query cost), then
+checks both backends report the same latest run for every workflow.
+
+Usage::
+
+    python -m benchmarks.bench_graphql --repos 100 --latency-ms 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BACKENDS = ("rest", "graphql")
+
+
+def _spent(server) -> Dict[str, int]:
+    core = sum(server.rate_limit - n for key, n in server.budgets.items() if not key.startswith("graphql:"))
+    graphql = sum(server.rate_limit - n for key, n in server.budgets.items() if key.startswith("graphql:"))
+    return {"requests": server.requests, "core": core, "graphql": graphql}
+
+
+def run_backend(args) -> Dict[str, Any]:
+    """One backend's phases, in this (fresh) process"""
+    import logging
+    logging.disable(logging.WARNING)
+
+    scratch = tempfile.mkdtemp(prefix="dashboard-bench-")
+    os.environ["DATABASE_PATH"] = os.path.join(scratch, "dashboard.db")
+    os.environ["LOG_CACHE_DIR"] = os.path.join(scratch, "logs")
+    os.environ["GITHUB_STATUS_BACKEND"] = args.backend
+
+    from benchmarks.mock_github import MockDataset, MockGitHubServer
+
+    dataset = MockDataset(repos=args.repos, workflows=args.workflows, runs=args.runs)
+    with MockGitHubServer(latency_ms=args.latency_ms, dataset=dataset, rate_limit=1_000_000) as server:
+        os.environ["GITHUB_API_URL"] = server.url
+        os.environ.setdefault("GITHUB_TOKEN", "mock-token")
+
+        from app.github_data import fetch_workflows, load_dashboard
+
+        repos = [{"owner": r["owner"]["login"], "name": r["name"]} for r in dataset.repos.values()]
+        # Token validation is not part of any phase
+        fetch_workflows(repos[0]["owner"], repos[0]["name"])
+        phases = {}
+
+        def measure(name: str, func):
+            before = _spent(server)
+            started = time.perf_counter()
+            result = func()
+            after = _spent(server)
+            phases[name] = {
+                "ms": round((time.perf_counter() - started) * 1000, 1),
+                **{key: after[key] - before[key] for key in after},
+            }
+            return result
+
+        statuses = measure("dashboard-cold", lambda: asyncio.run(load_dashboard(repos)))
+        measure("dashboard-warm", lambda: [asyncio.run(load_dashboard(repos)) for _ in range(args.rounds)])
+        measure("workflows-loop", lambda: [fetch_workflows(r["owner"], r["name"]) for r in repos])
+
+    latest = {
+        status["full_name"]: {
+            str(w["id"]): [w["latest_run"]["id"], w["latest_run"]["status"], w["latest_run"]["conclusion"]]
+            for w in status["workflows"] if w.get("latest_run")
+        }
+        for status in statuses
+    }
+    errors = sum(1 for status in statuses if status.get("error"))
+    return {"phases": phases, "latest": latest, "errors": errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="REST versus GraphQL status backend")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="mock GitHub latency per call")
+    parser.add_argument("--repos", type=int, default=50)
+    parser.add_argument("--workflows", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3, help="warm dashboard loads")
+    parser.add_argument("--backend", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(run_backend(args)))
+        return
+
+    results = {}
+    for backend in BACKENDS:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_graphql", *sys.argv[1:], "--backend", backend],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results[backend] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"mock latency={args.latency_ms}ms repos={args.repos} workflows={args.workflows} rounds={args.rounds}")
+    print(f"{'backend':<8} {'phase':<15} {'ms':>9} {'gh calls':>9} {'core pts':>9} {'gql pts':>8}")
+    for backend, result in results.items():
+        for phase, figures in result["phases"].items():
+            print(f"{backend:<8} {phase:<15} {figures['ms']:>9.1f} {figures['requests']:>9} "
+                  f"{figures['core']:>9} {figures['graphql']:>8}")
+
+    rest, graphql = results["rest"]["latest"], results["graphql"]["latest"]
+    mismatches = [
+        f"{repo} workflow {workflow}"
+        for repo, workflows in rest.items()
+        for workflow, run in workflows.items()
+        if graphql.get(repo, {}).get(workflow) != run
+    ]
+    print(f"latest runs compared: {sum(len(w) for w in rest.values())}, mismatches: {len(mismatches)}, "
+          f"errors: rest={results['rest']['errors']} graphql={results['graphql']['errors']}")
+    for mismatch in mismatches[:10]:
+        print(f"MISMATCH {mismatch}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
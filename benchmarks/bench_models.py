@@ -0,0 +1,117 @@
+"""
+Run model benchmark: per-run parse and render time of :mod:`app.models`, and
+the memory of ``--runs`` cached runs held three ways.
+
+The runs are the mock dataset's, round-tripped through JSON so that every run
+has its own actor, commit and repository objects, as a parsed GitHub response
+does; ``--actors`` distinct users trigger them. Timings are the best of
+``--rounds`` passes over all runs, in microseconds per run:
+
+- ``parse``: ``Run(raw)``, one pass over the raw JSON
+- ``memo hit``: ``Run.parse(raw)`` for a run parsed before
+- ``payload``: rendering the ``/api/runs`` shape from a parsed run
+- ``status``: rendering the dashboard's compact status from a parsed run
+
+Memory is measured with :mod:`tracemalloc`, for the raw JSON as the response
+cache keeps it, the ``/api/runs`` payload dicts built from it, and the
+:class:`~app.models.Run` objects (with their interned actors).
+
+Usage::
+
+    python -m benchmarks.bench_models --runs 10000 --actors 20
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_github import MockDataset  # noqa: E402
+
+WORKFLOWS = 4
+RUNS_PER_WORKFLOW = 100
+
+
+def build_runs(count: int, actors: int) -> List[Dict[str, Any]]:
+    repos = -(-count // (WORKFLOWS * RUNS_PER_WORKFLOW))
+    dataset = MockDataset(repos=repos, workflows=WORKFLOWS, runs=RUNS_PER_WORKFLOW)
+    runs = [run for repo_runs in dataset.runs.values() for run in repo_runs][:count]
+    for i, run in enumerate(runs):
+        user = i % actors
+        actor = {"login": f"user-{user}", "id": 10 + user, "avatar_url": f"https://avatars.example/u/{10 + user}"}
+        run["actor"] = run["triggering_actor"] = actor
+    # Separate objects per run, like a parsed response
+    return json.loads(json.dumps(runs))
+
+
+def _per_run_us(runs: List[Dict[str, Any]], func: Callable[[Dict[str, Any]], Any], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for raw in runs:
+            func(raw)
+        best = min(best, time.perf_counter() - started)
+    return best / len(runs) * 1e6
+
+
+def _allocated(build: Callable[[], Any]) -> int:
+    """Bytes still allocated by what ``build`` returns"""
+    gc.collect()
+    tracemalloc.start()
+    held = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run model benchmark")
+    parser.add_argument("--runs", type=int, default=10000)
+    parser.add_argument("--actors", type=int, default=20, help="distinct users triggering the runs")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault("RUN_MODEL_CACHE_SIZE", str(max(args.runs, 20000)))
+    from app.models import Run, run_models
+
+    runs = build_runs(args.runs, max(args.actors, 1))
+    owner, repo = runs[0]["head_repository"]["full_name"].split("/")
+    models = [Run(raw) for raw in runs]
+    for raw in runs:
+        Run.parse(raw)
+
+    timings = {
+        "parse": _per_run_us(runs, Run, args.rounds),
+        "memo hit": _per_run_us(runs, Run.parse, args.rounds),
+        "payload": _per_run_us(models, lambda run: run.payload(owner, repo), args.rounds),
+        "status": _per_run_us(models, lambda run: run.status_payload(), args.rounds),
+    }
+    print(f"runs={len(runs)} actors={args.actors} rounds={args.rounds}")
+    print(f"{'step':<10} {'us/run':>8}")
+    for name, us in timings.items():
+        print(f"{name:<10} {us:>8.2f}")
+
+    del models
+    run_models.clear()
+    raw_json = json.dumps(runs)
+    memory = {
+        "raw JSON": _allocated(lambda: json.loads(raw_json)),
+        "payloads": _allocated(lambda: [Run(raw).payload(owner, repo) for raw in runs]),
+        "Run models": _allocated(lambda: [Run(raw) for raw in runs]),
+    }
+    per = 10000 / len(runs)
+    print(f"{'held as':<12} {'MiB/10k runs':>12} {'bytes/run':>10} {'vs raw':>8}")
+    for name, size in memory.items():
+        print(f"{name:<12} {size * per / 2**20:>12.2f} {size / len(runs):>10.0f} "
+              f"{size / memory['raw JSON']:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
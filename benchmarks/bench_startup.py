@@ -0,0 +1,185 @@
+"""
+Start-up benchmark: how fast a fresh dashboard process imports and serves.
+
+``import`` times ``import app.main`` in ``--imports`` fresh interpreters with
+GitHub unreachable, which must neither fail nor wait on the network. Each
+``boot`` scenario then starts uvicorn on a database with ``--repos``
+repositories on the dashboard and measures the time from spawning the process
+to the first ``/health/live`` answer, the import and boot figures the app
+reports in ``/api/startup/stats``, how long the background warm-up took, and
+the time and GitHub calls of the first ``/api/dashboard`` request:
+
+- ``offline``: GitHub unreachable; the app must still come up (no dashboard
+  request, it would only measure connection retries)
+- ``cold``: mock GitHub, ``PREWARM_CACHE=false``
+- ``prewarmed``: mock GitHub, the dashboard request waits for the warm-up
+
+Usage::
+
+    python -m benchmarks.bench_startup --repos 20 --latency-ms 50
+    python -m benchmarks.bench_startup --max-boot-ms 3000  # exit 1 when slower
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_github import MockDataset, MockGitHubServer  # noqa: E402
+
+# Nothing listens there, so every GitHub call fails at once
+UNREACHABLE = "http://127.0.0.1:9"
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def _environment(scratch: str, api_url: str, **extra: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        DATABASE_PATH=os.path.join(scratch, "dashboard.db"),
+        LOG_CACHE_DIR=os.path.join(scratch, "logs"),
+        GITHUB_API_URL=api_url,
+        GITHUB_TOKEN=env.get("GITHUB_TOKEN", "mock-token"),
+        PYTHONPATH=ROOT,
+        **extra,
+    )
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _request(url: str, body: Optional[Dict[str, Any]] = None, timeout: float = 30.0):
+    """``(status, headers, JSON body)``, or ``(None, {}, None)`` while nothing listens"""
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, dict(response.headers), json.loads(response.read() or b"null")
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), None
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return None, {}, None
+
+
+def measure_imports(count: int) -> List[float]:
+    times = []
+    for _ in range(count):
+        scratch = tempfile.mkdtemp(prefix="dashboard-bench-")
+        output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], env=_environment(scratch, UNREACHABLE),
+                                cwd=ROOT, check=True, capture_output=True, text=True, timeout=60).stdout
+        times.append(float(output.strip().splitlines()[-1]) * 1000)
+    return times
+
+
+def seed_repos(scratch: str, repos: List[Dict[str, str]]):
+    """Put ``repos`` on the dashboard in a fresh database, without starting the app"""
+    code = ("import json, sys\nfrom app.database import run_store\n"
+            "for r in json.load(sys.stdin): run_store.add_repo(r['owner'], r['name'])\nrun_store.close()")
+    subprocess.run([sys.executable, "-c", code], input=json.dumps(repos), env=_environment(scratch, UNREACHABLE),
+                   cwd=ROOT, check=True, capture_output=True, text=True, timeout=60)
+
+
+def boot(api_url: str, repos: List[Dict[str, str]], prewarm: bool, wait_for_warmup: bool,
+         server: Optional[MockGitHubServer] = None) -> Dict[str, Any]:
+    """Start uvicorn and time it; the dashboard request is only made with a ``server`` to answer it"""
+    scratch = tempfile.mkdtemp(prefix="dashboard-bench-")
+    seed_repos(scratch, repos)
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = _environment(scratch, api_url, PREWARM_CACHE="true" if prewarm else "false")
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while _request(f"{base}/health/live", timeout=1.0)[0] != 200:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {process.returncode}")
+            if time.perf_counter() - started > 60:
+                raise RuntimeError("no answer from /health/live within 60s")
+            time.sleep(0.005)
+        live_ms = (time.perf_counter() - started) * 1000
+
+        stats = _request(f"{base}/api/startup/stats")[2]
+        while wait_for_warmup and stats["warmup_seconds"] is None:
+            time.sleep(0.02)
+            stats = _request(f"{base}/api/startup/stats")[2]
+
+        status = dashboard_ms = calls = None
+        if server is not None:
+            calls_before = server.requests
+            request_started = time.perf_counter()
+            status = _request(f"{base}/api/dashboard", {"repos": repos})[0]
+            dashboard_ms = round((time.perf_counter() - request_started) * 1000, 1)
+            calls = server.requests - calls_before
+        stats = _request(f"{base}/api/startup/stats")[2]
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {
+        "live_ms": round(live_ms, 1),
+        "import_ms": round(stats["import_seconds"] * 1000, 1),
+        "boot_ms": round(stats["boot_seconds"] * 1000, 1),
+        "warmup_ms": round(stats["warmup_seconds"] * 1000, 1) if stats["warmup_seconds"] is not None else None,
+        "dashboard_status": status,
+        "dashboard_ms": dashboard_ms,
+        "dashboard_github_calls": calls,
+        "warmup_error": stats["last_error"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard start-up benchmark")
+    parser.add_argument("--imports", type=int, default=5, help="fresh interpreters importing app.main")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="mock GitHub latency per call")
+    parser.add_argument("--repos", type=int, default=20, help="repositories on the dashboard")
+    parser.add_argument("--workflows", type=int, default=4)
+    parser.add_argument("--max-boot-ms", type=float, help="exit 1 when any process took longer to answer")
+    args = parser.parse_args()
+
+    imports = measure_imports(args.imports)
+    print(f"import app.main (GitHub unreachable), {args.imports} runs: "
+          f"median {statistics.median(imports):.1f}ms, min {min(imports):.1f}ms, max {max(imports):.1f}ms")
+
+    dataset = MockDataset(repos=args.repos, workflows=args.workflows)
+    repos = [{"owner": r["owner"]["login"], "name": r["name"]} for r in dataset.repos.values()]
+    results: Dict[str, Dict[str, Any]] = {}
+    results["offline"] = boot(UNREACHABLE, repos, prewarm=True, wait_for_warmup=False)
+    with MockGitHubServer(latency_ms=args.latency_ms, dataset=dataset, rate_limit=1_000_000) as server:
+        results["cold"] = boot(server.url, repos, prewarm=False, wait_for_warmup=False, server=server)
+        results["prewarmed"] = boot(server.url, repos, prewarm=True, wait_for_warmup=True, server=server)
+
+    print(f"mock latency={args.latency_ms}ms repos={args.repos} workflows={args.workflows}")
+    print(f"{'scenario':<10} {'live ms':>8} {'import':>8} {'boot':>8} {'warm-up':>8} "
+          f"{'dash ms':>8} {'status':>6} {'gh calls':>8}")
+    for name, r in results.items():
+        figures = [r["warmup_ms"], r["dashboard_ms"], r["dashboard_status"], r["dashboard_github_calls"]]
+        warmup, dashboard, status, calls = ("-" if value is None else value for value in figures)
+        print(f"{name:<10} {r['live_ms']:>8.1f} {r['import_ms']:>8.1f} {r['boot_ms']:>8.1f} {warmup:>8} "
+              f"{dashboard:>8} {status:>6} {calls:>8}")
+
+    if args.max_boot_ms is not None:
+        slow = [name for name, r in results.items() if r["live_ms"] > args.max_boot_ms]
+        for name in slow:
+            print(f"SLOW {name}: {results[name]['live_ms']:.1f}ms to answer, over {args.max_boot_ms:.0f}ms")
+        if slow:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
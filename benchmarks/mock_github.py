@@ -0,0 +1,745 @@
+"""
+Local mock of the GitHub REST API endpoints used by the dashboard.
+
+Serves a deterministic synthetic dataset (repositories, workflows, runs, jobs,
+job logs and commits) with keep-alive connections, GitHub-style pagination ``Link``
+headers, an enforced rate limit with its headers, ETags / ``304 Not
+Modified`` and a configurable per-request latency. Job logs are redirected to
+a blob URL that supports ``Range`` requests, like GitHub's; jobs listed in
+``MockGitHubServer.live_jobs`` are in progress and their logs grow over time.
+
+Latency can be jittered, and errors injected at random (``error_rate``) or
+for paths matching ``fail_paths``.
+
+``POST /graphql`` answers the dashboard's two GraphQL queries (see
+app.graphql) from the same dataset: the query shape is told apart by its
+variables, not parsed. Every token has its own rate-limit budget, like on GitHub. GitHub App
+installations (``/app/installations``) mint installation tokens that expire
+after ``token_ttl`` seconds; requests with an expired one get a 401.
+
+Run standalone::
+
+    python -m benchmarks.mock_github --port 9100 --latency-ms 50
+
+and point the dashboard at it with ``GITHUB_API_URL=http://127.0.0.1:9100``,
+or serve it in-process, without sockets, with
+``GITHUB_DATA_SOURCE=benchmarks.mock_github:InProcessSource``.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import requests
+from github import GithubException
+from github.Requester import Requester
+from requests.structures import CaseInsensitiveDict
+
+from app.datasource import DataSource
+
+OWNER = "mock-org"
+BASE_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+# Base URL of a server that isn't bound to a socket
+IN_PROCESS_URL = "http://mock-github.invalid"
+
+
+def _ts(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _sha(*parts: Any) -> str:
+    return hashlib.sha1("/".join(str(p) for p in parts).encode()).hexdigest()
+
+
+class MockDataset:
+    """Deterministic repositories, workflows, runs (with jobs) and commits"""
+
+    def __init__(self, repos: int = 5, workflows: int = 4, runs: int = 20, jobs: int = 3,
+                 log_lines: int = 2000):
+        self.jobs_per_run = jobs
+        self.log_lines = log_lines
+        self._logs: Dict[int, bytes] = {}
+        self.repos: Dict[str, Dict[str, Any]] = {}
+        self.workflows: Dict[str, List[Dict[str, Any]]] = {}
+        self.runs: Dict[str, List[Dict[str, Any]]] = {}
+        self.commits: Dict[str, Dict[str, Any]] = {}
+        actor = {"login": "octocat", "id": 1, "avatar_url": "https://avatars.example/u/1"}
+
+        for r in range(repos):
+            name = f"repo-{r}"
+            full_name = f"{OWNER}/{name}"
+            self.repos[full_name] = {
+                "id": 1000 + r,
+                "name": name,
+                "full_name": full_name,
+                "private": r % 2 == 0,
+                "description": f"Mock repository number {r}",
+                "owner": {"login": OWNER, "id": 99, "avatar_url": "https://avatars.example/u/99"},
+                "url": f"https://api.github.com/repos/{full_name}",
+                "html_url": f"https://github.com/{full_name}",
+                "stargazers_count": r * 3,
+                "forks_count": r,
+                "language": "Python",
+                "default_branch": "main",
+                "updated_at": _ts(BASE_TIME + timedelta(days=r)),
+            }
+            repo_workflows = []
+            repo_runs = []
+            for w in range(workflows):
+                workflow_id = (r + 1) * 100 + w
+                repo_workflows.append({
+                    "id": workflow_id,
+                    "node_id": f"W_{workflow_id}",
+                    "name": f"Workflow {w}",
+                    "path": f".github/workflows/workflow-{w}.yml",
+                    "state": "active",
+                    "created_at": _ts(BASE_TIME),
+                    "updated_at": _ts(BASE_TIME),
+                    "url": f"https://api.github.com/repos/{full_name}/actions/workflows/{workflow_id}",
+                    "html_url": f"https://github.com/{full_name}/blob/main/.github/workflows/workflow-{w}.yml",
+                    "badge_url": f"https://github.com/{full_name}/workflows/Workflow%20{w}/badge.svg",
+                })
+                for n in range(runs):
+                    run_id = workflow_id * 10000 + n
+                    created = BASE_TIME + timedelta(hours=n, minutes=w)
+                    sha = _sha(full_name, n)
+                    commit = {
+                        "id": sha,
+                        "tree_id": _sha("tree", full_name, n),
+                        "message": f"Commit {n} in {name}\n\nDetails for commit {n}",
+                        "timestamp": _ts(created),
+                        "author": {"name": "Mona Lisa", "email": "mona@example.com"},
+                        "committer": {"name": "Mona Lisa", "email": "mona@example.com"},
+                    }
+                    self.commits[sha] = {
+                        "sha": sha,
+                        "commit": {
+                            "message": commit["message"],
+                            "author": {"name": "Mona Lisa", "email": "mona@example.com", "date": _ts(created)},
+                        },
+                        "html_url": f"https://github.com/{full_name}/commit/{sha}",
+                    }
+                    repo_runs.append({
+                        "id": run_id,
+                        "name": f"Workflow {w}",
+                        "workflow_id": workflow_id,
+                        "run_number": n + 1,
+                        "run_attempt": 1,
+                        "event": "push",
+                        "status": "completed",
+                        "conclusion": "failure" if (n + w) % 5 == 0 else "success",
+                        "head_branch": "main",
+                        "head_sha": sha,
+                        "created_at": _ts(created),
+                        "run_started_at": _ts(created + timedelta(seconds=20)),
+                        "updated_at": _ts(created + timedelta(minutes=3, seconds=n)),
+                        "url": f"https://api.github.com/repos/{full_name}/actions/runs/{run_id}",
+                        "html_url": f"https://github.com/{full_name}/actions/runs/{run_id}",
+                        "actor": actor,
+                        "triggering_actor": actor,
+                        "head_commit": commit,
+                        "head_repository": {"id": 1000 + r, "full_name": full_name},
+                        "repository": {"id": 1000 + r, "full_name": full_name},
+                    })
+            repo_runs.sort(key=lambda run: (run["created_at"], run["id"]), reverse=True)
+            self.workflows[full_name] = repo_workflows
+            self.runs[full_name] = repo_runs
+
+
+    def jobs(self, run: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """A run's jobs, built on demand; the last job carries a failed run's failure"""
+        started = datetime.strptime(run["run_started_at"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+        finished = run["status"] == "completed"
+        jobs = []
+        for j in range(self.jobs_per_run):
+            job_start = started + timedelta(seconds=5 * j)
+            failed = run["conclusion"] == "failure" and j == self.jobs_per_run - 1
+            steps = []
+            for k, name in enumerate(("Set up job", "Checkout", "Run tests", "Complete job")):
+                step_failed = failed and name == "Run tests"
+                steps.append({
+                    "number": k + 1,
+                    "name": name,
+                    "status": "completed" if finished else "in_progress",
+                    "conclusion": ("failure" if step_failed else "success") if finished else None,
+                    "started_at": _ts(job_start + timedelta(seconds=30 * k)),
+                    "completed_at": _ts(job_start + timedelta(seconds=30 * k + 25)) if finished else None,
+                })
+            jobs.append({
+                "id": run["id"] * 100 + j,
+                "run_id": run["id"],
+                "run_attempt": run.get("run_attempt", 1),
+                "name": f"job-{j}",
+                "status": "completed" if finished else "in_progress",
+                "conclusion": ("failure" if failed else "success") if finished else None,
+                "created_at": run["created_at"],
+                "started_at": _ts(job_start),
+                "completed_at": _ts(job_start + timedelta(seconds=115)) if finished else None,
+                "html_url": f"{run['html_url']}/job/{run['id'] * 100 + j}",
+                "runner_name": f"mock-runner-{j % 4}",
+                "labels": ["ubuntu-latest"],
+                "steps": steps,
+            })
+        return jobs
+
+
+    def job(self, full_name: str, job_id: int) -> Optional[Dict[str, Any]]:
+        run_id, j = divmod(job_id, 100)
+        for run in self.runs[full_name]:
+            if run["id"] == run_id:
+                return self.jobs(run)[j] if j < self.jobs_per_run else None
+        return None
+
+    def log(self, job: Dict[str, Any]) -> bytes:
+        """A job's complete log; the failing step of a failed job logs an error"""
+        data = self._logs.get(job["id"])
+        if data is None:
+            started = datetime.strptime(job["started_at"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+            stamp = started.strftime("%Y-%m-%dT%H:%M:%S")
+            lines = []
+            for i in range(self.log_lines):
+                ts = f"{stamp}.{i % 10000000:07d}Z"
+                if i == 0:
+                    lines.append(f"{ts} ##[group]Run tests")
+                elif i == self.log_lines - 1 and job["conclusion"] == "failure":
+                    lines.append(f"{ts} ##[error]Process completed with exit code 1.")
+                elif i % 97 == 0:
+                    lines.append(f"{ts} warning: test_{i:06d} used a deprecated API")
+                else:
+                    lines.append(f"{ts} tests/test_mock.py::test_{i:06d} PASSED")
+            data = ("\n".join(lines) + "\n").encode()
+            if len(self._logs) >= 8:
+                self._logs.pop(next(iter(self._logs)))
+            self._logs[job["id"]] = data
+        return data
+
+
+class MockGitHubServer:
+    """Threaded HTTP server exposing a :class:`MockDataset` like api.github.com"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                 dataset: Optional[MockDataset] = None, rate_limit: int = 5000, live_log_rate: float = 100.0,
+                 jitter_ms: float = 0.0, error_rate: float = 0.0, error_status: int = 502,
+                 fail_paths: Optional[str] = None, seed: int = 0, bind: bool = True, token_ttl: float = 3600.0):
+        self.latency = latency_ms / 1000.0
+        # Latency varies uniformly by up to this much either way
+        self.jitter = jitter_ms / 1000.0
+        # Share of API requests (and paths matching fail_paths, always) answered with error_status
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.fail_paths = re.compile(fail_paths) if fail_paths else None
+        self.random = random.Random(seed)
+        # Job id -> time.monotonic() it started; such jobs run until their log is complete
+        self.live_jobs: Dict[int, float] = {}
+        self.live_log_rate = live_log_rate
+        self.dataset = dataset or MockDataset()
+        self.rate_limit = rate_limit
+        # Requests left per token ("" for requests without one)
+        self.budgets: Dict[str, int] = {}
+        self.reset_at = int(time.time()) + 3600
+        # Installation token -> time.time() it expires at
+        self.token_ttl = token_ttl
+        self.installation_tokens: Dict[str, float] = {}
+        self.requests = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+        # Without binding, responses are only available in-process through respond()
+        self.httpd: Optional[ThreadingHTTPServer] = None
+        if bind:
+            self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+            self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        if self.httpd is None:
+            return IN_PROCESS_URL
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockGitHubServer":
+        if self.httpd is not None:
+            self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Routing ---------------------------------------------------------------
+
+    def route(self, path: str, query: Dict[str, str], token: str = "") -> Tuple[int, Any]:
+        ds = self.dataset
+        if path == "/user":
+            return 200, {"login": "mock-user", "id": 1, "type": "User"}
+        if path == "/rate_limit":
+            remaining = self.budgets.get(token, self.rate_limit)
+            core = {"limit": self.rate_limit, "remaining": remaining, "reset": self.reset_at, "used": 0}
+            return 200, {"resources": {"core": core, "search": core, "graphql": core}, "rate": core}
+        if path == "/app/installations":
+            return 200, [{"id": 1, "app_id": 1, "target_type": "Organization",
+                          "account": {"login": OWNER, "id": 2, "type": "Organization"}}]
+        if path == "/user/repos":
+            repos = list(ds.repos.values())
+            if query.get("visibility") == "private":
+                repos = [r for r in repos if r["private"]]
+            return 200, repos
+
+        m = re.fullmatch(r"/repos/([^/]+/[^/]+)(/.*)?", path)
+        if not m or m.group(1) not in ds.repos:
+            return 404, {"message": "Not Found"}
+        full_name, rest = m.group(1), m.group(2) or ""
+        if rest == "":
+            return 200, ds.repos[full_name]
+        if rest == "/actions/workflows":
+            workflows = ds.workflows[full_name]
+            return 200, {"total_count": len(workflows), "workflows": workflows}
+        m = re.fullmatch(r"/actions/workflows/(\d+)", rest)
+        if m:
+            for w in ds.workflows[full_name]:
+                if w["id"] == int(m.group(1)):
+                    return 200, w
+            return 404, {"message": "Not Found"}
+        m = re.fullmatch(r"/actions/workflows/(\d+)/runs", rest)
+        if m:
+            runs = [r for r in self._filter_runs(ds.runs[full_name], query) if r["workflow_id"] == int(m.group(1))]
+            return 200, {"total_count": len(runs), "workflow_runs": runs}
+        if rest == "/actions/runs":
+            runs = self._filter_runs(ds.runs[full_name], query)
+            return 200, {"total_count": len(runs), "workflow_runs": runs}
+        m = re.fullmatch(r"/actions/runs/(\d+)/attempts/(\d+)/jobs", rest)
+        if m:
+            for run in ds.runs[full_name]:
+                if run["id"] == int(m.group(1)):
+                    jobs = ds.jobs(run)
+                    return 200, {"total_count": len(jobs), "jobs": jobs}
+            return 404, {"message": "Not Found"}
+        m = re.fullmatch(r"/actions/jobs/(\d+)(/logs)?", rest)
+        if m:
+            job = self.job(full_name, int(m.group(1)))
+            if job is None:
+                return 404, {"message": "Not Found"}
+            if m.group(2):
+                return 302, f"{self.url}/_blobs/logs/{full_name}/{job['id']}"
+            return 200, job
+        m = re.fullmatch(r"/actions/runs/(\d+)", rest)
+        if m:
+            for run in ds.runs[full_name]:
+                if run["id"] == int(m.group(1)):
+                    return 200, run
+            return 404, {"message": "Not Found"}
+        m = re.fullmatch(r"/commits/([0-9a-f]{40})", rest)
+        if m and m.group(1) in ds.commits:
+            return 200, ds.commits[m.group(1)]
+        return 404, {"message": "Not Found"}
+
+    def job(self, full_name: str, job_id: int) -> Optional[Dict[str, Any]]:
+        """A job of the dataset, in progress while it is one of the live jobs"""
+        job = self.dataset.job(full_name, job_id)
+        if job is not None and self._live_lines(job_id) is not None:
+            job = {**job, "status": "in_progress", "conclusion": None, "completed_at": None}
+        return job
+
+    def _live_lines(self, job_id: int) -> Optional[int]:
+        """Log lines a live job has written so far, None once it has finished"""
+        started = self.live_jobs.get(job_id)
+        if started is None:
+            return None
+        lines = int((time.monotonic() - started) * self.live_log_rate)
+        return lines if lines < self.dataset.log_lines else None
+
+    def log(self, path: str) -> Optional[bytes]:
+        m = re.fullmatch(r"/_blobs/logs/([^/]+/[^/]+)/(\d+)", path)
+        if not m or m.group(1) not in self.dataset.repos:
+            return None
+        job = self.dataset.job(m.group(1), int(m.group(2)))
+        if job is None:
+            return None
+        data = self.dataset.log(job)
+        lines = self._live_lines(job["id"])
+        if lines is not None:
+            data = b"".join(data.splitlines(keepends=True)[:lines])
+        return data
+
+    @staticmethod
+    def _filter_runs(runs: List[Dict[str, Any]], query: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Apply the ``created`` filter; only the ``>=`` form the dashboard sends is supported"""
+        created = query.get("created")
+        if created and created.startswith(">="):
+            return [r for r in runs if r["created_at"] >= created[2:]]
+        return runs
+
+    def paginate(self, path: str, query: Dict[str, str], body: Any) -> Tuple[Any, Optional[str]]:
+        """Slice list payloads by page/per_page and build a GitHub-style Link header"""
+        items_key = None
+        items = body
+        if isinstance(body, dict):
+            for key in ("workflow_runs", "workflows", "jobs"):
+                if key in body:
+                    items_key, items = key, body[key]
+        if not isinstance(items, list):
+            return body, None
+
+        per_page = min(int(query.get("per_page", 30)), 100)
+        page = max(int(query.get("page", 1)), 1)
+        last_page = max((len(items) + per_page - 1) // per_page, 1)
+        sliced = items[(page - 1) * per_page: page * per_page]
+
+        link = None
+        if page < last_page:
+            def page_url(p):
+                return f"{self.url}{path}?{urlencode({**query, 'page': p})}"
+            link = f'<{page_url(page + 1)}>; rel="next", <{page_url(last_page)}>; rel="last"'
+
+        if items_key:
+            return {**body, items_key: sliced}, link
+        return sliced, link
+
+    def _blob(self, data: Optional[bytes], range_header: Optional[str]) -> Tuple[int, Dict[str, str], bytes]:
+        """A log download, honouring a single ``Range: bytes=start-[end]``"""
+        if data is None:
+            return 404, {}, b""
+        headers = {"Content-Type": "text/plain", "Accept-Ranges": "bytes"}
+        size = len(data)
+        m = re.fullmatch(r"bytes=(\d+)-(\d*)", range_header or "")
+        if not m:
+            return 200, headers, data
+        start = int(m.group(1))
+        end = min(int(m.group(2)) + 1, size) if m.group(2) else size
+        if start >= size:
+            return 416, {"Content-Range": f"bytes */{size}"}, b""
+        return 206, {**headers, "Content-Range": f"bytes {start}-{end - 1}/{size}"}, data[start:end]
+
+    def respond(self, target: str, request_headers: Mapping[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """Status, headers and body for ``GET target`` (path and query string)"""
+        if self.latency or self.jitter:
+            time.sleep(max(self.latency + self.random.uniform(-self.jitter, self.jitter), 0.0))
+        parsed = urlparse(target)
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        path = parsed.path.rstrip("/") or "/"
+        if path.startswith("/_blobs/"):
+            # Pre-signed downloads are not API calls: no token, no rate limit
+            return self._blob(self.log(path), request_headers.get("Range"))
+
+        _, _, token = (request_headers.get("Authorization") or "").partition(" ")
+        if token in self.installation_tokens and self.installation_tokens[token] <= time.time():
+            payload = json.dumps({"message": "Bad credentials"}).encode()
+            return 401, {"Content-Type": "application/json; charset=utf-8"}, payload
+        status, body = self.route(path, query, token)
+        location = link = None
+        if status == 302:
+            location, body = body, None
+        elif status == 200:
+            body, link = self.paginate(path, query, body)
+        # Resource URLs in the dataset point at api.github.com; rewrite them
+        # so that clients following them keep talking to this server
+        payload = json.dumps(body).replace("https://api.github.com", self.url).encode()
+        etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+
+        with self.lock:
+            self.requests += 1
+            injected = path != "/rate_limit" and (
+                (self.fail_paths is not None and self.fail_paths.search(path))
+                or (self.error_rate and self.random.random() < self.error_rate)
+            )
+            remaining = self.budgets.get(token, self.rate_limit)
+            if remaining <= 0 and path != "/rate_limit":
+                # Like GitHub: every request is refused until the window resets
+                status, body = 403, {"message": "API rate limit exceeded for mock-user."}
+                payload = json.dumps(body).encode()
+            elif injected:
+                self.errors += 1
+                status, location = self.error_status, None
+                payload = json.dumps({"message": f"Injected error {self.error_status}"}).encode()
+            not_modified = status == 200 and request_headers.get("If-None-Match") == etag
+            if not_modified:
+                self.not_modified += 1
+            elif status != 403 and path != "/rate_limit":
+                remaining = self.budgets[token] = max(remaining - 1, 0)
+
+        headers = {
+            "Content-Type": "application/json; charset=utf-8",
+            "ETag": etag,
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(self.reset_at),
+            "X-RateLimit-Resource": "core",
+            "X-OAuth-Scopes": "repo, workflow",
+        }
+        if link:
+            headers["Link"] = link
+        if location:
+            headers["Location"] = location
+        if not_modified:
+            return 304, headers, b""
+        return status, headers, payload
+
+    # GraphQL ----------------------------------------------------------------
+
+    @staticmethod
+    def _gql_commit(run: Dict[str, Any]) -> Dict[str, Any]:
+        commit = run["head_commit"]
+        return {"oid": run["head_sha"], "message": commit["message"],
+                "author": {**commit["author"], "user": {"login": run["actor"]["login"],
+                                                        "avatarUrl": run["actor"]["avatar_url"]}}}
+
+    def _gql_run(self, full_name: str, run: Dict[str, Any]) -> Dict[str, Any]:
+        workflow = next(w for w in self.dataset.workflows[full_name] if w["id"] == run["workflow_id"])
+        return {
+            "databaseId": run["id"], "runNumber": run["run_number"], "event": run["event"],
+            "createdAt": run["created_at"], "updatedAt": run["updated_at"], "url": run["html_url"],
+            "file": {"path": workflow["path"]},
+            "workflow": {"id": workflow["node_id"], "databaseId": workflow["id"], "name": workflow["name"],
+                         "state": workflow["state"].upper(), "createdAt": workflow["created_at"],
+                         "updatedAt": workflow["updated_at"]},
+        }
+
+    @staticmethod
+    def _gql_suite(run: Dict[str, Any]) -> Dict[str, Any]:
+        return {"status": run["status"].upper(), "conclusion": (run["conclusion"] or "").upper() or None,
+                "creator": {"login": run["actor"]["login"], "avatarUrl": run["actor"]["avatar_url"]},
+                "branch": {"name": run["head_branch"]}}
+
+    def _gql_repository(self, full_name: str, commits: int, suites: int) -> Dict[str, Any]:
+        runs = self.dataset.runs[full_name]
+        shas = list(dict.fromkeys(run["head_sha"] for run in runs))[:commits]
+        history = []
+        for sha in shas:
+            commit_runs = [run for run in runs if run["head_sha"] == sha][:suites]
+            history.append({**self._gql_commit(commit_runs[0]), "checkSuites": {"nodes": [
+                {**self._gql_suite(run), "workflowRun": self._gql_run(full_name, run)} for run in commit_runs
+            ]}})
+        repo = self.dataset.repos[full_name]
+        return {"nameWithOwner": full_name, "url": repo["html_url"], "defaultBranchRef": {
+            "name": repo["default_branch"], "target": {"history": {"nodes": history}}}}
+
+    def _gql_workflow_runs(self, node_id: str, first: int) -> Optional[Dict[str, Any]]:
+        for full_name, workflows in self.dataset.workflows.items():
+            for workflow in workflows:
+                if workflow["node_id"] == node_id:
+                    runs = [run for run in self.dataset.runs[full_name] if run["workflow_id"] == workflow["id"]]
+                    return {"runs": {"nodes": [
+                        {**self._gql_run(full_name, run),
+                         "checkSuite": {**self._gql_suite(run), "commit": self._gql_commit(run)}}
+                        for run in runs[:first]
+                    ]}}
+        return None
+
+    def graphql(self, body: Mapping[str, Any], request_headers: Mapping[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """``POST /graphql``, costed like GitHub: a point per 100 connection requests"""
+        if self.latency or self.jitter:
+            time.sleep(max(self.latency + self.random.uniform(-self.jitter, self.jitter), 0.0))
+        _, _, token = (request_headers.get("Authorization") or "").partition(" ")
+        variables = body.get("variables") or {}
+        data: Dict[str, Any] = {}
+        errors = []
+        if "workflow" in variables:
+            data["node"] = self._gql_workflow_runs(variables["workflow"], variables.get("runs", 10))
+            requests_made = 1
+        else:
+            commits, suites = variables.get("commits", 10), variables.get("suites", 20)
+            i = 0
+            while f"o{i}" in variables:
+                full_name = f"{variables[f'o{i}']}/{variables[f'n{i}']}"
+                if full_name in self.dataset.repos:
+                    data[f"r{i}"] = self._gql_repository(full_name, commits, suites)
+                else:
+                    data[f"r{i}"] = None
+                    errors.append({"type": "NOT_FOUND", "path": [f"r{i}"],
+                                   "message": f"Could not resolve to a Repository with the name '{full_name}'."})
+                i += 1
+            requests_made = i * (1 + commits)
+        cost = max((requests_made + 99) // 100, 1)
+        with self.lock:
+            self.requests += 1
+            key = f"graphql:{token}"
+            remaining = self.budgets.get(key, self.rate_limit)
+            if remaining < cost:
+                status, payload = 403, {"errors": [{"type": "RATE_LIMITED", "message": "API rate limit exceeded"}]}
+            else:
+                remaining = self.budgets[key] = remaining - cost
+                data["rateLimit"] = {"cost": cost, "remaining": remaining, "limit": self.rate_limit,
+                                     "resetAt": _ts(datetime.fromtimestamp(self.reset_at, timezone.utc))}
+                status, payload = 200, {"data": data, **({"errors": errors} if errors else {})}
+        headers = {
+            "Content-Type": "application/json; charset=utf-8",
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(self.reset_at),
+            "X-RateLimit-Resource": "graphql",
+        }
+        return status, headers, json.dumps(payload).replace("https://api.github.com", self.url).encode()
+
+    def create_installation_token(self, path: str) -> Tuple[int, Dict[str, str], bytes]:
+        """``POST /app/installations/{id}/access_tokens``: a new token for the installation"""
+        if not re.fullmatch(r"/app/installations/1/access_tokens", path):
+            return 404, {"Content-Type": "application/json; charset=utf-8"}, b'{"message": "Not Found"}'
+        with self.lock:
+            self.requests += 1
+            token = f"ghs_mock{len(self.installation_tokens) + 1:04d}"
+            expires_at = time.time() + self.token_ttl
+            self.installation_tokens[token] = expires_at
+        expires = datetime.fromtimestamp(int(expires_at), timezone.utc)
+        payload = json.dumps({"token": token, "expires_at": _ts(expires), "permissions": {"actions": "read"}})
+        return 201, {"Content-Type": "application/json; charset=utf-8"}, payload.encode()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self.reply(*server.respond(self.path, self.headers))
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                path = urlparse(self.path).path
+                if path == "/graphql":
+                    self.reply(*server.graphql(json.loads(body or b"{}"), self.headers))
+                else:
+                    self.reply(*server.create_installation_token(path))
+
+            def reply(self, status: int, headers: Dict[str, str], payload: bytes):
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+
+class InProcessSource(DataSource):
+    """
+    Dashboard data source answered by a :class:`MockGitHubServer` in-process,
+    without sockets. Calls still go through the dashboard's rate limiter and
+    request stats, like calls to GitHub.
+    """
+
+    name = "mock-in-process"
+
+    def __init__(self, server: Optional[MockGitHubServer] = None):
+        self.server = server or MockGitHubServer(bind=False)
+
+    def _get(self, url: str, params: Optional[Mapping[str, Any]],
+             headers: Optional[Mapping[str, str]]) -> Tuple[int, Dict[str, str], bytes]:
+        from app.github_client import current_request_stats, record_github_call
+        from app.ratelimit import rate_limiter
+
+        if url.startswith(self.server.url):
+            url = url[len(self.server.url):]
+        if params:
+            url = f"{url}{'&' if '?' in url else '?'}{urlencode(params)}"
+        rate_limiter.acquire()
+        stats = current_request_stats()
+        if stats is not None:
+            stats.calls += 1
+        started = time.perf_counter()
+        status, response_headers, payload = self.server.respond(url, headers or {})
+        record_github_call("GET", url, status, time.perf_counter() - started)
+        rate_limiter.update(response_headers, refund=status == 304)
+        if status >= 400 and status != 416:
+            data = json.loads(payload) if payload else None
+            raise Requester.createException(status, response_headers, data)
+        return status, response_headers, payload
+
+    def request_json(self, url: str, params: Optional[Mapping[str, Any]] = None,
+                     headers: Optional[Mapping[str, str]] = None) -> Tuple[int, Mapping[str, str], Any]:
+        status, response_headers, payload = self._get(url, params, headers)
+        return status, CaseInsensitiveDict(response_headers), json.loads(payload) if payload else None
+
+    def graphql(self, query: str, variables: Optional[Mapping[str, Any]] = None,
+                owner: Optional[str] = None) -> Dict[str, Any]:
+        from app.github_client import current_request_stats, record_github_call
+        from app.ratelimit import rate_limiter
+
+        rate_limiter.acquire("graphql")
+        stats = current_request_stats()
+        if stats is not None:
+            stats.calls += 1
+        started = time.perf_counter()
+        status, response_headers, payload = self.server.graphql({"query": query, "variables": variables or {}}, {})
+        record_github_call("POST", "/graphql", status, time.perf_counter() - started)
+        rate_limiter.update(response_headers)
+        data = json.loads(payload) if payload else None
+        if status >= 400:
+            raise Requester.createException(status, response_headers, data)
+        return data
+
+    def download(self, path: str, headers: Optional[Mapping[str, str]] = None) -> requests.Response:
+        _, redirect_headers, _ = self._get(path, None, None)
+        location = redirect_headers.get("Location", "")
+        status, response_headers, payload = self.server.respond(location[len(self.server.url):], headers or {})
+        if status >= 400 and status != 416:
+            raise GithubException(status, {"message": f"Download of {path} failed"}, None)
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(response_headers)
+        response._content = payload
+        response._content_consumed = True
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "requests": self.server.requests,
+            "not_modified": self.server.not_modified,
+            "errors": self.server.errors,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--repos", type=int, default=5)
+    parser.add_argument("--workflows", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--jobs", type=int, default=3, help="jobs per run")
+    parser.add_argument("--log-lines", type=int, default=2000, help="lines per job log")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="random +/- variation of the latency")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="requests per hour before 403s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=502)
+    parser.add_argument("--fail-paths", help="regex of API paths that always fail")
+    parser.add_argument("--token-ttl", type=float, default=3600.0, help="lifetime of installation tokens")
+    args = parser.parse_args()
+
+    dataset = MockDataset(repos=args.repos, workflows=args.workflows, runs=args.runs, jobs=args.jobs,
+                          log_lines=args.log_lines)
+    server = MockGitHubServer(args.host, args.port, args.latency_ms, dataset, rate_limit=args.rate_limit,
+                              jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                              error_status=args.error_status, fail_paths=args.fail_paths,
+                              token_ttl=args.token_ttl)
+    print(f"Mock GitHub API listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
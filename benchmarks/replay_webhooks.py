@@ -0,0 +1,126 @@
+"""
+Replay recorded GitHub webhook deliveries against the dashboard.
+
+Each fixture in ``benchmarks/fixtures/webhooks`` holds the ``event`` name, a
+``delivery`` ID and the ``payload`` GitHub sent. Deliveries are signed with
+the given secret exactly like GitHub does and POSTed to ``/webhooks/github``.
+
+Without ``--url`` the dashboard runs in-process against the local mock GitHub:
+the fixtures' repository is loaded first, the deliveries are replayed, and the
+resulting run state is printed together with the GitHub calls it cost.
+
+Usage::
+
+    python -m benchmarks.replay_webhooks
+    python -m benchmarks.replay_webhooks --url http://127.0.0.1:8000 --secret "$GITHUB_WEBHOOK_SECRET"
+"""
+import argparse
+import asyncio
+import glob
+import hashlib
+import hmac
+import json
+import os
+import sys
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_github import MockGitHubServer  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "webhooks")
+
+
+def load_fixtures(paths: List[str]) -> List[Dict[str, Any]]:
+    fixtures = []
+    for path in paths:
+        with open(path) as f:
+            fixture = json.load(f)
+        fixture["body"] = json.dumps(fixture["payload"]).encode()
+        fixtures.append(fixture)
+    return fixtures
+
+
+def signed_headers(secret: str, fixture: Dict[str, Any]) -> Dict[str, str]:
+    signature = hmac.new(secret.encode(), fixture["body"], hashlib.sha256).hexdigest()
+    return {
+        "Content-Type": "application/json",
+        "X-GitHub-Event": fixture["event"],
+        "X-GitHub-Delivery": fixture["delivery"],
+        "X-Hub-Signature-256": f"sha256={signature}",
+    }
+
+
+async def replay(client, secret: str, fixtures: List[Dict[str, Any]]):
+    for fixture in fixtures:
+        response = await client.post("/webhooks/github", content=fixture["body"],
+                                     headers=signed_headers(secret, fixture))
+        print(f"{fixture['event']:<13} {fixture['payload'].get('action', '-'):<12} "
+              f"{response.status_code} {response.text}")
+
+
+def _latest_runs(dashboard: Dict[str, Any]) -> List[str]:
+    return [
+        f"  {w['name']}: #{w['latest_run']['run_number']} {w['latest_run']['status']}"
+        f" {w['latest_run']['conclusion'] or ''}".rstrip()
+        for repo in dashboard["repos"] for w in repo["workflows"] if w.get("latest_run")
+    ]
+
+
+async def replay_in_process(secret: str, fixtures: List[Dict[str, Any]]):
+    import httpx
+
+    with MockGitHubServer() as server:
+        os.environ["GITHUB_API_URL"] = server.url
+        os.environ.setdefault("GITHUB_TOKEN", "mock-token")
+        os.environ["GITHUB_WEBHOOK_SECRET"] = secret
+
+        from app.main import app
+
+        repos = sorted({f["payload"]["repository"]["full_name"] for f in fixtures if "repository" in f["payload"]})
+        body = {"repos": [dict(zip(("owner", "name"), full_name.split("/", 1))) for full_name in repos]}
+        runs = sorted({
+            f"/api/runs/{f['payload']['repository']['full_name']}/{f['payload']['workflow_run']['workflow_id']}?per_page=3"
+            for f in fixtures if "workflow_run" in f["payload"]
+        })
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay") as client:
+            before = (await client.post("/api/dashboard", json=body)).json()
+            for path in runs:
+                await client.get(path)
+            print("before:", *_latest_runs(before), sep="\n")
+
+            calls = server.requests
+            await replay(client, secret, fixtures)
+
+            after = (await client.post("/api/dashboard", json=body)).json()
+            print("after:", *_latest_runs(after), sep="\n")
+            for path in runs:
+                data = (await client.get(path)).json()
+                print(f"{path}:", ", ".join(f"#{r['run_number']} {r['conclusion'] or r['status']}" for r in data["runs"]))
+            print(f"GitHub calls during replay and reads: {server.requests - calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded GitHub webhook deliveries")
+    parser.add_argument("fixtures", nargs="*", help="fixture files (default: all recorded fixtures)")
+    parser.add_argument("--url", help="dashboard base URL; omit to run in-process against the mock GitHub")
+    parser.add_argument("--secret", default=os.getenv("GITHUB_WEBHOOK_SECRET", "replay-secret"))
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures or sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.json"))))
+    if args.url:
+        import httpx
+
+        async def run():
+            async with httpx.AsyncClient(base_url=args.url) as client:
+                await replay(client, args.secret, fixtures)
+        asyncio.run(run())
+    else:
+        import logging
+        logging.disable(logging.INFO)
+        asyncio.run(replay_in_process(args.secret, fixtures))
+
+
+if __name__ == "__main__":
+    main()
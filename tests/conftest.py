@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Module-level stores open their files on import: keep them out of ./data
+_scratch = tempfile.mkdtemp(prefix="dashboard-tests-")
+os.environ.setdefault("DATABASE_PATH", os.path.join(_scratch, "dashboard.db"))
+os.environ.setdefault("LOG_CACHE_DIR", os.path.join(_scratch, "logs"))
+os.environ.setdefault("SHARED_STATE_URL", "")
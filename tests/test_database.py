@@ -0,0 +1,123 @@
+import pytest
+
+from app.database import RunStore
+
+DAY = "2026-01-01"
+
+
+def run(run_id: int, status: str = "completed", conclusion: str = "success", attempt: int = 1,
+        sha: str = "abc", hour: int = 0, minutes: int = 5, workflow_id: int = 1):
+    created = f"{DAY}T{hour:02d}:00:00Z"
+    return {
+        "id": run_id, "workflow_id": workflow_id, "run_number": run_id, "run_attempt": attempt,
+        "status": status, "conclusion": conclusion if status == "completed" else None,
+        "event": "push", "head_branch": "main", "head_sha": sha, "actor": {"login": "octocat"},
+        "created_at": created, "run_started_at": f"{DAY}T{hour:02d}:01:00Z",
+        # Later attempts are later updates of the same run
+        "updated_at": f"{DAY}T{hour:02d}:{minutes + attempt * 10:02d}:00Z",
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RunStore(str(tmp_path / "runs.db"))
+    yield store
+    store.close()
+
+
+def daily(store: RunStore):
+    rows = store._connect().execute(
+        "SELECT workflow_id, day, runs, success, failure, cancelled, duration_sum, queued, queue_sum "
+        "FROM run_daily WHERE runs != 0 ORDER BY workflow_id, day").fetchall()
+    # Sums built up by adding and retracting shares differ from a single pass in the last digits
+    return [(*row[:6], round(row[6], 3), row[7], round(row[8], 3)) for row in rows]
+
+
+def histogram(store: RunStore):
+    return store._connect().execute(
+        "SELECT workflow_id, day, metric, upper, count FROM run_histogram WHERE count != 0 "
+        "ORDER BY workflow_id, day, metric, upper").fetchall()
+
+
+def flips(store: RunStore):
+    return [row[0] for row in store._connect().execute("SELECT run_id FROM run_flips ORDER BY run_id")]
+
+
+def rebuilt(tmp_path, runs):
+    """A store holding only the final state of ``runs``, written once"""
+    fresh = RunStore(str(tmp_path / "fresh.db"))
+    fresh.upsert_runs("octo", "repo", runs)
+    return fresh
+
+
+def test_insert_aggregates_completed_runs_only(store):
+    store.upsert_runs("octo", "repo", [
+        run(1), run(2, conclusion="failure", hour=1), run(3, conclusion="cancelled", hour=2),
+        run(4, status="in_progress", hour=3),
+    ])
+    assert daily(store) == [(1, DAY, 3, 1, 1, 1, 3 * 840, 3, 3 * 60)]
+    assert sum(row["count"] for row in histogram(store) if row["metric"] == "duration") == 3
+
+
+def test_updates_retract_old_row_before_adding_new(store, tmp_path):
+    store.upsert_runs("octo", "repo", [run(1), run(2, conclusion="failure", hour=1)])
+    # Re-run into progress, then completed with another result and duration
+    store.upsert_runs("octo", "repo", [run(2, status="in_progress", attempt=2, hour=1)])
+    store.upsert_runs("octo", "repo", [run(2, conclusion="success", attempt=3, hour=1, minutes=20)])
+    store.upsert_runs("octo", "repo", [run(1, conclusion="failure", attempt=2)])
+    final = [run(1, conclusion="failure", attempt=2), run(2, conclusion="success", attempt=3, hour=1, minutes=20)]
+    fresh = rebuilt(tmp_path, final)
+    assert daily(store) == daily(fresh)
+    assert histogram(store) == histogram(fresh)
+
+
+def test_stale_copies_do_not_change_aggregates(store):
+    store.upsert_runs("octo", "repo", [run(1, conclusion="failure", attempt=2)])
+    before = (daily(store), histogram(store))
+    store.upsert_runs("octo", "repo", [run(1, conclusion="success", attempt=1)])
+    assert (daily(store), histogram(store)) == before
+
+
+def test_delete_retracts_run(store, tmp_path):
+    store.upsert_runs("octo", "repo", [run(1, conclusion="failure"), run(2, hour=1), run(3, hour=2, sha="def")])
+    store.delete_runs([2])
+    fresh = rebuilt(tmp_path, [run(1, conclusion="failure"), run(3, hour=2, sha="def")])
+    assert daily(store) == daily(fresh)
+    assert histogram(store) == histogram(fresh)
+    assert flips(store) == []
+
+
+def test_success_after_failure_on_same_commit_is_a_flip(store):
+    store.upsert_runs("octo", "repo", [run(1, conclusion="failure"), run(2, hour=1), run(3, hour=2, sha="def")])
+    assert flips(store) == [2]
+
+
+def test_backfilled_failure_flips_later_success(store):
+    store.upsert_runs("octo", "repo", [run(2, hour=1)])
+    assert flips(store) == []
+    store.upsert_runs("octo", "repo", [run(1, conclusion="failure")])
+    assert flips(store) == [2]
+
+
+def test_rerun_after_failed_attempt_is_a_flip(store):
+    store.upsert_runs("octo", "repo", [run(1, conclusion="failure")])
+    store.upsert_runs("octo", "repo", [run(1, conclusion="success", attempt=2)])
+    assert flips(store) == [1]
+
+
+def test_flip_is_retracted_when_rerun_fails(store):
+    store.upsert_runs("octo", "repo", [run(1, conclusion="failure"), run(2, hour=1)])
+    store.upsert_runs("octo", "repo", [run(2, status="in_progress", attempt=2, hour=1)])
+    assert flips(store) == []
+    store.upsert_runs("octo", "repo", [run(2, conclusion="failure", attempt=3, hour=1)])
+    assert flips(store) == []
+    store.upsert_runs("octo", "repo", [run(2, conclusion="success", attempt=4, hour=1)])
+    assert flips(store) == [2]
+
+
+def test_flip_counts_once_per_run(store):
+    store.upsert_runs("octo", "repo", [run(1, conclusion="failure"), run(2, hour=1)])
+    store.upsert_runs("octo", "repo", [run(2, attempt=2, hour=1)])
+    analytics = store.workflow_analytics("octo", "repo", 36500)
+    assert flips(store) == [2]
+    assert [w["flips"] for w in analytics] == [1]
@@ -0,0 +1,56 @@
+import base64
+
+import pytest
+from fastapi import HTTPException
+
+from app.pagination import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor, next_cursor,
+                            page_limit, page_start)
+
+
+@pytest.mark.parametrize("offset", [0, 1, 99, 100, 12345, 10 ** 12])
+def test_cursor_round_trip(offset):
+    cursor = encode_cursor(offset)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == offset
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not base64!",
+    base64.urlsafe_b64encode(b"o:-1").decode(),
+    base64.urlsafe_b64encode(b"o:ten").decode(),
+    base64.urlsafe_b64encode(b"x:10").decode(),
+    base64.urlsafe_b64encode(b"10").decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+])
+def test_invalid_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(cursor)
+    assert e.value.status_code == 400
+
+
+def test_next_cursor_until_the_end():
+    assert decode_cursor(next_cursor(100, 250)) == 100
+    assert next_cursor(250, 250) is None
+    assert next_cursor(300, 250) is None
+
+
+def test_page_start_prefers_cursor_over_page():
+    assert page_start(encode_cursor(40), 3, 10) == 40
+    assert page_start(None, 3, 10) == 20
+    assert page_start(None, None, 10) == 0
+
+
+def test_page_below_one_is_400():
+    with pytest.raises(HTTPException) as e:
+        page_start(None, 0, 10)
+    assert e.value.status_code == 400
+
+
+def test_page_limit_bounds():
+    assert page_limit(None) == DEFAULT_PAGE_SIZE
+    assert page_limit(None, default=None) is None
+    assert page_limit(MAX_PAGE_SIZE) == MAX_PAGE_SIZE
+    for limit in (0, MAX_PAGE_SIZE + 1):
+        with pytest.raises(HTTPException):
+            page_limit(limit)
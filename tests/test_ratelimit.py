@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from app.ratelimit import RateLimiter, RateLimitExceeded, background_priority
+
+RESET = time.time() + 3600
+
+
+def headers(remaining: int, used: int = None, limit: int = 5000, reset: float = RESET, **extra):
+    values = {"X-RateLimit-Limit": str(limit), "X-RateLimit-Remaining": str(remaining),
+              "X-RateLimit-Reset": str(int(reset)), **extra}
+    if used is not None:
+        values["X-RateLimit-Used"] = str(used)
+    return values
+
+
+def test_reported_count_replaces_optimistic_charges():
+    limiter = RateLimiter()
+    limiter.update(headers(100, used=4900))
+    for _ in range(3):
+        limiter.acquire()
+    assert limiter.budget("default") == 97
+    limiter.update(headers(98, used=4902))
+    assert limiter.budget("default") == 98
+
+
+def test_response_overtaken_by_a_later_count_is_ignored():
+    limiter = RateLimiter()
+    limiter.update(headers(90, used=4910))
+    # Sent earlier, answered later
+    limiter.update(headers(95, used=4905))
+    assert limiter.budget("default") == 90
+
+
+def test_refund_of_overtaken_304_goes_to_current_bucket():
+    limiter = RateLimiter()
+    limiter.update(headers(90, used=4910))
+    limiter.update(headers(95, used=4905), refund=True)
+    assert limiter.budget("default") == 91
+
+
+def test_refund_of_latest_304_keeps_reported_count():
+    limiter = RateLimiter()
+    limiter.update(headers(90, used=4910))
+    limiter.acquire()
+    # GitHub did not count the 304, so its figures already leave the charge out
+    limiter.update(headers(90, used=4910), refund=True)
+    assert limiter.budget("default") == 90
+
+
+def test_refund_without_headers_returns_the_charge():
+    limiter = RateLimiter()
+    limiter.update(headers(10, used=4990))
+    limiter.acquire()
+    limiter.update({}, refund=True)
+    assert limiter.budget("default") == 10
+
+
+def test_refund_never_exceeds_limit():
+    limiter = RateLimiter()
+    limiter.update(headers(59, used=1, limit=60))
+    limiter.update({}, refund=True)
+    limiter.update({}, refund=True)
+    limiter.update(headers(60, used=0, limit=60), refund=True)
+    assert limiter.budget("default") == 60
+
+
+def test_count_without_used_header_is_authoritative():
+    limiter = RateLimiter()
+    limiter.update(headers(90, used=4910))
+    limiter.update(headers(95))
+    assert limiter.budget("default") == 95
+
+
+def test_new_window_replaces_old_bucket():
+    limiter = RateLimiter()
+    limiter.update(headers(0, used=5000))
+    limiter.update(headers(4999, used=1, reset=RESET + 3600))
+    assert limiter.budget("default") == 4999
+
+
+def test_accounts_are_separate():
+    limiter = RateLimiter()
+    limiter.update(headers(0, used=5000), account="a")
+    limiter.update(headers(100, used=4900), account="b")
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire(account="a")
+    limiter.acquire(account="b")
+    assert limiter.budget("b") == 99
+
+
+def test_background_requests_leave_the_reserve():
+    limiter = RateLimiter(reserve=0.2)
+    limiter.update(headers(1000, used=4000))
+    limiter.acquire()
+    with background_priority(), pytest.raises(RateLimitExceeded):
+        limiter.acquire()
+    assert limiter.deferred == 1
+
+
+def test_retry_after_blocks_account():
+    limiter = RateLimiter()
+    limiter.update(headers(100, used=4900, **{"Retry-After": "60"}))
+    assert limiter.budget("default") == -1
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire()
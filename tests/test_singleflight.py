@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.singleflight import AsyncSingleFlight, SingleFlight
+
+WAITERS = 4
+
+
+class Boom(Exception):
+    pass
+
+
+def fail():
+    raise Boom("upstream failed")
+
+
+def run_coalesced(flight: SingleFlight, func):
+    """Start WAITERS calls of one key while the first is still running; their results or errors"""
+    started, release = threading.Event(), threading.Event()
+
+    def leader():
+        started.set()
+        release.wait(5)
+        return func()
+
+    def outcome(call):
+        try:
+            return call.result()
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(WAITERS + 1) as pool:
+        first = pool.submit(flight.do, "key", leader)
+        started.wait(5)
+        others = [pool.submit(flight.do, "key", func) for _ in range(WAITERS)]
+        while flight.waiting < WAITERS:
+            time.sleep(0.001)
+        release.set()
+        return [outcome(call) for call in [first, *others]]
+
+
+def test_waiters_share_the_result():
+    flight = SingleFlight("test")
+    calls = []
+    results = run_coalesced(flight, lambda: calls.append(1) or "value")
+    assert results == ["value"] * (WAITERS + 1)
+    assert len(calls) == 1
+    assert (flight.executions, flight.coalesced, flight.max_waiters) == (1, WAITERS, WAITERS)
+
+
+def test_waiters_get_the_leaders_exception():
+    flight = SingleFlight("test")
+    results = run_coalesced(flight, fail)
+    assert isinstance(results[0], Boom)
+    assert all(result is results[0] for result in results)
+    assert flight.stats()["in_flight"] == 0
+    assert flight.waiting == 0
+
+
+def test_failure_is_not_remembered():
+    flight = SingleFlight("test")
+    with pytest.raises(Boom):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: "retried") == "retried"
+    assert flight.executions == 2
+
+
+def test_async_waiters_get_the_leaders_exception():
+    flight = AsyncSingleFlight("test")
+    calls = []
+
+    async def fail_later():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise Boom("upstream failed")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", fail_later) for _ in range(WAITERS)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(isinstance(result, Boom) for result in results)
+    assert results[0] is results[-1]
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_async_leader_cancelled_does_not_cancel_waiters():
+    flight = AsyncSingleFlight("test")
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "value"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await waiter, leader.cancelled()
+
+    assert asyncio.run(main()) == ("value", True)
@@ -0,0 +1,121 @@
+import hashlib
+import hmac
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app import webhooks
+from app.shared import SQLiteSharedStore, set_shared_store
+
+SECRET = "webhook-secret"
+
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def delivery(event: str, payload, delivery_id: str = "d-1"):
+    body = json.dumps(payload).encode()
+    headers = {"X-Hub-Signature-256": sign(body), "X-GitHub-Event": event, "X-GitHub-Delivery": delivery_id}
+    return headers, body
+
+
+@pytest.fixture(autouse=True)
+def receiver(monkeypatch):
+    monkeypatch.setenv("GITHUB_WEBHOOK_SECRET", SECRET)
+    webhooks._recent_deliveries.clear()
+    webhooks._pending.clear()
+    webhooks._counters.clear()
+    set_shared_store(None)
+    yield
+    set_shared_store(None)
+
+
+def test_verify_signature_accepts_matching_digest():
+    assert webhooks.verify_signature(SECRET, b"{}", sign(b"{}"))
+
+
+@pytest.mark.parametrize("signature", [
+    None,
+    "",
+    sign(b"{}")[len("sha256="):],
+    "sha1=" + hmac.new(SECRET.encode(), b"{}", hashlib.sha1).hexdigest(),
+    sign(b"{}", "other-secret"),
+    sign(b"{ }"),
+])
+def test_verify_signature_rejects(signature):
+    assert not webhooks.verify_signature(SECRET, b"{}", signature)
+
+
+def test_unconfigured_secret_is_503(monkeypatch):
+    monkeypatch.delenv("GITHUB_WEBHOOK_SECRET")
+    with pytest.raises(HTTPException) as e:
+        webhooks.handle_webhook(*delivery("ping", {}))
+    assert e.value.status_code == 503
+
+
+def test_bad_signature_is_401_and_not_remembered():
+    headers, body = delivery("ping", {})
+    headers["X-Hub-Signature-256"] = sign(body, "other-secret")
+    with pytest.raises(HTTPException) as e:
+        webhooks.handle_webhook(headers, body)
+    assert e.value.status_code == 401
+    assert webhooks.stats()["rejected"] == 1
+    # The genuine delivery with the same ID is still applied
+    assert webhooks.handle_webhook(*delivery("ping", {}))["status"] == "pong"
+
+
+def test_redelivery_is_duplicate():
+    headers, body = delivery("ping", {})
+    assert webhooks.handle_webhook(headers, body)["status"] == "pong"
+    assert webhooks.handle_webhook(headers, body) == {"status": "duplicate", "event": "ping"}
+    assert webhooks.stats()["duplicates"] == 1
+
+
+def test_deliveries_without_id_are_not_deduplicated():
+    headers, body = delivery("ping", {})
+    del headers["X-GitHub-Delivery"]
+    assert webhooks.handle_webhook(headers, body)["status"] == "pong"
+    assert webhooks.handle_webhook(headers, body)["status"] == "pong"
+
+
+@pytest.mark.parametrize("payload", [
+    {"repository": {}},
+    {"repository": {"full_name": "octo/repo"}},
+    {"repository": {"full_name": "octo/repo"}, "workflow_run": []},
+    {"repository": "octo/repo", "workflow_run": {}},
+])
+def test_malformed_payload_is_400(payload):
+    with pytest.raises(HTTPException) as e:
+        webhooks.handle_webhook(*delivery("workflow_run", payload))
+    assert e.value.status_code == 400
+
+
+def test_failed_delivery_is_released_for_redelivery():
+    headers, body = delivery("workflow_run", {"repository": {}})
+    for _ in range(2):
+        # Not reported as a duplicate: GitHub's redelivery must be applied
+        with pytest.raises(HTTPException) as e:
+            webhooks.handle_webhook(headers, body)
+        assert e.value.status_code == 400
+    assert "duplicates" not in webhooks.stats()
+
+
+def test_shared_store_catches_redelivery_to_another_worker(tmp_path):
+    store = SQLiteSharedStore(str(tmp_path / "shared.db"))
+    set_shared_store(store)
+    headers, body = delivery("ping", {}, "d-shared")
+    assert webhooks.handle_webhook(headers, body)["status"] == "pong"
+    # Another worker only knows the delivery through the shared store
+    webhooks._recent_deliveries.clear()
+    assert webhooks.handle_webhook(headers, body)["status"] == "duplicate"
+
+
+def test_shared_reservation_is_dropped_when_handling_fails(tmp_path):
+    store = SQLiteSharedStore(str(tmp_path / "shared.db"))
+    set_shared_store(store)
+    headers, body = delivery("workflow_run", {"repository": {}}, "d-failed")
+    with pytest.raises(HTTPException):
+        webhooks.handle_webhook(headers, body)
+    assert store.get("delivery:d-failed") is None